@@ -1,2 +1,4 @@
+from .restaurant import RestaurantAdmin
 from .reservation import ReservationAdmin
 from .table import TableAdmin
+from .waitlist import WaitlistEntryAdmin
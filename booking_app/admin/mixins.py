@@ -0,0 +1,31 @@
+from booking_app.routers import use_replica
+from booking_app.services import pin_to_primary, replica_for
+
+
+class ReplicaChangelistMixin:
+    """
+    Read changelist pages from a read replica when one is healthy, unless
+    the staff user saved or deleted something lately (see
+    `booking_app.services.replicas`).
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        replica = replica_for(request.user) if request.method == "GET" else None
+        with use_replica(replica):
+            response = super().changelist_view(request, extra_context)
+            # the rows are only read while rendering
+            if hasattr(response, "render"):
+                response.render()
+        return response
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        pin_to_primary(request.user)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        pin_to_primary(request.user)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        pin_to_primary(request.user)
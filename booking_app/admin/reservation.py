@@ -1,13 +1,32 @@
 from django.contrib import admin
 
 from booking_app.models import Reservation
+from booking_app.services import export_reservations
+from .mixins import ReplicaChangelistMixin
 
 
 @admin.register(Reservation)
-class ReservationAdmin(admin.ModelAdmin):
+class ReservationAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
 
-    list_display = ("id", "user", "table", "number_of_seats", "cost", "created")
+    list_display = (
+        "id",
+        "user",
+        "table",
+        "number_of_seats",
+        "cost",
+        "period",
+        "created",
+    )
     list_filter = ("user", "table")
     search_fields = ("user__username", "table__id")
     readonly_fields = ("created", "modified")
     ordering = ("-created",)
+    actions = ["export_ndjson", "export_csv"]
+
+    @admin.action(description="Export selected reservations as NDJSON")
+    def export_ndjson(self, request, queryset):
+        return export_reservations(queryset, "ndjson")
+
+    @admin.action(description="Export selected reservations as CSV")
+    def export_csv(self, request, queryset):
+        return export_reservations(queryset, "csv")
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from booking_app.models import Restaurant
+from .mixins import ReplicaChangelistMixin
+
+
+@admin.register(Restaurant)
+class RestaurantAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
+
+    list_display = ("id", "name", "slug", "shard")
+    list_filter = ("shard",)
+    search_fields = ("name", "slug")
+    prepopulated_fields = {"slug": ("name",)}
+    readonly_fields = ("created", "modified")
+    ordering = ("name",)
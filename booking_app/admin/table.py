@@ -1,12 +1,14 @@
 from django.contrib import admin
 
 from booking_app.models import Table
+from .mixins import ReplicaChangelistMixin
 
 
 @admin.register(Table)
-class TableAdmin(admin.ModelAdmin):
+class TableAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
 
-    list_display = ("id", "seats")
+    list_display = ("id", "restaurant", "seats", "available_seats")
+    list_filter = ("restaurant",)
     search_fields = ("id",)
-    readonly_fields = ("created", "modified")
+    readonly_fields = ("available_seats", "created", "modified")
     ordering = ("-created",)
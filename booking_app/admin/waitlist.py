@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from booking_app.models import WaitlistEntry
+from .mixins import ReplicaChangelistMixin
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
+
+    list_display = (
+        "id",
+        "user",
+        "restaurant",
+        "number_of_people",
+        "status",
+        "reservation_id",
+        "expires",
+        "created",
+    )
+    list_filter = ("status",)
+    search_fields = ("user__username",)
+    readonly_fields = ("reservation_id", "created", "modified")
+    ordering = ("-created",)
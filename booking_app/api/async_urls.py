@@ -0,0 +1,20 @@
+from django.urls import path, include
+
+from adrf.routers import DefaultRouter, SimpleRouter
+
+from .views import AsyncReservationViewSet
+
+
+router = DefaultRouter()
+router.register("", AsyncReservationViewSet, basename="async-reservation")
+
+restaurant_router = SimpleRouter()
+restaurant_router.register(
+    "", AsyncReservationViewSet, basename="async-restaurant-reservation"
+)
+
+
+urlpatterns = [
+    path("restaurants/<slug:restaurant>/", include(restaurant_router.urls)),
+    path("", include(router.urls)),
+]
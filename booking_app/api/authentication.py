@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Token key to `(user, token)` lookups, kept in an in-process LRU with a
+    TTL and, when `AUTH_TOKEN_CACHE_ALIAS` names a Django cache, in that
+    cache as well so that every worker shares hits and invalidations.
+
+    Entries are written under a generation number that `delete()` bumps.
+    Take `generation()` before the lookup and pass it to `set()`: a lookup
+    that started before an invalidation is then not kept in-process, and in
+    the shared cache it lands under a key that is never read again. Shared
+    entries are keyed by the generation, so an invalidation there drops every
+    cached token, not only the deleted ones.
+
+    Settings are read on every call, so `override_settings` applies at once.
+    """
+
+    PREFIX = "auth_token:"
+    GENERATION_KEY = PREFIX + "generation"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+
+    def generation(self):
+        """
+        Returns:
+            tuple: The in-process generation and the shared cache's, or None
+            without a shared cache.
+        """
+        shared = self._shared()
+        return self._generation, self._shared_generation(shared)
+
+    def get(self, key):
+        """
+        Returns:
+            tuple: `(user, token)`, or None on a miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is None:
+            return None
+        generation = self.generation()
+        value = shared.get(self._shared_key(key, generation))
+        if value is not None:
+            self._remember(key, value, generation, now)
+        return value
+
+    def set(self, key, value, generation):
+        """
+        Cache `value` unless the cache was invalidated since `generation`
+        was taken.
+        """
+        self._remember(key, value, generation, time.monotonic())
+        shared = self._shared()
+        if shared is not None and generation[1] is not None:
+            # under an old generation the entry is never read
+            shared.set(
+                self._shared_key(key, generation),
+                value,
+                settings.AUTH_TOKEN_CACHE_TTL,
+            )
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.incr(self.GENERATION_KEY)
+            except ValueError:
+                # no generation yet; the next lookup starts a fresh one
+                pass
+
+    def clear(self):
+        """
+        Empty the in-process LRU.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, value, generation, now):
+        with self._lock:
+            if generation[0] != self._generation:
+                return
+            self._entries[key] = (now + settings.AUTH_TOKEN_CACHE_TTL, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def _shared(self):
+        alias = settings.AUTH_TOKEN_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def _shared_generation(self, shared):
+        if shared is None:
+            return None
+        generation = shared.get(self.GENERATION_KEY)
+        if generation is None:
+            # a fresh value, so that entries from before the key was evicted
+            # are never picked up again
+            shared.add(self.GENERATION_KEY, time.time_ns(), timeout=None)
+            generation = shared.get(self.GENERATION_KEY)
+        return generation
+
+    def _shared_key(self, key, generation):
+        return f"{self.PREFIX}{generation[1]}:{key}"
+
+
+token_cache = TokenCache()
+
+
+def _detached(instance):
+    """
+    A new instance of the same model from `instance`'s field values, with its
+    own `_state` and no cached relations.
+    """
+    return type(instance).from_db(
+        instance._state.db,
+        None,
+        [getattr(instance, field.attname) for field in instance._meta.concrete_fields],
+    )
+
+
+def _detached_pair(user, token):
+    user, token = _detached(user), _detached(token)
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    `TokenAuthentication` that skips the `Token` + `User` query while the
+    key is cached in `token_cache`.
+
+    Entries are dropped when the token is deleted or its user saved (e.g.
+    deactivated); see `booking_app.signals.authentication`. Without a shared
+    cache, other processes keep their copy for up to `AUTH_TOKEN_CACHE_TTL`
+    seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            generation = token_cache.generation()
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, _detached_pair(user, token), generation)
+            return user, token
+        # each request gets its own copies to modify
+        return _detached_pair(*cached)
@@ -0,0 +1,13 @@
+from rest_framework.views import exception_handler as default_exception_handler
+
+from booking_app.services import PartitionMissing, missing_partition
+
+
+def exception_handler(exc, context):
+    """
+    DRF's exception handler, answering a reservation in a month without a
+    partition with 503 instead of a server error.
+    """
+    if missing_partition(exc):
+        exc = PartitionMissing()
+    return default_exception_handler(exc, context)
@@ -0,0 +1,95 @@
+import functools
+import inspect
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.status import is_success
+
+from booking_app.routers import current_shard
+from booking_app.services import (
+    IdempotencyKeyReused,
+    cached_response,
+    claim_key,
+    release_key,
+    request_fingerprint,
+    save_response,
+)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# headers of the first response that are sent again with a replay
+REPLAYED_HEADERS = ("Location",)
+
+
+def idempotent(action):
+    """
+    Replay the response of a view method to retries sending the same
+    `Idempotency-Key` header, without running it again; see
+    `booking_app.services.idempotency`. Requests without the header run as
+    usual.
+
+    Only successful responses are stored. After an error the key is free
+    again, so a retry runs the request once more. An async method runs in a
+    single `sync_to_async` hop, inside the transaction holding the key.
+    """
+    if inspect.iscoroutinefunction(action):
+
+        @functools.wraps(action)
+        async def async_wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if key is None:
+                return await action(self, request, *args, **kwargs)
+            run = async_to_sync(functools.partial(action, self, request, *args, **kwargs))
+            return await sync_to_async(_respond)(request, key, run)
+
+        return async_wrapper
+
+    @functools.wraps(action)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return action(self, request, *args, **kwargs)
+        run = functools.partial(action, self, request, *args, **kwargs)
+        return _respond(request, key, run)
+
+    return wrapper
+
+
+def _respond(request, key, run):
+    if not 0 < len(key) <= 255:
+        raise ValidationError({IDEMPOTENCY_HEADER: "Must be 1 to 255 characters."})
+    user = request.user
+    fingerprint = request_fingerprint(request.data, request.path)
+
+    stored = cached_response(user, key)
+    if stored is None:
+        with transaction.atomic(using=current_shard()):
+            stored = claim_key(user, key, fingerprint)
+            if stored is None:
+                response = run()
+                if is_success(response.status_code):
+                    headers = {
+                        name: response[name]
+                        for name in REPLAYED_HEADERS
+                        if name in response
+                    }
+                    save_response(
+                        user,
+                        key,
+                        fingerprint,
+                        response.status_code,
+                        response.data,
+                        headers,
+                    )
+                else:
+                    release_key(user, key)
+                return response
+
+    stored_fingerprint, status_code, data, headers = stored
+    if stored_fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+    return Response(
+        data, status=status_code, headers={**headers, "Idempotent-Replayed": "true"}
+    )
@@ -0,0 +1,87 @@
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class ReservationCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a user's reservations, newest first.
+
+    The cursor encodes the last `(created, id)` seen and a page reads the
+    rows past it with `(created, id) < (%s, %s)`, so every page is an index
+    range scan on `reservation_user_created_idx` whatever the depth, unlike
+    offset pagination which reads and discards all earlier rows.
+
+    `CursorPagination` itself positions on the first ordering field only and
+    skips the rows sharing its value with an offset, up to `offset_cutoff`.
+    `(created, id)` is unique, so the cursors made here never need one and
+    any number of reservations can share a `created` value.
+    """
+
+    ordering = ("-created", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        if reverse:
+            queryset = queryset.order_by("created", "id")
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._past(queryset.model, position, reverse))
+
+        # one more row tells whether another page follows
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        following = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page)
+            else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = position is not None, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _past(self, model, position, reverse):
+        """
+        Filter on the rows after `position`, or before it when `reverse`.
+        """
+        created, _, pk = position.rpartition(",")
+        try:
+            created, pk = parse_datetime(created), int(pk)
+        except ValueError:
+            created = None
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        table = model._meta.db_table
+        return RawSQL(
+            f'("{table}"."created", "{table}"."id") {">" if reverse else "<"} (%s, %s)',
+            (created, pk),
+            output_field=BooleanField(),
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f"{instance.created.isoformat()},{instance.id}"
@@ -1,6 +1,9 @@
-from .table import TableSerializer
+from .table import TableSerializer, TableAvailabilitySerializer
 from .reservation import (
     ReservationSerializer,
     BookSerializer,
+    BookBatchSerializer,
+    WaitlistEntrySerializer,
+    QuoteSerializer,
     CancelReservationSerializer
 )
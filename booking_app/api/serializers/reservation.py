@@ -1,6 +1,12 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.utils import html
 
-from booking_app.models import Reservation
+from booking_app.models import Reservation, WaitlistEntry
 from .table import TableSerializer
 
 
@@ -10,6 +16,8 @@ class ReservationSerializer(serializers.ModelSerializer):
     """
 
     table = TableSerializer(read_only=True, many=False)
+    start = serializers.DateTimeField(read_only=True)
+    end = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Reservation
@@ -18,6 +26,8 @@ class ReservationSerializer(serializers.ModelSerializer):
             "user",
             "number_of_seats",
             "cost",
+            "start",
+            "end",
             "created",
             "modified",
             "table",
@@ -39,14 +49,159 @@ class BookSerializer(serializers.Serializer):
 
     Fields:
         number_of_people (int): Number of individuals requesting a reservation.
+        start (datetime): Optional start of the time slot. Without it the
+            reservation is open-ended.
+        end (datetime): Optional end of the time slot, `BOOKING_SLOT_MINUTES`
+            after `start` by default.
+        waitlist (bool): Join the waitlist when no table is free. Only for
+            open-ended bookings.
+
+    The validated data carries the slot as `period`, or None.
     """
 
     number_of_people = serializers.IntegerField(min_value=1)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    waitlist = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        start = attrs.pop("start", None)
+        end = attrs.pop("end", None)
+        if start is not None and attrs["waitlist"]:
+            raise serializers.ValidationError(
+                {"waitlist": "Only open-ended bookings can wait."}
+            )
+        if start is None:
+            if end is not None:
+                raise serializers.ValidationError({"start": "Required with end."})
+            attrs["period"] = None
+            return attrs
+
+        if end is None:
+            end = start + timedelta(minutes=settings.BOOKING_SLOT_MINUTES)
+        now = timezone.now()
+        if end <= start:
+            raise serializers.ValidationError({"end": "Must be after start."})
+        if end <= now:
+            raise serializers.ValidationError({"end": "Must be in the future."})
+        if start > now + timedelta(days=settings.BOOKING_HORIZON_DAYS):
+            raise serializers.ValidationError(
+                {
+                    "start": "Can't be more than "
+                    f"{settings.BOOKING_HORIZON_DAYS} days ahead."
+                }
+            )
+        attrs["period"] = DateTimeTZRange(start, end)
+        return attrs
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer for waitlist entries.
+    """
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            "id",
+            "number_of_people",
+            "status",
+            "reservation_id",
+            "expires",
+            "created",
+            "modified",
+        ]
+        read_only_fields = fields
+
+
+class BookBatchSerializer(serializers.Serializer):
+    """
+    Serializer for booking tables for several parties at once.
+
+    Fields:
+        number_of_people (list): Party sizes. Each one is validated with
+            `BookSerializer` on its own, so one bad entry doesn't reject the batch.
+    """
 
+    number_of_people = serializers.ListField(allow_empty=False)
+
+    def validate_number_of_people(self, value):
+        # read here rather than at import, so changes to the setting apply
+        if len(value) > settings.BOOKING_BATCH_MAX_SIZE:
+            raise serializers.ValidationError(
+                "Ensure this field has no more than "
+                f"{settings.BOOKING_BATCH_MAX_SIZE} elements."
+            )
+        return value
+
+
+class QuoteSerializer(serializers.Serializer):
+    """
+    Serializer for price quotes.
+
+    Fields:
+        people (int): Party size, from the `people` query parameter.
+        cost (int): What the booking would cost.
+        number_of_seats (int): Seats it would be charged for.
+        table_seats (int): Size of the table it would get.
+    """
+
+    people = serializers.IntegerField(min_value=1)
+    cost = serializers.IntegerField(read_only=True)
+    number_of_seats = serializers.IntegerField(read_only=True)
+    table_seats = serializers.IntegerField(read_only=True)
+
+
+class ReservationIdsField(serializers.Field):
+    """
+    One reservation id, or a non-empty list of them. Repeated form fields
+    count as a list.
+    """
+
+    default_error_messages = {
+        "invalid": "Expected a reservation id or a list of them.",
+        "empty": "This list may not be empty.",
+    }
+
+    def __init__(self, **kwargs):
+        self.child = serializers.IntegerField(min_value=1)
+        super().__init__(**kwargs)
+
+    def get_value(self, dictionary):
+        if html.is_html_input(dictionary) and self.field_name in dictionary:
+            values = dictionary.getlist(self.field_name)
+            return values if len(values) > 1 else values[0]
+        return super().get_value(dictionary)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            if isinstance(data, (dict, bool)):
+                self.fail("invalid")
+            return self.child.run_validation(data)
+        if not data:
+            self.fail("empty")
+        return [self.child.run_validation(value) for value in data]
+
+    def to_representation(self, value):
+        return value
 
 
 class CancelReservationSerializer(serializers.Serializer):
     """
     Serializer for reservation cancellation requests.
+
+    Fields:
+        reservation_id (int or list): The reservation to cancel, or a list
+            of up to `BOOKING_CANCEL_MAX_SIZE` of them.
     """
-    reservation_id = serializers.IntegerField()
+
+    reservation_id = ReservationIdsField()
+
+    def validate_reservation_id(self, value):
+        # read here rather than at import, so changes to the setting apply
+        if isinstance(value, list) and len(value) > settings.BOOKING_CANCEL_MAX_SIZE:
+            raise serializers.ValidationError(
+                "Ensure this field has no more than "
+                f"{settings.BOOKING_CANCEL_MAX_SIZE} elements."
+            )
+        return value
@@ -15,3 +15,20 @@ class TableSerializer(serializers.ModelSerializer):
             "seats",
         ]
         read_only = True
+
+
+class TableAvailabilitySerializer(serializers.Serializer):
+    """
+    Free seats at the tables of one size.
+
+    Fields:
+        seats (int): Table size.
+        tables (int): Number of tables of that size.
+        available_seats (int): Free seats over those tables.
+        largest_party (int): Most free seats at a single one of them.
+    """
+
+    seats = serializers.IntegerField()
+    tables = serializers.IntegerField()
+    available_seats = serializers.IntegerField()
+    largest_party = serializers.IntegerField()
@@ -1,6 +1,6 @@
 from django.urls import path, include
 
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from .views import ReservationViewSet, CustomAuthToken
 
@@ -8,8 +8,13 @@ from .views import ReservationViewSet, CustomAuthToken
 router = DefaultRouter()
 router.register("", ReservationViewSet, basename="reservation")
 
+# the same endpoints for one restaurant, e.g. restaurants/<slug>/book/
+restaurant_router = SimpleRouter()
+restaurant_router.register("", ReservationViewSet, basename="restaurant-reservation")
+
 
 urlpatterns = [
     path("login/", CustomAuthToken.as_view(), name="api-login"),
+    path("restaurants/<slug:restaurant>/", include(restaurant_router.urls)),
     path("", include(router.urls)),
 ]
@@ -1,2 +1,3 @@
 from .reservation import ReservationViewSet
 from .login import CustomAuthToken
+from .reservation_async import AsyncReservationViewSet
@@ -7,9 +7,14 @@ class CustomAuthToken(ObtainAuthToken):
     """
     endpoint for user login using username and password.
     Returns an authentication token if the credentials are valid.
+
+    The password is checked by `PasswordPoolBackend`, off the request
+    thread; 503 Service Unavailable when too many logins are in progress.
     """
 
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        token = Token.objects.get(key=response.data["token"])
-        return Response({"token": token.key, "username": token.user.username})
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data["user"]
+        token, _ = Token.objects.get_or_create(user=user)
+        return Response({"token": token.key, "username": user.username})
@@ -0,0 +1,38 @@
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.status import is_success
+
+from booking_app.routers import current_shard, set_read_replica
+from booking_app.services import pin_to_primary, replica_for
+
+
+class ReplicaReadMixin:
+    """
+    Serve the actions in `replica_actions` from a read replica of the
+    default database, when a healthy one is configured and the user hasn't
+    written lately (see `booking_app.services.replicas`). A successful
+    write pins the user's reads to the primary for a while, so they see it.
+
+    Must come before `RestaurantScopedMixin`, which decides the database.
+    """
+
+    replica_actions = ("list", "availability")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replica = None
+        if self.action in self.replica_actions and current_shard() == DEFAULT_DB_ALIAS:
+            replica = replica_for(request.user)
+        self._previous_replica = set_read_replica(replica)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if hasattr(self, "_previous_replica"):
+            set_read_replica(self._previous_replica)
+            del self._previous_replica
+        if (
+            request.method not in SAFE_METHODS
+            and is_success(response.status_code)
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,46 +1,106 @@
-from django.db.models import Sum, When, Case, Q, FloatField, F, IntegerField
-from django.db.models.functions import Coalesce
 from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from booking_app.models import Table, Reservation
+from booking_app.models import Reservation, WaitlistEntry
+from booking_app.api.idempotency import idempotent
+from booking_app.api.pagination import ReservationCursorPagination
+from booking_app.routers import current_shard
 from booking_app.api.serializers import (
     ReservationSerializer,
     BookSerializer,
+    BookBatchSerializer,
+    QuoteSerializer,
     CancelReservationSerializer,
+    TableAvailabilitySerializer,
+    WaitlistEntrySerializer,
 )
-
-# cost per seat
-SEAT_COST = 100
+from booking_app.services import (
+    EXPORT_FORMATS,
+    NoTableAvailable,
+    TablesBusy,
+    availability,
+    book_table,
+    book_tables,
+    cancel_reservations,
+    export_reservations,
+    join_waitlist,
+    quote,
+)
+from .replica import ReplicaReadMixin
+from .restaurant import RestaurantScopedMixin
 
 
-class ReservationViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
+class ReservationViewSet(
+    ReplicaReadMixin,
+    RestaurantScopedMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+):
     """
     ViewSet for managing restaurant reservations.
 
+    Served for one restaurant under `/restaurants/<slug>/`, and for
+    `BOOKING_DEFAULT_RESTAURANT` without it; see `RestaurantScopedMixin`.
+    The list and availability are read from a replica when there is one;
+    see `ReplicaReadMixin`.
+
     - Authenticated users can:
-        - Book a table using `/book/`
-        - cancel a reservation using `/cancel/`
-        - View their reservations with `GET /`
+        - Book a table using `/book/`, or join the waitlist when none is
+          free and follow the entry with `GET /waitlist/<id>/`
+        - Book tables for several parties using `/book-batch/`
+        - cancel one or more reservations using `/cancel/`
+        - View their reservations with `GET /`, newest first, one cursor
+          page at a time
+        - Download their reservations with `GET /export/` (staff: everyone's)
+        - See free seats by table size with `GET /availability/`
+        - Get the price of a booking with `GET /quote/?people=N`
     """
 
     queryset = Reservation.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ReservationSerializer
+    pagination_class = ReservationCursorPagination
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).select_related(
-            "user", "table"
+        # only what ReservationSerializer reads; `user` is rendered as its id
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.restaurant is not None:
+            queryset = queryset.filter(table__restaurant=self.restaurant)
+        return (
+            queryset.select_related("table")
+            .only(
+                "id",
+                "user",
+                "number_of_seats",
+                "cost",
+                "period",
+                "created",
+                "modified",
+                "table__id",
+                "table__seats",
+            )
         )
 
     @action(
         detail=False, methods=["post"], serializer_class=BookSerializer, url_path="book"
     )
-    def book(self, request):
+    @idempotent
+    def book(self, request, **kwargs):
         """
         Book a table based on the number of people.
 
+        Request body:
+            - number_of_people (int): Party size.
+            - start, end (datetime, optional): Time slot to hold the table for;
+              without them the reservation holds it until cancelled.
+            - waitlist (bool, optional): Wait for a table instead of failing.
+
+        Request headers:
+            - Idempotency-Key (optional): A retry with the same key and body
+              gets the first response back, marked `Idempotent-Replayed`,
+              without booking again, for `BOOKING_IDEMPOTENCY_TTL` seconds.
+
         Rules:
         - Round up odd numbers (unless they match table size).
         - Find the cheapest fitting table.
@@ -48,105 +108,287 @@ class ReservationViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
 
         Returns:
             200 OK with Reservation details.
+            202 Accepted with the waitlist entry when `waitlist` is set and
+            no table is free; `Location` is its status URL.
             400 Bad Request if no table is available.
+            409 Conflict if every fitting table is locked by concurrent bookings.
+            422 Unprocessable Entity if the Idempotency-Key was used with
+            another body.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         people = serializer.validated_data["number_of_people"]
+        period = serializer.validated_data["period"]
 
-        if people % 2 == 1:
-            adjusted_seats = people + 1
-        else:
-            adjusted_seats = people
-
-        cost_conditions = Case(
-            When(Q(seats=people), then=(people - 1) * SEAT_COST),
-            When(Q(available_seats=people), then=people * SEAT_COST),
-            When(Q(seats=adjusted_seats), then=(adjusted_seats - 1) * SEAT_COST),
-            When(
-                Q(available_seats__gte=adjusted_seats),
-                then=adjusted_seats * SEAT_COST,
-            ),
-            default=0,
-            output_field=FloatField(),
+        try:
+            reservation = book_table(request.user, people, period=period)
+        except (NoTableAvailable, TablesBusy):
+            if not serializer.validated_data["waitlist"]:
+                raise
+            return self.waitlist_response(join_waitlist(request.user, people))
+        return Response(
+            ReservationSerializer(reservation).data,
+            status=status.HTTP_200_OK,
         )
 
-        number_of_seats_conditions = Case(
-            When(Q(seats=people), then=people),
-            When(Q(available_seats=people), then=people),
-            When(Q(seats=adjusted_seats), then=adjusted_seats),
-            When(
-                Q(available_seats__gte=adjusted_seats),
-                then=adjusted_seats,
-            ),
-            default=0,
-            output_field=IntegerField(),
+    def waitlist_response(self, entry):
+        return Response(
+            WaitlistEntrySerializer(entry).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                "Location": self.reverse_action(
+                    "waitlist", kwargs={**self.kwargs, "entry_id": entry.pk}
+                )
+            },
         )
 
-        table = (
-            Table.objects.annotate(
-                available_seats=F("seats")
-                - Coalesce(Sum("reservations__number_of_seats"), 0)
+    @action(
+        detail=False,
+        methods=["get"],
+        serializer_class=WaitlistEntrySerializer,
+        url_path=r"waitlist/(?P<entry_id>\d+)",
+        pagination_class=None,
+    )
+    def waitlist(self, request, entry_id, **kwargs):
+        """
+        Status of a waitlist entry of the user, read with one indexed query.
+
+        Returns:
+            200 OK with the entry; `status` is "waiting", "booked" (with
+            `reservation_id`) or "expired".
+            404 Not Found if the entry does not exist or does not belong to
+            the user.
+        """
+        entry = WaitlistEntry.objects.filter(
+            pk=entry_id, user=request.user, restaurant=self.restaurant
+        ).first()
+        if entry is None:
+            return Response(
+                {"detail": "Waitlist entry not found."},
+                status=status.HTTP_404_NOT_FOUND,
             )
-            .filter(available_seats__gte=people)
-            .annotate(
-                calculated_cost=cost_conditions,
-                calculated_number_of_seats=number_of_seats_conditions,
+        return Response(self.get_serializer(entry).data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=BookBatchSerializer,
+        url_path="book-batch",
+    )
+    def book_batch(self, request, **kwargs):
+        """
+        Book tables for several parties in one transaction.
+
+        Request body:
+            - number_of_people (list[int]): One party size per booking.
+
+        Each party is validated like `/book/` and seated in order at the
+        cheapest table left. The response lists one result per party, in
+        request order, with `status` "booked", "failed" or "invalid".
+
+        Returns:
+            200 OK when every party was booked.
+            207 Multi-Status when some parties were rejected.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        items = [
+            BookSerializer(data={"number_of_people": value})
+            for value in serializer.validated_data["number_of_people"]
+        ]
+        valid = [item for item in items if item.is_valid()]
+        reservations = iter(
+            book_tables(
+                request.user,
+                [item.validated_data["number_of_people"] for item in valid],
             )
-            .exclude(calculated_cost=0.0)
-            .order_by("calculated_cost", "available_seats")
-            .first()
         )
-        if not table:
-            return Response(
-                {"detail": "No suitable table available."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        reservation = Reservation.objects.create(
-            user=request.user,
-            table=table,
-            number_of_seats=table.calculated_number_of_seats,
-            cost=table.calculated_cost,
+
+        results = []
+        for item in items:
+            result = {"number_of_people": item.initial_data["number_of_people"]}
+            if item.errors:
+                result.update(status="invalid", errors=item.errors)
+            else:
+                reservation = next(reservations)
+                if reservation is None:
+                    result.update(status="failed", detail=NoTableAvailable.default_detail)
+                else:
+                    result.update(
+                        status="booked",
+                        reservation=ReservationSerializer(reservation).data,
+                    )
+            results.append(result)
+
+        if all(result["status"] == "booked" for result in results):
+            response_status = status.HTTP_200_OK
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        serializer_class=TableAvailabilitySerializer,
+        url_path="availability",
+        pagination_class=None,
+    )
+    def availability(self, request, **kwargs):
+        """
+        Free seats by table size, without booking anything.
+
+        Served from a cache that is refreshed after every committed booking,
+        cancellation or table change, so polling doesn't query the database.
+        Seats held by time-slotted reservations are not subtracted.
+
+        Returns:
+            200 OK with one entry per table size, smallest first.
+        """
+        return Response(
+            self.get_serializer(availability(), many=True).data,
+            status=status.HTTP_200_OK,
         )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        serializer_class=QuoteSerializer,
+        url_path="quote",
+        pagination_class=None,
+    )
+    def quote(self, request, **kwargs):
+        """
+        Price a booking without making it.
+
+        Query parameters:
+            - people (int): Party size.
+
+        Priced like `/book/` from the cached table classes; never reads
+        reservations. Seats held by time-slotted reservations are not taken
+        into account.
+
+        Returns:
+            200 OK with the cost, charged seats and table size.
+            400 Bad Request if no table is available.
+        """
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        people = serializer.validated_data["people"]
+
+        found = quote(people)
+        if found is None:
+            raise NoTableAvailable()
+        table_seats, _, cost, number_of_seats = found
         return Response(
-            ReservationSerializer(reservation).data,
+            self.get_serializer(
+                {
+                    "people": people,
+                    "cost": cost,
+                    "number_of_seats": number_of_seats,
+                    "table_seats": table_seats,
+                }
+            ).data,
             status=status.HTTP_200_OK,
         )
 
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
+    def export(self, request, **kwargs):
+        """
+        Stream reservations as a file, one reservation per line.
+
+        Query parameters:
+            - export_format: "ndjson" (default) or "csv".
+
+        Staff users export every reservation of the restaurant, other users
+        their own.
+
+        Returns:
+            200 OK with the streamed file.
+            400 Bad Request for an unknown format.
+        """
+        export_format = request.query_params.get("export_format", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"export_format must be one of {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # streamed after the restaurant is reset, so pinned to its shard now
+        queryset = Reservation.objects.using(current_shard())
+        if self.restaurant is not None:
+            queryset = queryset.filter(table__restaurant=self.restaurant)
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        return export_reservations(queryset, export_format)
+
     @action(
         detail=False,
         methods=["post"],
         serializer_class=CancelReservationSerializer,
         url_path="cancel",
     )
-    def cancel(self, request):
+    def cancel(self, request, **kwargs):
         """
-        Cancel an existing reservation for the user.
+        Cancel reservations of the user.
 
         Request body:
-            - reservation_id (int): ID of the reservation to cancel.
+            - reservation_id (int or list[int]): The reservation to cancel, or
+              a list of them.
+
+        All of them are deleted in one statement. Cancelling again changes
+        nothing, so a request can safely be retried; the retry reports the
+        reservations as not found. For a list, the response has one result
+        per id, in request order, with `status` "cancelled" or "not_found"
+        (missing, already cancelled or someone else's).
 
         Returns:
-            200 OK on successful cancellation.
-            404 Not Found if reservation does not exist or does not belong to the user.
+            200 OK when every reservation was cancelled.
+            207 Multi-Status when some ids of a list were not found.
+            404 Not Found if a single reservation does not exist or does not
+            belong to the user.
         """
-        reservation_id = request.data.get("reservation_id")
-        if not reservation_id:
+        if not request.data.get("reservation_id"):
             return Response(
                 {"detail": "Reservation ID is required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservation_id = serializer.validated_data["reservation_id"]
 
-        try:
-            reservation = Reservation.objects.get(id=reservation_id, user=request.user)
-        except Reservation.DoesNotExist:
+        cancelled = cancel_reservations(
+            request.user,
+            reservation_id if isinstance(reservation_id, list) else [reservation_id],
+        )
+        return self.cancellation_response(reservation_id, cancelled)
+
+    @staticmethod
+    def cancellation_response(reservation_id, cancelled):
+        """
+        The response to a cancellation of `reservation_id` (one id or a list)
+        when the ids in `cancelled` were cancelled.
+        """
+        if not isinstance(reservation_id, list):
+            if reservation_id in cancelled:
+                return Response(
+                    {"detail": "Reservation cancelled successfully."},
+                    status=status.HTTP_200_OK,
+                )
             return Response(
                 {"detail": "Reservation not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        reservation.delete()
-
-        return Response(
-            {"detail": "Reservation cancelled successfully."}, status=status.HTTP_200_OK
-        )
+        results = [
+            {
+                "reservation_id": value,
+                "status": "cancelled" if value in cancelled else "not_found",
+            }
+            for value in reservation_id
+        ]
+        if all(result["status"] == "cancelled" for result in results):
+            response_status = status.HTTP_200_OK
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS
+        return Response({"results": results}, status=response_status)
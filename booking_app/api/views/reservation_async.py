@@ -0,0 +1,121 @@
+from adrf import mixins, viewsets
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from booking_app.models import WaitlistEntry
+from booking_app.api.idempotency import idempotent
+from booking_app.api.serializers import (
+    ReservationSerializer,
+    BookSerializer,
+    CancelReservationSerializer,
+    WaitlistEntrySerializer,
+)
+from booking_app.services import (
+    NoTableAvailable,
+    TablesBusy,
+    book_table,
+    cancel_reservations,
+    join_waitlist,
+)
+from .reservation import ReservationViewSet
+from .replica import ReplicaReadMixin
+from .restaurant import RestaurantScopedMixin
+
+
+class AsyncReservationViewSet(
+    ReplicaReadMixin,
+    RestaurantScopedMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Async twin of `ReservationViewSet` for ASGI servers, with the same
+    `book/`, `cancel/`, `waitlist/<id>/` and list endpoints and responses,
+    also served per restaurant.
+
+    A request waiting on the database no longer holds a server thread.
+    Django's async ORM has no transactions, so booking, which locks a table
+    row, runs `book_table` in one `sync_to_async` hop, and so does
+    cancelling.
+    """
+
+    queryset = ReservationViewSet.queryset
+    permission_classes = ReservationViewSet.permission_classes
+    serializer_class = ReservationViewSet.serializer_class
+    pagination_class = ReservationViewSet.pagination_class
+    get_queryset = ReservationViewSet.get_queryset
+    waitlist_response = ReservationViewSet.waitlist_response
+
+    @action(
+        detail=False, methods=["post"], serializer_class=BookSerializer, url_path="book"
+    )
+    @idempotent
+    async def book(self, request, **kwargs):
+        """
+        Book a table based on the number of people; see `ReservationViewSet.book`.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        people = serializer.validated_data["number_of_people"]
+
+        try:
+            reservation = await sync_to_async(book_table)(
+                request.user, people, period=serializer.validated_data["period"]
+            )
+        except (NoTableAvailable, TablesBusy):
+            if not serializer.validated_data["waitlist"]:
+                raise
+            entry = await sync_to_async(join_waitlist)(request.user, people)
+            return self.waitlist_response(entry)
+        return Response(
+            ReservationSerializer(reservation).data,
+            status=status.HTTP_200_OK,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        serializer_class=WaitlistEntrySerializer,
+        url_path=r"waitlist/(?P<entry_id>\d+)",
+        pagination_class=None,
+    )
+    async def waitlist(self, request, entry_id, **kwargs):
+        """
+        Status of a waitlist entry; see `ReservationViewSet.waitlist`.
+        """
+        entry = await WaitlistEntry.objects.filter(
+            pk=entry_id, user=request.user, restaurant=self.restaurant
+        ).afirst()
+        if entry is None:
+            return Response(
+                {"detail": "Waitlist entry not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(self.get_serializer(entry).data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        serializer_class=CancelReservationSerializer,
+        url_path="cancel",
+    )
+    async def cancel(self, request, **kwargs):
+        """
+        Cancel reservations of the user; see `ReservationViewSet.cancel`.
+        """
+        if not request.data.get("reservation_id"):
+            return Response(
+                {"detail": "Reservation ID is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservation_id = serializer.validated_data["reservation_id"]
+
+        cancelled = await sync_to_async(cancel_reservations)(
+            request.user,
+            reservation_id if isinstance(reservation_id, list) else [reservation_id],
+        )
+        return ReservationViewSet.cancellation_response(reservation_id, cancelled)
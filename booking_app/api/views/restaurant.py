@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+
+from booking_app.routers import set_current_restaurant
+from booking_app.services import get_restaurant
+
+
+class RestaurantScopedMixin:
+    """
+    Serve the request for the restaurant in the `restaurant` URL kwarg, or
+    `BOOKING_DEFAULT_RESTAURANT` on the routes without one, making it the
+    current restaurant (see `booking_app.routers`) until the response is
+    finalized. Without either, every table of the default database is
+    served.
+
+    Works for the async viewsets too: `initial` runs in a `sync_to_async`
+    hop, which hands the context back to the handler.
+    """
+
+    restaurant = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        slug = kwargs.get("restaurant", settings.BOOKING_DEFAULT_RESTAURANT)
+        restaurant = get_restaurant(slug) if slug else None
+        if slug and restaurant is None:
+            raise NotFound("Restaurant not found.")
+        self.restaurant = restaurant
+        self._previous_restaurant = set_current_restaurant(restaurant)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if hasattr(self, "_previous_restaurant"):
+            set_current_restaurant(self._previous_restaurant)
+            del self._previous_restaurant
+        return super().finalize_response(request, response, *args, **kwargs)
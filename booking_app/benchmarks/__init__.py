@@ -0,0 +1,7 @@
+"""
+Benchmarks for the booking hot paths.
+
+Each module is runnable on its own, e.g.::
+
+    python -m booking_app.benchmarks.assignment
+"""
@@ -0,0 +1,156 @@
+"""
+Concurrency scaling of the async (ASGI) and sync (WSGI) reservation list.
+
+    python -m booking_app.benchmarks.asgi --delay 20 --concurrency 1 8 32 128
+
+Starts uvicorn on `kernel.asgi` and gunicorn on `kernel.wsgi`, with every
+database query slowed down by `--delay` milliseconds to stand in for a busy
+or distant database, and lists reservations from `--concurrency` client
+threads at a time. Prints requests per second and p50/p99 latency for:
+
+- `/api/async/reservations/` on uvicorn (one process),
+- `/api/reservations/` on gunicorn with one process, once for each
+  `--wsgi-threads` count (1 is gunicorn's default sync worker).
+
+A user and token are committed to the configured database for the run and
+deleted afterwards.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import django
+
+from booking_app.benchmarks.load import run_load, wait_for_port
+
+
+def _slow_queries(delay):
+    from django.db.backends.signals import connection_created
+
+    def execute(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # sent again each time a thread's connection reconnects
+        if execute not in connection.execute_wrappers:
+            connection.execute_wrappers.append(execute)
+
+    connection_created.connect(install, weak=False)
+
+
+def _serve(args):
+    """
+    Run one server in this process, with slow queries.
+    """
+    _slow_queries(args.delay / 1000)
+    if args.serve == "asgi":
+        import uvicorn
+
+        uvicorn.run(
+            "kernel.asgi:application",
+            host="127.0.0.1",
+            port=args.port,
+            log_level="warning",
+        )
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"127.0.0.1:{args.port}")
+            self.cfg.set("workers", 1)
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("loglevel", "warning")
+
+        def load(self):
+            from kernel.wsgi import application
+
+            return application
+
+    Server().run()
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delay", type=float, default=20, help="Milliseconds per query.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--wsgi-threads", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", choices=["asgi", "wsgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--threads", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args)
+        return
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from booking_app.models import Reservation, Table
+
+    user = get_user_model().objects.create_user(username="benchmark-asgi")
+    token = Token.objects.create(user=user).key
+    table = Table.objects.create(seats=10)
+    Reservation.objects.bulk_create(
+        Reservation(user=user, table=table, number_of_seats=1, cost=100)
+        for _ in range(20)
+    )
+
+    print(
+        f"{'server':<22} {'concurrency':>11} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>7}"
+    )
+    try:
+        servers = [("uvicorn (asgi)", "/api/async/reservations/", ["--serve", "asgi"])]
+        servers += [
+            (
+                f"gunicorn ({threads} threads)",
+                "/api/reservations/",
+                ["--serve", "wsgi", "--threads", str(threads)],
+            )
+            for threads in args.wsgi_threads
+        ]
+        for name, path, serve in servers:
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "booking_app.benchmarks.asgi",
+                    "--port",
+                    str(args.port),
+                    "--delay",
+                    str(args.delay),
+                    *serve,
+                ]
+            )
+            try:
+                wait_for_port(args.port)
+                run_load(args.port, path, token, 1, 1)  # warm up
+                for concurrency in args.concurrency:
+                    rate, p50, p99, errors = run_load(
+                        args.port, path, token, concurrency, args.seconds
+                    )
+                    print(
+                        f"{name:<22} {concurrency:>11} {rate:>8.1f} "
+                        f"{p50:>8.1f} {p99:>8.1f} {errors:>7}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        table.delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Greedy vs optimal seating of large booking batches.
+
+    python -m booking_app.benchmarks.assignment --tables 1000 5000 20000
+
+Random tables (4 to 10 seats, some partially booked) and parties (1 to 10
+people) are seated with `greedy_assignment`, `optimal_assignment` and
+`assign_parties`; for each run the seated parties, their total cost and the
+wall time are printed. No database is needed.
+"""
+
+import argparse
+import os
+import random
+import time
+
+import django
+
+
+def _random_batch(rng, n_tables, n_parties, booked):
+    tables = []
+    for table_id in range(1, n_tables + 1):
+        seats = rng.randint(4, 10)
+        free = rng.randint(0, seats) if rng.random() < booked else seats
+        tables.append((table_id, seats, free))
+    parties = [rng.randint(1, 10) for _ in range(n_parties)]
+    return parties, tables
+
+
+def _summary(assignment):
+    seated = [seat for seat in assignment if seat is not None]
+    return len(seated), sum(cost for _, cost, _ in seated)
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    from booking_app.services import assign_parties, greedy_assignment
+    from booking_app.services.assignment import optimal_assignment
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tables", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument(
+        "--parties",
+        type=float,
+        default=0.6,
+        help="Parties per table in each batch.",
+    )
+    parser.add_argument(
+        "--booked",
+        type=float,
+        default=0.3,
+        help="Share of tables that are already partially booked.",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'tables':>7} {'parties':>7}  {'strategy':<8} {'seated':>7} {'cost':>10} {'ms':>8}")
+    for n_tables in args.tables:
+        rng = random.Random(args.seed)
+        parties, tables = _random_batch(
+            rng, n_tables, int(n_tables * args.parties), args.booked
+        )
+        for name, solve in (
+            ("greedy", greedy_assignment),
+            ("optimal", optimal_assignment),
+            ("chosen", assign_parties),
+        ):
+            started = time.perf_counter()
+            assignment = solve(parties, tables)
+            elapsed = (time.perf_counter() - started) * 1000
+            seated, cost = _summary(assignment)
+            print(
+                f"{n_tables:>7} {len(parties):>7}  {name:<8} "
+                f"{seated:>7} {cost:>10} {elapsed:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
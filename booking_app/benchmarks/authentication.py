@@ -0,0 +1,72 @@
+"""
+Queries and latency per API request with and without the token cache.
+
+    python -m booking_app.benchmarks.authentication --requests 500
+
+`GET /api/reservations/` is sent `--requests` times with DRF's
+`TokenAuthentication` and then with `CachedTokenAuthentication`, counting the
+queries of every request. Runs against the configured database inside a
+transaction that is rolled back at the end.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+
+def _run(client, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    queries = []
+    timings = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get("/api/reservations/")
+            timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.content
+        queries.append(len(captured))
+    return statistics.mean(queries), statistics.median(timings)
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from django.test.utils import setup_test_environment
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+
+    from booking_app.api.authentication import CachedTokenAuthentication, token_cache
+    from booking_app.api.views import ReservationViewSet
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    print(f"{'authentication':<28} {'queries/request':>16} {'median ms':>10}")
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(username="benchmark-auth")
+        token = Token.objects.create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        for authentication in (TokenAuthentication, CachedTokenAuthentication):
+            token_cache.clear()
+            ReservationViewSet.authentication_classes = [authentication]
+            queries, latency = _run(client, args.requests)
+            print(f"{authentication.__name__:<28} {queries:>16.2f} {latency:>10.2f}")
+
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
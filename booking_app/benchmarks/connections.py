@@ -0,0 +1,144 @@
+"""
+Per-request database connection overhead under gunicorn.
+
+    python -m booking_app.benchmarks.connections --workers 2 --threads 4 \
+        --concurrency 1 8 32 --pgbouncer 127.0.0.1:6432
+
+Starts gunicorn (`kernel.gunicorn_conf`) once per connection mode and lists
+the reservations of a user who has none, so each request runs two small
+queries and the connection handling is most of the database time:
+
+- `connect`: a new connection per request (`DB_CONN_MAX_AGE=0`)
+- `persistent`: a connection kept per worker thread (`DB_CONN_MAX_AGE=60`)
+- `pool`: a psycopg 3 pool per worker (`DB_POOL`); skipped with psycopg2
+- `pgbouncer`: a new connection per request to the PgBouncer at
+  `--pgbouncer` (`DB_PGBOUNCER`), which keeps the server connections open
+
+Prints requests per second, p50/p99 latency and the server connections
+open to the database once the load is over. A user and token are committed
+to the configured database for the run and deleted afterwards.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+import django
+
+from booking_app.benchmarks.load import run_load, wait_for_port
+
+
+def _modes(args):
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    modes = [
+        ("connect", {"DB_CONN_MAX_AGE": "0"}),
+        ("persistent", {"DB_CONN_MAX_AGE": "60"}),
+    ]
+    if is_psycopg3:
+        modes.append(("pool", {"DB_POOL": "True"}))
+    else:
+        print("psycopg 3 isn't installed: skipping the pool.", file=sys.stderr)
+    if args.pgbouncer:
+        host, port = args.pgbouncer.rsplit(":", 1)
+        modes.append(
+            (
+                "pgbouncer",
+                {
+                    "DB_HOST": host,
+                    "DB_PORT": port,
+                    "DB_CONN_MAX_AGE": "0",
+                    "DB_PGBOUNCER": "True",
+                },
+            )
+        )
+    return modes
+
+
+def _server_connections():
+    """
+    Returns:
+        int: Client backends connected to the database, besides this one.
+    """
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND backend_type = 'client backend' "
+            "AND pid <> pg_backend_pid()"
+        )
+        return cursor.fetchone()[0]
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="GUNICORN_WORKERS.")
+    parser.add_argument("--threads", type=int, default=4, help="GUNICORN_THREADS.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--pgbouncer",
+        metavar="HOST:PORT",
+        help="PgBouncer in transaction mode in front of the configured database.",
+    )
+    args = parser.parse_args()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    user = get_user_model().objects.create_user(username="benchmark-connections")
+    token = Token.objects.create(user=user).key
+
+    print(
+        f"{'mode':<11} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'server conns':>12}"
+    )
+    try:
+        for name, env in _modes(args):
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "-c",
+                    "python:kernel.gunicorn_conf",
+                    "kernel.wsgi:application",
+                ],
+                env={
+                    **os.environ,
+                    "GUNICORN_BIND": f"127.0.0.1:{args.port}",
+                    "GUNICORN_WORKERS": str(args.workers),
+                    "GUNICORN_THREADS": str(args.threads),
+                    "GUNICORN_ACCESSLOG": "",
+                    "GUNICORN_LOGLEVEL": "warning",
+                    **env,
+                },
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(args.port)
+                run_load(args.port, "/api/reservations/", token, 1, 1)  # warm up
+                for concurrency in args.concurrency:
+                    rate, p50, p99, errors = run_load(
+                        args.port, "/api/reservations/", token, concurrency, args.seconds
+                    )
+                    print(
+                        f"{name:<11} {concurrency:>11} {rate:>8.1f} {p50:>8.1f} "
+                        f"{p99:>8.1f} {errors:>7} {_server_connections():>12}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
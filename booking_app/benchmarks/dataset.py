@@ -0,0 +1,353 @@
+"""
+Synthetic tables, users, tokens and reservations at production volume, for
+the `seed_bookings` management command.
+
+    python manage.py seed_bookings --tables 5000 --users 100000 --reservations 10000000
+
+Rows are generated from seeded `random.Random` instances and streamed into
+Postgres with `COPY ... FROM STDIN`, without building model instances. The
+data follows the booking rules:
+
+- each table is filled with open-ended reservations until about
+  `open_share` of its seats are held, and `available_seats` is what is left,
+- every other reservation holds a past time slot; the slots of a table don't
+  overlap and each party fits in the table's free seats, so the capacity
+  trigger would accept every row,
+- costs and numbers of seats come from the price table.
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+from booking_app.services import get_price_table
+
+# bytes handed to the driver per write
+COPY_BUFFER_SIZE = 1 << 20
+
+# how long before its slot a reservation is made, in seconds
+BOOKING_LEAD = (3600, 14 * 24 * 3600)
+
+# how far back the open-ended reservations were made, in seconds
+OPEN_ENDED_AGE = 30 * 24 * 3600
+
+
+def parse_weights(value):
+    """
+    Parse `2=6,4=3` into `{2: 6.0, 4: 3.0}`.
+
+    Raises:
+        ValueError: A size that isn't a positive integer, a weight that isn't a
+            non-negative number, or no positive weight at all.
+    """
+    weights = {}
+    for part in value.split(","):
+        size, _, weight = part.partition("=")
+        size, weight = int(size), float(weight)
+        if size < 1:
+            raise ValueError(f"Sizes must be at least 1, got {size}.")
+        if weight < 0:
+            raise ValueError(f"Weight of {size} must not be negative.")
+        weights[size] = weight
+    if not any(weights.values()):
+        raise ValueError("At least one size needs a positive weight.")
+    return weights
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class Dataset:
+    """
+    The rows of one seeded dataset. Each `*_lines()` method yields lines in
+    COPY text format for the columns in the matching `*_COLUMNS`.
+
+    Args:
+        tables (int): Tables to generate, with ids from `first_table_id`.
+        users (int): Users to generate, with ids from `first_user_id`, each
+            with a token.
+        reservations (int): Reservations to generate.
+        table_sizes (dict): Weight of each table size.
+        party_sizes (dict): Weight of each party size.
+        open_share (float): Share of the seats of each table held by
+            open-ended reservations.
+        seed (int): Seed of the random generators.
+        now (datetime): Slots end before it, and open-ended reservations are
+            made before it.
+        slot (timedelta): Length of the time slots.
+        username_prefix (str): Usernames are this prefix and the user id.
+
+    Raises:
+        ValueError: Time-slotted reservations are needed but no party size
+            fits at a table with free seats.
+    """
+
+    TABLE_COLUMNS = ("id", "created", "modified", "seats", "available_seats")
+    USER_COLUMNS = (
+        "id",
+        "password",
+        "is_superuser",
+        "username",
+        "first_name",
+        "last_name",
+        "email",
+        "is_staff",
+        "is_active",
+        "date_joined",
+    )
+    TOKEN_COLUMNS = ("key", "user_id", "created")
+    RESERVATION_COLUMNS = (
+        "created",
+        "modified",
+        "user_id",
+        "table_id",
+        "number_of_seats",
+        "cost",
+        "period",
+    )
+
+    def __init__(
+        self,
+        tables,
+        users,
+        reservations,
+        table_sizes,
+        party_sizes,
+        first_table_id=1,
+        first_user_id=1,
+        open_share=0.5,
+        seed=1,
+        now=None,
+        slot=timedelta(hours=2),
+        username_prefix="seed-",
+    ):
+        self.tables = tables
+        self.users = users
+        self.reservations = reservations
+        self.first_table_id = first_table_id
+        self.first_user_id = first_user_id
+        self.seed = seed
+        self.username_prefix = username_prefix
+        self.prices = get_price_table()
+
+        now = now or datetime.now(timezone.utc)
+        self.now = int(now.timestamp())
+        # slots end on a whole hour, before `now`
+        self.slots_end = self.now - self.now % 3600
+        self.slot = int(slot.total_seconds())
+
+        self._party_sizes = list(party_sizes)
+        self._party_weights = list(party_sizes.values())
+
+        rng = self._rng("tables")
+        self.table_seats = rng.choices(
+            list(table_sizes), list(table_sizes.values()), k=tables
+        )
+        self.available_seats = list(self.table_seats)
+        self._open_ended = self._fill_tables(open_share, rng)
+
+        # tables each party size fits at after that, with its price there
+        self._fits = {
+            people: [
+                (index, *quote)
+                for index, seats in enumerate(self.table_seats)
+                if (quote := self.prices.price(people, seats, self.available_seats[index]))
+            ]
+            for people in self._party_sizes
+        }
+        self._slotted_weights = [
+            weight if self._fits[people] else 0
+            for people, weight in zip(self._party_sizes, self._party_weights)
+        ]
+        if len(self._open_ended) < reservations and not any(self._slotted_weights):
+            raise ValueError("No party size fits at any table with free seats.")
+
+    def _rng(self, name):
+        return random.Random(f"{self.seed}-{name}")
+
+    def _user_id(self, rng):
+        return self.first_user_id + rng.randrange(self.users)
+
+    def _fill_tables(self, open_share, rng):
+        # open-ended reservations, as (user, table index, seats, cost)
+        open_ended = []
+        for index, seats in enumerate(self.table_seats):
+            held, target = 0, int(seats * open_share)
+            while len(open_ended) < self.reservations:
+                people = rng.choices(self._party_sizes, self._party_weights)[0]
+                quote = self.prices.price(people, seats, seats - held)
+                if quote is None or held + quote[1] > target:
+                    break
+                open_ended.append((self._user_id(rng), index, quote[1], quote[0]))
+                held += quote[1]
+            self.available_seats[index] = seats - held
+        return open_ended
+
+    def table_lines(self):
+        created = _timestamp(self.now)
+        for index, seats in enumerate(self.table_seats):
+            yield (
+                f"{self.first_table_id + index}\t{created}\t{created}\t"
+                f"{seats}\t{self.available_seats[index]}\n"
+            )
+
+    def user_lines(self):
+        joined = _timestamp(self.now)
+        for user_id in range(self.first_user_id, self.first_user_id + self.users):
+            # "!" marks the password unusable
+            yield (
+                f"{user_id}\t!\tf\t{self.username_prefix}{user_id}\t\t\t\t"
+                f"f\tt\t{joined}\n"
+            )
+
+    def token_lines(self):
+        rng = self._rng("tokens")
+        created = _timestamp(self.now)
+        for user_id in range(self.first_user_id, self.first_user_id + self.users):
+            yield f"{rng.getrandbits(160):040x}\t{user_id}\t{created}\n"
+
+    def reservation_lines(self):
+        rng = self._rng("reservations")
+        for user_id, index, seats, cost in self._open_ended:
+            created = _timestamp(self.now - rng.randrange(OPEN_ENDED_AGE))
+            yield (
+                f"{created}\t{created}\t{user_id}\t{self.first_table_id + index}\t"
+                f"{seats}\t{cost}\t\\N\n"
+            )
+
+        # next slot of each table, counted back from `slots_end`
+        next_slot = [0] * self.tables
+        periods = []
+        for index, cost, seats in self._slotted_tables():
+            slot = next_slot[index]
+            next_slot[index] += 1
+            if slot == len(periods):
+                upper = self.slots_end - slot * self.slot
+                lower = upper - self.slot
+                periods.append(
+                    (lower, f'["{_timestamp(lower)}","{_timestamp(upper)}")')
+                )
+            lower, period = periods[slot]
+            created = _timestamp(lower - rng.randint(*BOOKING_LEAD))
+            yield (
+                f"{created}\t{created}\t{self._user_id(rng)}\t"
+                f"{self.first_table_id + index}\t{seats}\t{cost}\t{period}\n"
+            )
+
+    def _slotted_tables(self):
+        # `(table index, cost, seats)` of each time-slotted reservation
+        rng = self._rng("slots")
+        for _ in range(self.reservations - len(self._open_ended)):
+            people = rng.choices(self._party_sizes, self._slotted_weights)[0]
+            yield rng.choice(self._fits[people])
+
+    def oldest_created(self):
+        """
+        A time no reservation is created before. Finding it goes through
+        the slotted reservations once more, without formatting them.
+        """
+        slots = [0] * self.tables
+        for index, _, _ in self._slotted_tables():
+            slots[index] += 1
+        oldest = min(
+            self.slots_end - max(slots, default=0) * self.slot - BOOKING_LEAD[1],
+            self.now - OPEN_ENDED_AGE,
+        )
+        return datetime.fromtimestamp(oldest, timezone.utc)
+
+
+class _LineReader:
+    """
+    Read-only file over an iterable of lines, for psycopg2's `copy_expert`.
+    """
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._rest = ""
+
+    def read(self, size=-1):
+        parts, length = [self._rest], len(self._rest)
+        if size < 0 or length < size:
+            for line in self._lines:
+                parts.append(line)
+                length += len(line)
+                if 0 <= size <= length:
+                    break
+        data = "".join(parts)
+        if size < 0:
+            self._rest = ""
+            return data
+        self._rest = data[size:]
+        return data[:size]
+
+
+def copy_lines(cursor, table, columns, lines):
+    """
+    Stream `lines` in COPY text format into `table` with `COPY FROM STDIN`.
+
+    Args:
+        cursor: A Django cursor on a PostgreSQL connection.
+        table (str): Table name.
+        columns (iterable): Column names, in the order of the line fields.
+        lines (iterable): Lines ending in a newline.
+    """
+    quote_name = cursor.db.ops.quote_name
+    sql = (
+        f"COPY {quote_name(table)} "
+        f"({', '.join(quote_name(column) for column in columns)}) FROM STDIN"
+    )
+    if is_psycopg3:
+        with cursor.cursor.copy(sql) as copy:
+            reader = _LineReader(lines)
+            while data := reader.read(COPY_BUFFER_SIZE):
+                copy.write(data)
+    else:
+        cursor.cursor.copy_expert(sql, _LineReader(lines), size=COPY_BUFFER_SIZE)
+
+
+def allocate_ids(cursor, table, count):
+    """
+    Take `count` consecutive ids from the id sequence of `table`. Nothing
+    else may insert into `table` meanwhile, so lock it first.
+
+    Returns:
+        int: The first id.
+    """
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    cursor.execute("SELECT nextval(%s)", [sequence])
+    first = cursor.fetchone()[0]
+    if count > 1:
+        cursor.execute("SELECT setval(%s, %s)", [sequence, first + count - 1])
+    return first
+
+
+@contextmanager
+def indexes_dropped(cursor, table):
+    """
+    Drop the secondary indexes of `table` and create them again on exit.
+    Building an index over the loaded rows is much faster than updating it
+    row by row during a large COPY. Indexes behind constraints (the primary
+    key, unique and exclusion constraints) are kept.
+
+    The table stays locked against reads until the transaction ends.
+    """
+    cursor.execute(
+        "SELECT index.relname, pg_get_indexdef(pg_index.indexrelid) "
+        "FROM pg_index JOIN pg_class index ON index.oid = pg_index.indexrelid "
+        "WHERE pg_index.indrelid = %s::regclass AND NOT pg_index.indisunique "
+        "AND NOT EXISTS ("
+        "SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    quote_name = cursor.db.ops.quote_name
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {quote_name(name)}")
+    yield
+    for _, definition in indexes:
+        # as is, the index of a partitioned parent would skip its partitions
+        cursor.execute(definition.replace(" ON ONLY ", " ON ", 1))
@@ -0,0 +1,66 @@
+"""
+HTTP load helpers shared by the server benchmarks.
+"""
+
+import http.client
+import socket
+import statistics
+import threading
+import time
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} didn't start.")
+
+
+def run_load(port, path, token, concurrency, seconds):
+    """
+    GET `path` from `concurrency` threads for `seconds`.
+
+    Returns:
+        tuple: `(requests per second, p50 ms, p99 ms, errors)`.
+    """
+    timings = []
+    errors = []
+    deadline = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < deadline:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            started = time.perf_counter()
+            try:
+                connection.request(
+                    "GET",
+                    path,
+                    headers={"Authorization": f"Token {token}", "Host": "localhost"},
+                )
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+                    continue
+            except OSError as exc:
+                errors.append(type(exc).__name__)
+                continue
+            finally:
+                connection.close()
+            timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    timings.sort()
+    if not timings:
+        return 0.0, float("nan"), float("nan"), len(errors)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return len(timings) / seconds, statistics.median(timings), p99, len(errors)
@@ -0,0 +1,193 @@
+"""
+Mixed book/cancel/list load against the booking API, for the `loadbench`
+management command.
+
+    python manage.py loadbench --tables 200 --users 50 --mix book=2,cancel=1,list=7
+
+`drive` runs `concurrency` asyncio tasks on one `httpx.AsyncClient`. Each
+task picks an operation by weight and a random seeded user:
+
+- `book` books a table for 1 to `max_party` people,
+- `cancel` cancels one of the reservations booked during the run (or books
+  when there is none left),
+- `list` reads the first page of the user's reservations.
+
+`summarize` turns the samples into the JSON report.
+"""
+
+import asyncio
+import random
+import re
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from rest_framework.authtoken.models import Token
+
+from booking_app.models import Table
+
+OPERATIONS = ("book", "cancel", "list")
+USERNAME_PREFIX = "loadbench-"
+
+# query count reported by `kernel.middleware.QueryMetricsMiddleware`
+SERVER_TIMING_QUERIES = re.compile(r'db;desc="(\d+) queries"')
+
+
+def parse_mix(value):
+    """
+    Parse `book=2,cancel=1,list=7` into `{"book": 2, "cancel": 1, "list": 7}`.
+
+    Raises:
+        ValueError: Unknown operation, or a weight that isn't a non-negative
+            number, or no positive weight at all.
+    """
+    mix = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation {operation!r}, expected one of {OPERATIONS}.")
+        mix[operation] = float(weight)
+        if mix[operation] < 0:
+            raise ValueError(f"Weight of {operation!r} must not be negative.")
+    if not any(mix.values()):
+        raise ValueError("At least one operation needs a positive weight.")
+    return mix
+
+
+def seed(tables, users, rng):
+    """
+    Create `tables` tables of 4 to 10 seats and `users` users with tokens.
+
+    Returns:
+        tuple: `(table ids, tokens)`.
+    """
+    User = get_user_model()
+    created = Table.objects.bulk_create(
+        Table(seats=seats, available_seats=seats)
+        for seats in (rng.randint(4, 10) for _ in range(tables))
+    )
+    accounts = User.objects.bulk_create(
+        User(username=f"{USERNAME_PREFIX}{index}") for index in range(users)
+    )
+    tokens = Token.objects.bulk_create(
+        Token(key=Token.generate_key(), user=user) for user in accounts
+    )
+    return [table.pk for table in created], [token.key for token in tokens]
+
+
+def unseed(table_ids):
+    """
+    Delete the seeded tables and users with their reservations and tokens.
+    """
+    Table.objects.filter(pk__in=table_ids).delete()
+    get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+
+def _take(items, rng):
+    # remove a random item without shifting the rest of the list
+    index = rng.randrange(len(items))
+    items[index], items[-1] = items[-1], items[index]
+    return items.pop()
+
+
+async def drive(client, tokens, mix, concurrency, duration, max_party=6, rng=None):
+    """
+    Send the request mix for `duration` seconds.
+
+    Returns:
+        list: `(operation, status, milliseconds, queries)` per request, with
+        status "error" for transport errors and queries None when the server
+        sent no query count in `Server-Timing`.
+    """
+    rng = rng or random.Random()
+    operations, weights = zip(*mix.items())
+    booked = []
+    samples = []
+    deadline = time.monotonic() + duration
+
+    def request(operation):
+        if operation == "cancel" and booked:
+            token, reservation_id = _take(booked, rng)
+            return client.post(
+                "/api/reservations/cancel/",
+                json={"reservation_id": reservation_id},
+                headers={"Authorization": f"Token {token}"},
+            )
+        headers = {"Authorization": f"Token {rng.choice(tokens)}"}
+        if operation == "list":
+            return client.get("/api/reservations/", headers=headers)
+        return client.post(
+            "/api/reservations/book/",
+            json={"number_of_people": rng.randint(1, max_party)},
+            headers=headers,
+        )
+
+    async def worker():
+        while time.monotonic() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation == "cancel" and not booked:
+                operation = "book"
+
+            started = time.perf_counter()
+            try:
+                response = await request(operation)
+            except Exception:
+                milliseconds = (time.perf_counter() - started) * 1000
+                samples.append((operation, "error", milliseconds, None))
+                continue
+            milliseconds = (time.perf_counter() - started) * 1000
+
+            queries = SERVER_TIMING_QUERIES.search(
+                response.headers.get("Server-Timing", "")
+            )
+            samples.append(
+                (
+                    operation,
+                    response.status_code,
+                    milliseconds,
+                    int(queries[1]) if queries else None,
+                )
+            )
+            if operation == "book" and response.status_code == 200:
+                token = response.request.headers["Authorization"].split()[1]
+                booked.append((token, response.json()["id"]))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def _percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _stats(samples, duration):
+    milliseconds = sorted(sample[2] for sample in samples)
+    queries = [sample[3] for sample in samples if sample[3] is not None]
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample[1])] = statuses.get(str(sample[1]), 0) + 1
+    return {
+        "requests": len(samples),
+        "requests_per_second": round(len(samples) / duration, 2),
+        "p50_ms": round(_percentile(milliseconds, 50), 2),
+        "p95_ms": round(_percentile(milliseconds, 95), 2),
+        "p99_ms": round(_percentile(milliseconds, 99), 2),
+        "queries_per_request": (
+            round(statistics.fmean(queries), 2) if queries else None
+        ),
+        "status": dict(sorted(statuses.items())),
+    }
+
+
+def summarize(samples, duration):
+    """
+    Latency percentiles, throughput, queries per request and status counts,
+    overall and per operation.
+    """
+    report = {"total": _stats(samples, duration) if samples else None, "operations": {}}
+    for operation in OPERATIONS:
+        selected = [sample for sample in samples if sample[0] == operation]
+        if selected:
+            report["operations"][operation] = _stats(selected, duration)
+    return report
@@ -0,0 +1,121 @@
+"""
+Login throughput and the latency of other requests during a login burst.
+
+    python -m booking_app.benchmarks.login --logins 16 --readers 4 --seconds 10
+
+`--logins` threads post to the login endpoint in a loop while `--readers`
+threads list reservations, first with hashing in the request thread
+(`LOGIN_HASH_WORKERS=0`) and then through the process pool. Prints logins
+per second, rejected logins, and the p50/p99 latency of the readers.
+
+Threads stand in for the request threads of a threaded server. The user and
+token are committed to the configured database and deleted afterwards.
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import django
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def _loop(deadline, request, results):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status = request(client).status_code
+            results.append((status, (time.perf_counter() - started) * 1000))
+    finally:
+        connection.close()
+
+
+def _burst(args, username, password, token):
+    logins, reads = [], []
+
+    def login(client):
+        return client.post(
+            "/api/reservations/login/", {"username": username, "password": password}
+        )
+
+    def read(client):
+        return client.get("/api/reservations/", HTTP_AUTHORIZATION=f"Token {token}")
+
+    deadline = time.monotonic() + args.seconds
+    threads = [
+        threading.Thread(target=_loop, args=(deadline, login, logins))
+        for _ in range(args.logins)
+    ] + [
+        threading.Thread(target=_loop, args=(deadline, read, reads))
+        for _ in range(args.readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    read_ms = [ms for _, ms in reads]
+    return (
+        sum(status == 200 for status, _ in logins) / args.seconds,
+        sum(status == 503 for status, _ in logins),
+        statistics.median(read_ms) if read_ms else float("nan"),
+        _percentile(read_ms, 99),
+    )
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework.authtoken.models import Token
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=16, help="Login threads.")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads.")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=2, help="LOGIN_HASH_WORKERS.")
+    parser.add_argument("--concurrency", type=int, default=8, help="LOGIN_MAX_CONCURRENCY.")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    username, password = "benchmark-login", "benchmark-pass-1234"
+    user = get_user_model().objects.create_user(username=username, password=password)
+    token = Token.objects.create(user=user).key
+    try:
+        print(
+            f"{'mode':<14} {'logins/s':>9} {'rejected':>9} "
+            f"{'read p50 ms':>12} {'read p99 ms':>12}"
+        )
+        for mode, overrides in (
+            ("inline", {"LOGIN_HASH_WORKERS": 0, "LOGIN_MAX_CONCURRENCY": args.logins}),
+            (
+                f"pool ({args.workers})",
+                {
+                    "LOGIN_HASH_WORKERS": args.workers,
+                    "LOGIN_MAX_CONCURRENCY": args.concurrency,
+                },
+            ),
+        ):
+            with override_settings(**overrides):
+                rate, rejected, p50, p99 = _burst(args, username, password, token)
+            print(f"{mode:<14} {rate:>9.1f} {rejected:>9} {p50:>12.2f} {p99:>12.2f}")
+    finally:
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
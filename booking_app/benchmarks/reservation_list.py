@@ -0,0 +1,86 @@
+"""
+Latency of the reservation list endpoint as a user's history grows.
+
+    python -m booking_app.benchmarks.reservation_list --rows 10 1000 100000 1000000
+
+One user's history is grown step by step with `generate_series` and, at each
+size, `GET /api/reservations/` is timed for the first page and for a page
+`--depth` cursors further. Runs against the configured database inside a
+transaction that is rolled back at the end, so nothing is left behind.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import django
+
+
+def _timed(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.content
+    return statistics.median(timings), response.json()
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+
+    from booking_app.models import Reservation, Table
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10, 1000, 100000, 1000000]
+    )
+    parser.add_argument(
+        "--depth", type=int, default=20, help="Cursor pages to follow for the deep page."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    print(f"{'rows':>9} {'first page ms':>14} {'deep page ms':>13}")
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(username="benchmark-list")
+        table = Table.objects.create(seats=10)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        inserted = 0
+        for rows in sorted(args.rows):
+            with connection.cursor() as cursor:
+                # newest first, one minute apart
+                cursor.execute(
+                    f"INSERT INTO {Reservation._meta.db_table} "
+                    "(user_id, table_id, number_of_seats, cost, created, modified) "
+                    "SELECT %s, %s, 1, 100, now() - g * interval '1 minute', now() "
+                    "FROM generate_series(%s, %s) AS g",
+                    [user.pk, table.pk, inserted + 1, rows],
+                )
+                cursor.execute(f"ANALYZE {Reservation._meta.db_table}")
+            inserted = rows
+
+            first, page = _timed(client, "/api/reservations/", args.repeat)
+            url = page["next"]
+            for _ in range(args.depth - 1):
+                if not url:
+                    break
+                url = client.get(url).json()["next"]
+            deep = f"{_timed(client, url, args.repeat)[0]:.2f}" if url else "-"
+            print(f"{rows:>9} {first:>14.2f} {deep:>13}")
+
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
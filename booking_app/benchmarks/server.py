@@ -0,0 +1,143 @@
+"""
+Throughput and memory of `runserver` against gunicorn with `kernel.gunicorn_conf`.
+
+    python -m booking_app.benchmarks.server --workers 4 --concurrency 1 8 32
+
+Starts each server in turn, lists reservations from `--concurrency` client
+threads at a time and prints requests per second, p50/p99 latency, and the
+RSS and PSS (proportional set size, which splits shared pages between the
+processes sharing them) summed over the server's process tree once the
+load is over.
+
+A user and token are committed to the configured database for the run and
+deleted afterwards.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+import django
+
+from booking_app.benchmarks.load import run_load, wait_for_port
+
+
+def _process_tree(pid):
+    pids = [pid]
+    for index in range(len(pids)):
+        for task in os.listdir(f"/proc/{pids[index]}/task"):
+            try:
+                with open(f"/proc/{pids[index]}/task/{task}/children") as children:
+                    pids += [int(child) for child in children.read().split()]
+            except FileNotFoundError:
+                pass
+    return pids
+
+
+def _memory(pid):
+    """
+    Returns:
+        tuple: `(processes, RSS MiB, PSS MiB)` of `pid` and its descendants.
+    """
+    pids = _process_tree(pid)
+    rss = pss = 0
+    for process in pids:
+        try:
+            with open(f"/proc/{process}/smaps_rollup") as rollup:
+                for line in rollup:
+                    field, value = line.split()[:2]
+                    if field == "Rss:":
+                        rss += int(value)
+                    elif field == "Pss:":
+                        pss += int(value)
+        except FileNotFoundError:
+            pass
+    return len(pids), rss / 1024, pss / 1024
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "kernel.settings")
+    django.setup()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="GUNICORN_WORKERS.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+
+    from booking_app.models import Reservation, Table
+
+    user = get_user_model().objects.create_user(username="benchmark-server")
+    token = Token.objects.create(user=user).key
+    table = Table.objects.create(seats=10)
+    Reservation.objects.bulk_create(
+        Reservation(user=user, table=table, number_of_seats=1, cost=100)
+        for _ in range(20)
+    )
+
+    bind = f"127.0.0.1:{args.port}"
+    servers = [
+        (
+            "runserver",
+            [sys.executable, "manage.py", "runserver", "--noreload", bind],
+            {},
+        ),
+        (
+            f"gunicorn ({args.workers} workers)",
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                "python:kernel.gunicorn_conf",
+                "kernel.wsgi:application",
+            ],
+            {
+                "GUNICORN_BIND": bind,
+                "GUNICORN_WORKERS": str(args.workers),
+                "GUNICORN_ACCESSLOG": "",
+                "GUNICORN_LOGLEVEL": "warning",
+                "DB_CONN_MAX_AGE": "60",
+            },
+        ),
+    ]
+
+    print(
+        f"{'server':<22} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'procs':>6} {'RSS MiB':>8} {'PSS MiB':>8}"
+    )
+    try:
+        for name, command, env in servers:
+            server = subprocess.Popen(
+                command,
+                env={**os.environ, **env},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(args.port)
+                run_load(args.port, "/api/reservations/", token, 1, 1)  # warm up
+                for concurrency in args.concurrency:
+                    rate, p50, p99, errors = run_load(
+                        args.port, "/api/reservations/", token, concurrency, args.seconds
+                    )
+                    processes, rss, pss = _memory(server.pid)
+                    print(
+                        f"{name:<22} {concurrency:>11} {rate:>8.1f} {p50:>8.1f} "
+                        f"{p99:>8.1f} {errors:>7} {processes:>6} {rss:>8.1f} {pss:>8.1f}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        table.delete()
+        user.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app.benchmarks.load import wait_for_port
+from booking_app.benchmarks.loadbench import drive, parse_mix, seed, summarize, unseed
+
+
+class Command(BaseCommand):
+    """
+    Seed tables and users, drive a book/cancel/list mix against the API and
+    report latency, throughput and SQL queries per request as JSON.
+    """
+
+    help = (
+        "Load-test the booking API with a mix of book, cancel and list requests "
+        "and print the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=200, help="Tables to seed.")
+        parser.add_argument("--users", type=int, default=50, help="Users to seed.")
+        parser.add_argument(
+            "--mix",
+            default="book=2,cancel=1,list=7",
+            help="Weights of the operations, e.g. book=2,cancel=1,list=7.",
+        )
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--duration", type=float, default=10, help="Seconds.")
+        parser.add_argument("--max-party", type=int, default=6)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--url",
+            help="Use the server running at this URL instead of starting gunicorn "
+            "with kernel.gunicorn_conf.",
+        )
+        parser.add_argument(
+            "--in-process",
+            action="store_true",
+            help="Call kernel's ASGI application in this process, without a server.",
+        )
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--workers", type=int, default=4, help="GUNICORN_WORKERS.")
+        parser.add_argument("--output", help="Write the report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1.")
+
+        rng = random.Random(options["seed"])
+        table_ids, tokens = seed(options["tables"], options["users"], rng)
+        server = None
+        try:
+            if options["in_process"]:
+                transport = httpx.ASGITransport(app=get_asgi_application())
+                base_url = "http://localhost"
+            else:
+                transport = None
+                base_url = options["url"]
+                if not base_url:
+                    server = self._start_server(options)
+                    base_url = f"http://localhost:{options['port']}"
+
+            started = time.monotonic()
+            samples = async_to_sync(self._drive)(
+                base_url, transport, tokens, mix, options, rng
+            )
+            duration = time.monotonic() - started
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+            unseed(table_ids)
+
+        report = {
+            "config": {
+                key: options[key]
+                for key in ("tables", "users", "concurrency", "duration", "max_party", "seed")
+            }
+            | {"mix": mix, "server": self._server_name(options)},
+            **summarize(samples, duration),
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    @staticmethod
+    async def _drive(base_url, transport, tokens, mix, options, rng):
+        limits = httpx.Limits(max_connections=options["concurrency"])
+        async with httpx.AsyncClient(
+            base_url=base_url, transport=transport, limits=limits, timeout=60
+        ) as client:
+            return await drive(
+                client,
+                tokens,
+                mix,
+                options["concurrency"],
+                options["duration"],
+                max_party=options["max_party"],
+                rng=rng,
+            )
+
+    @staticmethod
+    def _server_name(options):
+        if options["in_process"]:
+            return "in-process"
+        return options["url"] or f"gunicorn ({options['workers']} workers)"
+
+    @staticmethod
+    def _start_server(options):
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                "python:kernel.gunicorn_conf",
+                "kernel.wsgi:application",
+            ],
+            env={
+                **os.environ,
+                "GUNICORN_BIND": f"127.0.0.1:{options['port']}",
+                "GUNICORN_WORKERS": str(options["workers"]),
+                "GUNICORN_ACCESSLOG": "",
+                "GUNICORN_LOGLEVEL": "warning",
+            },
+        )
+        try:
+            wait_for_port(options["port"])
+        except RuntimeError:
+            server.terminate()
+            raise
+        return server
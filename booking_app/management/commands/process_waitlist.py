@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from booking_app.services import drain_waitlist, listen, wait_for_notification
+
+
+class Command(BaseCommand):
+    """
+    Book waitlist entries as seats free up. Runs until stopped, waking on
+    the `booking_waitlist` notifications sent when seats are released.
+
+    Behind PgBouncer in transaction mode (`DB_PGBOUNCER`) a LISTEN doesn't
+    outlive its transaction, so the waitlist is only polled.
+    """
+
+    help = "Book waiting parties whenever seats are released, and expire old entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.BOOKING_WAITLIST_BATCH_SIZE,
+            help="Entries booked per transaction.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.BOOKING_WAITLIST_POLL_INTERVAL,
+            help="Seconds to wait for a notification before draining anyway.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the waitlist once and exit, e.g. from cron.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to drain the waitlist of; run once per shard.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["poll_interval"] <= 0:
+            raise CommandError("--batch-size and --poll-interval must be positive.")
+
+        if options["once"]:
+            self.drain(options["batch_size"], options["database"], report=True)
+            return
+
+        if settings.DB_PGBOUNCER:
+            self.stderr.write(
+                self.style.WARNING(
+                    "DB_PGBOUNCER is set: polling every "
+                    f"{options['poll_interval']}s instead of listening."
+                )
+            )
+        else:
+            # subscribe before the first drain so no release is missed in between
+            listen(options["database"])
+        try:
+            while True:
+                self.drain(
+                    options["batch_size"],
+                    options["database"],
+                    report=options["verbosity"] > 1,
+                )
+                if settings.DB_PGBOUNCER:
+                    time.sleep(options["poll_interval"])
+                else:
+                    wait_for_notification(
+                        options["poll_interval"], options["database"]
+                    )
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size, using, report):
+        done = drain_waitlist(batch_size, using)
+        if done or report:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Booked {done['booked']} waitlist entry(ies), "
+                    f"expired {done['expired']}."
+                )
+            )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from booking_app.services import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    """
+    Delete expired idempotency keys. Meant to run daily, e.g. from cron.
+    """
+
+    help = "Delete the idempotency keys past BOOKING_IDEMPOTENCY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Keys deleted per statement.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to purge; run once per shard.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        deleted = purge_idempotency_keys(
+            options["batch_size"], using=options["database"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired key(s)."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from booking_app.models import Table, available_seats_changed
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the denormalized `Table.available_seats` counter from `Reservation`.
+    """
+
+    help = "Rebuild Table.available_seats from the reservations of each table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the tables whose counter is out of sync.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to reconcile; run once per shard.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        tables = Table.objects.db_manager(using)
+        with transaction.atomic(using=using):
+            drifted = list(
+                tables.select_for_update()
+                .out_of_sync()
+                .values_list("id", "available_seats", "seats", "reserved_seats")
+            )
+            for table_id, available_seats, seats, reserved_seats in drifted:
+                self.stdout.write(
+                    f"Table {table_id}: available_seats={available_seats}, "
+                    f"expected={seats - reserved_seats}"
+                )
+            if drifted and not options["dry_run"]:
+                drifted_tables = tables.filter(pk__in=[row[0] for row in drifted])
+                drifted_tables.reconcile_available_seats()
+                rows = list(
+                    drifted_tables.values_list("id", "seats", "available_seats")
+                )
+                transaction.on_commit(
+                    lambda: available_seats_changed.send(
+                        sender=Table, tables=rows, using=using
+                    ),
+                    using=using,
+                )
+
+        verb = "Found" if options["dry_run"] else "Reconciled"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drifted)} table(s)."))
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from booking_app.services import (
+    add_months,
+    archive_partition,
+    attached_partitions,
+    create_partitions,
+    live_reservations,
+    month_start,
+    partition_name,
+)
+
+
+class Command(BaseCommand):
+    """
+    Create the upcoming monthly reservation partitions and archive the ones
+    past the retention period. Meant to run daily, e.g. from cron.
+    """
+
+    help = (
+        "Create reservation partitions for the coming months and detach the "
+        "months older than the retention period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.BOOKING_RESERVATION_PARTITIONS_AHEAD,
+            help="Months to create partitions for after the current one.",
+        )
+        parser.add_argument(
+            "--retention",
+            type=int,
+            default=settings.BOOKING_RESERVATION_RETENTION_MONTHS,
+            help="Months kept attached before the current one; 0 archives nothing.",
+        )
+        parser.add_argument(
+            "--schema",
+            default=settings.BOOKING_RESERVATION_ARCHIVE_SCHEMA,
+            help="Schema the archived partitions are moved to.",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop the archived partitions instead of moving them.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be created and archived.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to manage the partitions of; run once per shard.",
+        )
+
+    def handle(self, *args, **options):
+        if options["ahead"] < 0 or options["retention"] < 0:
+            raise CommandError("--ahead and --retention must not be negative.")
+
+        using = options["database"]
+        current = month_start(timezone.now())
+        last = add_months(current, options["ahead"])
+        if options["dry_run"]:
+            existing = {month for month, _ in attached_partitions(using)}
+            month, created = current, []
+            while month <= last:
+                if month not in existing:
+                    created.append(partition_name(month))
+                month = add_months(month, 1)
+        else:
+            created = create_partitions(current, last, using)
+        for name in created:
+            self.stdout.write(f"{'Would create' if options['dry_run'] else 'Created'} {name}")
+
+        archived = 0
+        if options["retention"]:
+            oldest_kept = add_months(current, -options["retention"])
+            for month, name in attached_partitions(using):
+                if month >= oldest_kept:
+                    break
+                live = live_reservations(name, using)
+                if live:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Kept {name}: {live} reservation(s) still hold seats."
+                        )
+                    )
+                    continue
+                if options["dry_run"]:
+                    action = "Would archive"
+                else:
+                    archive_partition(
+                        name, options["schema"], drop=options["drop"], using=using
+                    )
+                    action = "Dropped" if options["drop"] else f"Moved to {options['schema']}:"
+                self.stdout.write(f"{action} {name}")
+                archived += 1
+
+        if options["dry_run"]:
+            summary = f"Found {len(created)} partition(s) to create, {archived} to archive."
+        else:
+            summary = f"Created {len(created)} partition(s), archived {archived}."
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,142 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from booking_app.benchmarks.dataset import (
+    Dataset,
+    allocate_ids,
+    copy_lines,
+    indexes_dropped,
+    parse_weights,
+)
+from booking_app.models import Reservation, Table
+from booking_app.services import create_partitions, invalidate_availability
+
+CAPACITY_TRIGGER = "booking_app_reservation_capacity"
+
+
+class Command(BaseCommand):
+    """
+    Load a deterministic synthetic dataset of tables, users, tokens and
+    reservations with `COPY FROM STDIN`.
+    """
+
+    help = (
+        "Generate tables, users, tokens and reservations from a seed and load "
+        "them with COPY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tables", type=int, default=5000)
+        parser.add_argument("--users", type=int, default=100000)
+        parser.add_argument("--reservations", type=int, default=1000000)
+        parser.add_argument(
+            "--table-sizes",
+            default="4=4,5=1,6=3,7=1,8=2,9=1,10=1",
+            help="Weights of the table sizes, e.g. 4=4,6=3,8=2,10=1.",
+        )
+        parser.add_argument(
+            "--party-sizes",
+            default="1=2,2=8,3=4,4=5,5=2,6=2,7=1,8=1",
+            help="Weights of the party sizes, e.g. 2=8,4=5,6=2.",
+        )
+        parser.add_argument(
+            "--open-share",
+            type=float,
+            default=0.5,
+            help="Share of the seats of each table held by open-ended reservations.",
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--keep-indexes",
+            action="store_true",
+            help="Update the reservation indexes row by row instead of dropping "
+            "them for the load and building them again afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            table_sizes = parse_weights(options["table_sizes"])
+            party_sizes = parse_weights(options["party_sizes"])
+        except ValueError as exc:
+            raise CommandError(exc)
+        for name in ("tables", "users", "reservations"):
+            if options[name] < 0:
+                raise CommandError(f"--{name} must not be negative.")
+        if options["reservations"] and not (options["tables"] and options["users"]):
+            raise CommandError("Reservations need at least one table and one user.")
+        if not 0 <= options["open_share"] <= 1:
+            raise CommandError("--open-share must be between 0 and 1.")
+
+        User = get_user_model()
+        started = time.monotonic()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL synchronous_commit = off")
+            cursor.execute("SET LOCAL maintenance_work_mem = '256MB'")
+            # nothing else may take ids from the sequences we draw from
+            cursor.execute(
+                f"LOCK TABLE {Table._meta.db_table}, {User._meta.db_table} "
+                "IN SHARE ROW EXCLUSIVE MODE"
+            )
+            try:
+                dataset = Dataset(
+                    options["tables"],
+                    options["users"],
+                    options["reservations"],
+                    table_sizes,
+                    party_sizes,
+                    first_table_id=allocate_ids(
+                        cursor, Table._meta.db_table, options["tables"]
+                    ),
+                    first_user_id=allocate_ids(
+                        cursor, User._meta.db_table, options["users"]
+                    ),
+                    open_share=options["open_share"],
+                    seed=options["seed"],
+                )
+            except ValueError as exc:
+                raise CommandError(exc)
+            for name in create_partitions(dataset.oldest_created(), timezone.now()):
+                self.stdout.write(f"Created partition {name}")
+            # check the foreign keys while copying, rather than queueing an
+            # event per row until commit (which also keeps the capacity
+            # trigger from being switched back on)
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            for model, columns, lines in (
+                (Table, dataset.TABLE_COLUMNS, dataset.table_lines()),
+                (User, dataset.USER_COLUMNS, dataset.user_lines()),
+                (Token, dataset.TOKEN_COLUMNS, dataset.token_lines()),
+                (Reservation, dataset.RESERVATION_COLUMNS, dataset.reservation_lines()),
+            ):
+                self._copy(cursor, model, columns, lines, options, started)
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            transaction.on_commit(invalidate_availability)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {options['tables']} table(s), {options['users']} user(s) "
+                f"and {options['reservations']} reservation(s) "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
+
+    def _copy(self, cursor, model, columns, lines, options, started):
+        table = model._meta.db_table
+        if model is not Reservation:
+            copy_lines(cursor, table, columns, lines)
+        else:
+            # the generated slots are known to fit; checking each of millions
+            # of rows would take longer than the load itself
+            cursor.execute(f"ALTER TABLE {table} DISABLE TRIGGER {CAPACITY_TRIGGER}")
+            if options["keep_indexes"]:
+                copy_lines(cursor, table, columns, lines)
+            else:
+                with indexes_dropped(cursor, table):
+                    copy_lines(cursor, table, columns, lines)
+            cursor.execute(f"ALTER TABLE {table} ENABLE TRIGGER {CAPACITY_TRIGGER}")
+        cursor.execute(f"ANALYZE {table}")
+        self.stdout.write(f"{table}: done at {time.monotonic() - started:.1f}s")
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_available_seats(apps, schema_editor):
+    Table = apps.get_model("booking_app", "Table")
+    Reservation = apps.get_model("booking_app", "Reservation")
+    reserved = (
+        Reservation.objects.filter(table=OuterRef("pk"))
+        .order_by()
+        .values("table")
+        .annotate(total=Sum("number_of_seats"))
+        .values("total")
+    )
+    Table.objects.update(
+        available_seats=F("seats") - Coalesce(Subquery(reserved), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0002_remove_table_is_reserved_alter_reservation_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='table',
+            name='available_seats',
+            field=models.IntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_available_seats, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='table',
+            index=models.Index(fields=['available_seats', 'seats'], name='table_available_seats_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='table',
+            constraint=models.CheckConstraint(condition=models.Q(('available_seats__gte', 0)), name='table_available_seats_non_negative'),
+        ),
+    ]
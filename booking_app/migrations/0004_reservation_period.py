@@ -0,0 +1,66 @@
+# Generated by Django 5.2 on 2026-10-17 11:40
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# Checked when the transaction commits, so `available_seats` has already been
+# adjusted by the signal handlers. The table row is locked first so that
+# concurrent bookings of the same table are checked one after another.
+CAPACITY_TRIGGER = """
+CREATE FUNCTION booking_app_reservation_check_capacity() RETURNS trigger AS $$
+DECLARE
+    span tstzrange := coalesce(NEW.period, tstzrange(now(), NULL));
+    free integer;
+BEGIN
+    SELECT available_seats INTO free
+    FROM booking_app_table WHERE id = NEW.table_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT free - coalesce(sum(number_of_seats), 0) INTO free
+    FROM booking_app_reservation
+    WHERE table_id = NEW.table_id AND period && span;
+
+    IF free < 0 THEN
+        RAISE EXCEPTION 'Reservation % overbooks table %.', NEW.id, NEW.table_id
+            USING ERRCODE = 'check_violation',
+                  CONSTRAINT = 'booking_app_reservation_capacity';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER booking_app_reservation_capacity
+AFTER INSERT OR UPDATE OF table_id, number_of_seats, period
+ON booking_app_reservation
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION booking_app_reservation_check_capacity();
+"""
+
+DROP_CAPACITY_TRIGGER = """
+DROP TRIGGER IF EXISTS booking_app_reservation_capacity ON booking_app_reservation;
+DROP FUNCTION IF EXISTS booking_app_reservation_check_capacity();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0003_table_available_seats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='period',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=django.contrib.postgres.indexes.GistIndex(condition=models.Q(('period__isnull', False)), fields=['period'], name='reservation_period_gist'),
+        ),
+        migrations.RunSQL(CAPACITY_TRIGGER, DROP_CAPACITY_TRIGGER),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0004_reservation_period'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'created', 'id'], name='reservation_user_created_idx'),
+        ),
+    ]
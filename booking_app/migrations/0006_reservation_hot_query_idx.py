@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 14:07
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # built without blocking bookings on a large reservation table
+    atomic = False
+
+    dependencies = [
+        ('booking_app', '0005_reservation_user_created_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='reservation',
+            index=models.Index(fields=['created', 'id'], name='reservation_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('period__isnull', True)), fields=['table'], include=('number_of_seats',), name='reservation_table_seats_idx'),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.2 on 2026-10-17 15:10
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "booking_app_reservation"
+OLD_TABLE = "booking_app_reservation_old"
+SEQUENCE = "booking_app_reservation_id_seq"
+
+# the function is kept from 0004; only the trigger goes with the old table
+CAPACITY_TRIGGER = f"""
+CREATE CONSTRAINT TRIGGER booking_app_reservation_capacity
+AFTER INSERT OR UPDATE OF table_id, number_of_seats, period
+ON {TABLE}
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION booking_app_reservation_check_capacity();
+"""
+
+
+def _month(year, month):
+    return date(year + (month - 1) // 12, (month - 1) % 12 + 1, 1)
+
+
+def _definitions(cursor):
+    # indexes and foreign keys of the table, to create again on its
+    # replacement; the primary key changes, and is left out
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [TABLE],
+    )
+    # ON ONLY would leave the index of a partitioned table without partitions
+    statements = [
+        row[0].replace(" ON ONLY ", " ON ", 1) for row in cursor.fetchall()
+    ]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE],
+    )
+    statements += [
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT "{name}" {definition}'
+        for name, definition in cursor.fetchall()
+    ]
+    return statements
+
+
+def _swap(cursor, partitioned):
+    statements = _definitions(cursor)
+    cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}")
+    cursor.execute(
+        f"CREATE TABLE {TABLE} (LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + (" PARTITION BY RANGE (created)" if partitioned else "")
+    )
+    if partitioned:
+        cursor.execute(
+            f"SELECT min(created), greatest(max(created), now()) FROM {OLD_TABLE}"
+        )
+        first, last = cursor.fetchone()
+        first = first or last
+        month = _month(first.year, first.month)
+        last = _month(last.year, last.month + settings.BOOKING_RESERVATION_PARTITIONS_AHEAD)
+        while month <= last:
+            following = _month(month.year, month.month + 1)
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{following} 00:00:00+00')"
+            )
+            month = following
+    cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}")
+
+    # ids of deleted reservations aren't handed out again
+    cursor.execute(
+        "SELECT greatest(max(id), pg_sequence_last_value("
+        f"pg_get_serial_sequence('{OLD_TABLE}', 'id')::regclass), 0) + 1 "
+        f"FROM {OLD_TABLE}"
+    )
+    next_id = cursor.fetchone()[0]
+    if partitioned:
+        # partitioned tables can't have identity columns, so the ids come
+        # from a sequence owned by the column
+        cursor.execute(f"ALTER TABLE {OLD_TABLE} ALTER COLUMN id DROP IDENTITY")
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE} START WITH {next_id}")
+        cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')"
+        )
+        primary_key = "id, created"
+    else:
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id DROP DEFAULT")
+        primary_key = "id"
+    # takes the sequence of the partitioned table with it
+    cursor.execute(f"DROP TABLE {OLD_TABLE}")
+    if not partitioned:
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY "
+            f"(START WITH {next_id})"
+        )
+
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY ({primary_key})"
+    )
+    for statement in statements:
+        cursor.execute(statement)
+    cursor.execute(CAPACITY_TRIGGER)
+
+
+def partition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        _swap(cursor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        _swap(cursor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+    """
+    Range-partition the reservations by month of `created`, with partitions
+    from the oldest reservation to `BOOKING_RESERVATION_PARTITIONS_AHEAD`
+    months ahead. The rows are copied over while the table is locked, so
+    plan the downtime on a large table.
+
+    The primary key becomes `(id, created)`, since a key of a partitioned
+    table must contain the partition key; Django keeps using `id` alone.
+    """
+
+    dependencies = [
+        ('booking_app', '0006_reservation_hot_query_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
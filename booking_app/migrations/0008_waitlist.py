@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Wake the `process_waitlist` worker when seats may have been released: a
+# cancelled reservation, a table counter going up, or a new table. NOTIFY is
+# sent on commit, once per transaction and channel.
+NOTIFY_TRIGGERS = """
+CREATE FUNCTION booking_app_waitlist_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('booking_waitlist', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER booking_app_reservation_waitlist
+AFTER DELETE ON booking_app_reservation
+FOR EACH STATEMENT EXECUTE FUNCTION booking_app_waitlist_notify();
+
+CREATE TRIGGER booking_app_table_waitlist_insert
+AFTER INSERT ON booking_app_table
+FOR EACH STATEMENT EXECUTE FUNCTION booking_app_waitlist_notify();
+
+CREATE TRIGGER booking_app_table_waitlist_update
+AFTER UPDATE OF available_seats ON booking_app_table
+FOR EACH ROW WHEN (NEW.available_seats > OLD.available_seats)
+EXECUTE FUNCTION booking_app_waitlist_notify();
+"""
+
+DROP_NOTIFY_TRIGGERS = """
+DROP TRIGGER IF EXISTS booking_app_table_waitlist_update ON booking_app_table;
+DROP TRIGGER IF EXISTS booking_app_table_waitlist_insert ON booking_app_table;
+DROP TRIGGER IF EXISTS booking_app_reservation_waitlist ON booking_app_reservation;
+DROP FUNCTION IF EXISTS booking_app_waitlist_notify();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0007_partition_reservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created Time')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified Time')),
+                ('number_of_people', models.IntegerField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('booked', 'Booked'), ('expired', 'Expired')], default='waiting', max_length=16)),
+                ('reservation_id', models.BigIntegerField(blank=True, null=True)),
+                ('expires', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'waitlist entries',
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['id'], name='waitlist_waiting_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('user', 'number_of_people'), name='waitlist_waiting_unique')],
+            },
+        ),
+        migrations.RunSQL(NOTIFY_TRIGGERS, DROP_NOTIFY_TRIGGERS),
+    ]
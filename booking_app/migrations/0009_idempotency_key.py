@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0008_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created Time')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified Time')),
+                ('key', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('expires', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires'], name='idempotency_key_expires_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'key'), name='idempotency_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-17 17:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0009_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Restaurant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created Time')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='Modified Time')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(max_length=64, unique=True)),
+                ('shard', models.CharField(default='default', max_length=64)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='waitlistentry',
+            name='waitlist_waiting_unique',
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tables', to='booking_app.restaurant'),
+        ),
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='restaurant',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='booking_app.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='table',
+            index=models.Index(fields=['restaurant', 'available_seats', 'seats'], name='table_restaurant_seats_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('user', 'restaurant', 'number_of_people'), name='waitlist_waiting_unique', nulls_distinct=False),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-17 19:05
+
+from django.db import migrations
+
+
+# Same check as in 0004, but against the most seats held at any one moment of
+# the span rather than the seats of every overlapping reservation added up,
+# which turned away bookings spanning two back-to-back slots.
+CAPACITY_FUNCTION = """
+CREATE OR REPLACE FUNCTION booking_app_reservation_check_capacity() RETURNS trigger AS $$
+DECLARE
+    span tstzrange := coalesce(NEW.period, tstzrange(now(), NULL));
+    free integer;
+BEGIN
+    SELECT available_seats INTO free
+    FROM booking_app_table WHERE id = NEW.table_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT free - coalesce(max(in_use), 0) INTO free
+    FROM (
+        SELECT sum(delta) OVER (ORDER BY moment, delta ROWS UNBOUNDED PRECEDING) AS in_use
+        FROM booking_app_reservation,
+            LATERAL (VALUES
+                (coalesce(greatest(lower(period), lower(span)), '-infinity'), number_of_seats),
+                (coalesce(upper(period), 'infinity'), -number_of_seats)
+            ) AS edge (moment, delta)
+        WHERE table_id = NEW.table_id AND period && span
+    ) AS usage;
+
+    IF free < 0 THEN
+        RAISE EXCEPTION 'Reservation % overbooks table %.', NEW.id, NEW.table_id
+            USING ERRCODE = 'check_violation',
+                  CONSTRAINT = 'booking_app_reservation_capacity';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+SUMMED_CAPACITY_FUNCTION = """
+CREATE OR REPLACE FUNCTION booking_app_reservation_check_capacity() RETURNS trigger AS $$
+DECLARE
+    span tstzrange := coalesce(NEW.period, tstzrange(now(), NULL));
+    free integer;
+BEGIN
+    SELECT available_seats INTO free
+    FROM booking_app_table WHERE id = NEW.table_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT free - coalesce(sum(number_of_seats), 0) INTO free
+    FROM booking_app_reservation
+    WHERE table_id = NEW.table_id AND period && span;
+
+    IF free < 0 THEN
+        RAISE EXCEPTION 'Reservation % overbooks table %.', NEW.id, NEW.table_id
+            USING ERRCODE = 'check_violation',
+                  CONSTRAINT = 'booking_app_reservation_capacity';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0010_restaurant'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CAPACITY_FUNCTION, SUMMED_CAPACITY_FUNCTION),
+    ]
@@ -1,2 +1,5 @@
+from .restaurant import Restaurant
 from .reservation import Reservation
-from .table import Table
+from .table import Table, available_seats_changed
+from .waitlist import WaitlistEntry
+from .idempotency import IdempotencyKey
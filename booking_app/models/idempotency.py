@@ -0,0 +1,51 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+from shared.models.mixins import TimeStampMixin
+
+User = get_user_model()
+
+
+class IdempotencyKey(TimeStampMixin):
+    """
+    The stored response of a request sent with an `Idempotency-Key` header,
+    replayed when the client retries with the same key.
+
+    Attributes:
+        user (User): The user who sent the request; keys are per user.
+        key (str): The header value.
+        fingerprint (str): SHA-256 of the request body, to reject the key
+            being reused for a different request.
+        status_code (int): Status of the stored response.
+        response (dict): Body of the stored response.
+        headers (dict): Headers replayed with it, e.g. `Location`.
+        expires (datetime): When the key can be used for a new request.
+        created (datetime): Timestamp of creation.
+        modified (datetime): Timestamp of modification.
+    """
+
+    # users are kept in the default database, keys in the shards
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.IntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    headers = models.JSONField(default=dict, blank=True)
+    expires = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="idempotency_key_unique"
+            ),
+        ]
+        indexes = [
+            # purging expired keys
+            models.Index(fields=["expires"], name="idempotency_key_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"Idempotency key {self.key}."
+
+    def __repr__(self):
+        return f"Idempotency key {self.key}."
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GistIndex
 
 from shared.models.mixins import TimeStampMixin
 
@@ -10,20 +12,57 @@ class Reservation(TimeStampMixin):
     """
     Represents a reservation made by a user.
 
+    The table is partitioned by month of `created` (see
+    `booking_app.services.partitions`). Its primary key in the database is
+    `(id, created)`, so other tables can't have a foreign key to it.
+
     Attributes:
         user (User): The user who made the reservation.
         table (Table): The reserved table.
         number_of_seats (int): Number of seats reserved.
         cost (int): Calculated reservation cost.
+        period (DateTimeTZRange): Time slot the seats are held for, or None for
+            an open-ended reservation that holds them until it is cancelled.
         created (datetime): Timestamp of creation.
         modified (datetime): Timestamp of modification.
     """
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # users are kept in the default database, reservations in the shards
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
     table = models.ForeignKey("Table", on_delete=models.CASCADE, related_name="reservations")
     number_of_seats = models.IntegerField()
     cost = models.IntegerField()
+    period = DateTimeRangeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created", "id"],
+                name="reservation_user_created_idx",
+            ),
+            # admin ordering and the staff export
+            models.Index(fields=["created", "id"], name="reservation_created_idx"),
+            # summing the open-ended seats of a table reads only this index
+            models.Index(
+                fields=["table"],
+                include=["number_of_seats"],
+                condition=models.Q(period__isnull=True),
+                name="reservation_table_seats_idx",
+            ),
+            GistIndex(
+                fields=["period"],
+                name="reservation_period_gist",
+                condition=models.Q(period__isnull=False),
+            ),
+        ]
+
+    @property
+    def start(self):
+        return self.period.lower if self.period else None
 
+    @property
+    def end(self):
+        return self.period.upper if self.period else None
 
     def __str__(self):
         return f"Reservation {self.id}."
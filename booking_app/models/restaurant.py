@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from shared.models.mixins import TimeStampMixin
+
+
+class Restaurant(TimeStampMixin):
+    """
+    A restaurant taking bookings, served under `/restaurants/<slug>/`.
+
+    Restaurants are kept in the default database. Their tables,
+    reservations, waitlist entries and idempotency keys are kept in the
+    database named by `shard` (see `booking_app.routers`).
+
+    Attributes:
+        name (str): Display name.
+        slug (str): Identifier in the URLs.
+        shard (str): Alias in `DATABASES` holding its bookings.
+        created (datetime): Timestamp of creation.
+        modified (datetime): Timestamp of modification.
+    """
+
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=64, unique=True)
+    shard = models.CharField(max_length=64, default="default")
+
+    def clean(self):
+        if self.shard not in settings.DATABASES:
+            raise ValidationError({"shard": f"No database is named {self.shard!r}."})
+
+    def __str__(self):
+        return f"Restaurant {self.slug}"
+
+    def __repr__(self):
+        return f"Restaurant {self.slug}"
@@ -1,6 +1,117 @@
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
 
+from booking_app.routers import current_restaurant
 from shared.models.mixins import TimeStampMixin
+from .reservation import Reservation
+
+
+# Sent once the transaction that changed `available_seats` commits, with
+# `tables`: a list of `(table_id, seats, available_seats)` after the change,
+# and `using`: the database they are in.
+available_seats_changed = Signal()
+
+
+def _reserved_seats():
+    """
+    Subquery summing the seats held by open-ended reservations of the outer table.
+    """
+    reserved = (
+        Reservation.objects.filter(table=OuterRef("pk"), period__isnull=True)
+        .order_by()
+        .values("table")
+        .annotate(total=Sum("number_of_seats"))
+        .values("total")
+    )
+    return Coalesce(Subquery(reserved), 0)
+
+
+class TableQuerySet(models.QuerySet):
+    """
+    QuerySet for Table with helpers for the denormalized `available_seats` counter.
+    """
+
+    def adjust_available_seats(self, deltas):
+        """
+        Atomically shift `available_seats` of the given tables in one statement.
+
+        `available_seats_changed` is sent with the new values once the
+        surrounding transaction commits.
+
+        Args:
+            deltas (dict): Mapping of table id to the number of seats to add
+                (negative values take seats away).
+
+        Returns:
+            list: `(table_id, seats, available_seats)` rows after the update.
+        """
+        deltas = sorted((pk, delta) for pk, delta in deltas.items() if delta)
+        if not deltas:
+            return []
+
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        values = ", ".join(["(%s, %s)"] * len(deltas))
+        sql = (
+            f"UPDATE {table} SET available_seats = {table}.available_seats + d.delta "
+            f"FROM (VALUES {values}) AS d (id, delta) "
+            f"WHERE {table}.id = d.id "
+            f"RETURNING {table}.id, {table}.seats, {table}.available_seats"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in deltas for value in row])
+            rows = cursor.fetchall()
+
+        using = self.db
+        transaction.on_commit(
+            lambda: available_seats_changed.send(
+                sender=self.model, tables=rows, using=using
+            ),
+            using=using,
+        )
+        return rows
+
+    def with_reserved_seats(self):
+        """
+        Annotate each table with `reserved_seats`, the sum of its open-ended
+        reservations.
+        """
+        return self.annotate(reserved_seats=_reserved_seats())
+
+    def out_of_sync(self):
+        """
+        Tables whose `available_seats` counter disagrees with their open-ended
+        reservations.
+        """
+        return self.with_reserved_seats().exclude(
+            available_seats=F("seats") - F("reserved_seats")
+        )
+
+    def reconcile_available_seats(self):
+        """
+        Rebuild `available_seats` from `Reservation` for the tables in this queryset.
+
+        Returns:
+            int: Number of rows updated.
+        """
+        return self.update(available_seats=F("seats") - _reserved_seats())
+
+
+class TableManager(models.Manager.from_queryset(TableQuerySet)):
+    """
+    Only the tables of the current restaurant, when there is one (see
+    `booking_app.routers`).
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        restaurant = current_restaurant()
+        if restaurant is not None:
+            queryset = queryset.filter(restaurant_id=restaurant.pk)
+        return queryset
 
 
 class Table(TimeStampMixin):
@@ -8,12 +119,65 @@ class Table(TimeStampMixin):
     Represents a table in the restaurant.
 
     Attributes:
+        restaurant (Restaurant): The restaurant of the table. Tables without
+            one are only served by the routes without a restaurant. Stored
+            in the shard of the restaurant, so without a foreign key
+            constraint.
         seats (int): Number of seats at the table (M between 4 and 10).
+        available_seats (int): Seats not held by an open-ended reservation,
+            kept in sync on book and cancel so lookups don't aggregate
+            reservations. Time-slotted reservations only hold seats during
+            their period and are subtracted at booking time instead.
         created (datetime): Timestamp of creation.
         modified (datetime): Timestamp of modification.
     """
 
+    restaurant = models.ForeignKey(
+        "Restaurant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+        related_name="tables",
+    )
     seats = models.IntegerField()
+    available_seats = models.IntegerField(editable=False)
+
+    objects = TableManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_seats", "seats"],
+                name="table_available_seats_idx",
+            ),
+            # the same lookups within a restaurant
+            models.Index(
+                fields=["restaurant", "available_seats", "seats"],
+                name="table_restaurant_seats_idx",
+            ),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(available_seats__gte=0),
+                name="table_available_seats_non_negative",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.available_seats = self.seats
+        else:
+            # seats may have been edited, so derive the counter again
+            using = kwargs.get("using") or router.db_for_write(Table, instance=self)
+            reserved = (
+                Reservation.objects.using(using)
+                .filter(table_id=self.pk, period__isnull=True)
+                .aggregate(total=Coalesce(Sum("number_of_seats"), 0))["total"]
+            )
+            self.available_seats = self.seats - reserved
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Table {self.id}, ({self.seats} seats)"
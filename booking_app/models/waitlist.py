@@ -0,0 +1,77 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+
+from shared.models.mixins import TimeStampMixin
+
+User = get_user_model()
+
+
+class WaitlistEntry(TimeStampMixin):
+    """
+    An open-ended booking waiting for a table to free up.
+
+    The `process_waitlist` worker books waiting entries in queue order when
+    seats are released, or expires them once `expires` has passed.
+
+    Attributes:
+        user (User): The user waiting.
+        restaurant (Restaurant): The restaurant waited for, or None for the
+            tables without one.
+        number_of_people (int): Party size.
+        status (str): "waiting", "booked" or "expired".
+        reservation_id (int): The reservation made for the entry once booked.
+            A plain id, since reservations can't be referenced by a foreign
+            key (see `Reservation`).
+        expires (datetime): When the entry stops waiting.
+        created (datetime): Timestamp of creation.
+        modified (datetime): Timestamp of modification.
+    """
+
+    class Status(models.TextChoices):
+        WAITING = "waiting"
+        BOOKED = "booked"
+        EXPIRED = "expired"
+
+    # users and restaurants are kept in the default database, entries in the
+    # shard of the restaurant
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
+    restaurant = models.ForeignKey(
+        "Restaurant",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        db_index=False,
+    )
+    number_of_people = models.IntegerField()
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.WAITING
+    )
+    reservation_id = models.BigIntegerField(null=True, blank=True)
+    expires = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # the queue: waiting entries in arrival order
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="waiting"),
+                name="waitlist_waiting_idx",
+            ),
+        ]
+        constraints = [
+            # retrying a rejected booking doesn't queue the party twice
+            models.UniqueConstraint(
+                fields=["user", "restaurant", "number_of_people"],
+                condition=models.Q(status="waiting"),
+                name="waitlist_waiting_unique",
+                nulls_distinct=False,
+            ),
+        ]
+        verbose_name_plural = "waitlist entries"
+
+    def __str__(self):
+        return f"Waitlist entry {self.id} ({self.status})."
+
+    def __repr__(self):
+        return f"Waitlist entry {self.id} ({self.status})."
@@ -0,0 +1,156 @@
+"""
+Database routing of restaurants to shards.
+
+`Restaurant` rows, users and tokens live in the default database, the
+directory. The tables, reservations, waitlist entries and idempotency keys
+of a restaurant live in its shard, the `DATABASES` alias named by
+`Restaurant.shard` (see `BOOKING_SHARDS`). Several restaurants can share a
+shard, and "default" is a shard too.
+
+The restaurant of the current request is kept in a context variable, set
+by the restaurant-scoped views, so the services don't pass it around:
+`ShardRouter` sends the queries of the sharded models to its shard, and
+`Table.objects` only sees its tables. Without a current restaurant every
+query goes to the default database, as before restaurants existed.
+
+Reads meant for the default database go to a read replica (see
+`BOOKING_REPLICAS`) while one is set with `use_replica`; the views do that
+for the reads that can be slightly stale.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# model names of the booking_app models stored in the shards
+SHARDED_MODELS = {"table", "reservation", "waitlistentry", "idempotencykey"}
+
+_current_restaurant = ContextVar("booking_restaurant", default=None)
+_read_replica = ContextVar("booking_read_replica", default=None)
+
+
+def current_restaurant():
+    """
+    Returns:
+        Restaurant: The restaurant being served, or None.
+    """
+    return _current_restaurant.get()
+
+
+def set_current_restaurant(restaurant):
+    """
+    Make `restaurant` (or None) the current restaurant.
+
+    Returns:
+        Restaurant: The previous one, to set back afterwards.
+    """
+    previous = _current_restaurant.get()
+    _current_restaurant.set(restaurant)
+    return previous
+
+
+def current_shard():
+    """
+    Returns:
+        str: Alias of the database holding the bookings of the current
+        restaurant, the default one without a restaurant.
+    """
+    restaurant = _current_restaurant.get()
+    return restaurant.shard if restaurant is not None else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_restaurant(restaurant):
+    """
+    Run the block for `restaurant`, on its shard.
+    """
+    previous = set_current_restaurant(restaurant)
+    try:
+        yield restaurant
+    finally:
+        set_current_restaurant(previous)
+
+
+def read_replica():
+    """
+    Returns:
+        str: Alias of the replica reads of the default database go to, or
+        None.
+    """
+    return _read_replica.get()
+
+
+def set_read_replica(alias):
+    """
+    Send the reads of the default database to replica `alias` (or back to
+    the primary for None).
+
+    Returns:
+        str: The previous alias, to set back afterwards.
+    """
+    previous = _read_replica.get()
+    _read_replica.set(alias)
+    return previous
+
+
+@contextmanager
+def use_replica(alias):
+    """
+    Run the block with reads of the default database sent to `alias`.
+    """
+    previous = set_read_replica(alias)
+    try:
+        yield alias
+    finally:
+        set_read_replica(previous)
+
+
+def _primary(alias):
+    # replicas stand for the default database
+    if alias in settings.BOOKING_REPLICAS:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+def is_sharded(model):
+    return (
+        model._meta.app_label == "booking_app"
+        and model._meta.model_name in SHARDED_MODELS
+    )
+
+
+class ShardRouter:
+    """
+    Send the sharded models to the shard of the current restaurant, and
+    every other model to the default database. An instance of a sharded
+    model stays on the database it was loaded from. Reads of the default
+    database go to the current read replica, if any; writes never do.
+    """
+
+    def _database(self, model, **hints):
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(type(instance)) and instance._state.db:
+            return _primary(instance._state.db)
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        database = self._database(model, **hints)
+        # reads within a transaction of the primary stay on it
+        if database == DEFAULT_DB_ALIAS and not connections[database].in_atomic_block:
+            return _read_replica.get() or database
+        return database
+
+    db_for_write = _database
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # users and restaurants are referenced from every shard, without
+        # foreign key constraints
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        if _primary(obj1._state.db) == _primary(obj2._state.db):
+            return True
+        return None
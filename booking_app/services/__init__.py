@@ -0,0 +1,71 @@
+from .exceptions import (
+    NoTableAvailable,
+    TablesBusy,
+    LoginBusy,
+    IdempotencyKeyReused,
+    PartitionMissing,
+)
+from .pricing import (
+    PriceTable,
+    adjusted_seats,
+    get_price_table,
+    price,
+)
+from .allocation_index import (
+    AllocationIndex,
+    SharedAllocationIndex,
+    get_allocation_index,
+)
+from .availability import (
+    availability,
+    compute_table_classes,
+    invalidate_availability,
+    table_classes,
+)
+from .booking import (
+    cheapest_classes,
+    quote,
+    held_seats,
+    book_table,
+    book_tables,
+    cancel_reservations,
+    greedy_assignment,
+    assign_parties,
+    seat_parties,
+)
+from .waitlist import (
+    WAITLIST_CHANNEL,
+    drain_waitlist,
+    join_waitlist,
+    listen,
+    wait_for_notification,
+)
+from .partitions import (
+    add_months,
+    archive_partition,
+    attached_partitions,
+    create_partitions,
+    live_reservations,
+    missing_partition,
+    month_start,
+    partition_name,
+)
+from .idempotency import (
+    cached_response,
+    claim_key,
+    purge_idempotency_keys,
+    release_key,
+    request_fingerprint,
+    save_response,
+)
+from .restaurants import forget_restaurant, get_restaurant
+from .replicas import (
+    choose_replica,
+    pin_to_primary,
+    pinned_to_primary,
+    replica_for,
+    replica_healthy,
+    replica_lag,
+)
+from .export import EXPORT_COLUMNS, EXPORT_FORMATS, export_reservations
+from .passwords import PasswordPool, PasswordPoolBackend, get_password_pool
@@ -0,0 +1,382 @@
+"""
+In-memory index of tables bucketed by available seats.
+
+The index answers "cheapest table for N people" without asking the database
+to price every table. It is only a hint: `book_table` still locks the chosen
+row and re-prices it from the database before writing, so a stale index can
+cost a retry but never a wrong booking.
+"""
+
+import bisect
+import fcntl
+import heapq
+import os
+import struct
+import tempfile
+import threading
+from functools import cache
+from multiprocessing import resource_tracker, shared_memory
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from booking_app.models import Table
+from .pricing import adjusted_seats, get_price_table
+
+
+class AllocationIndex:
+    """
+    Tables bucketed by `available_seats`, split into full tables
+    (`available_seats == seats`) and partially booked ones.
+
+    Each bucket is a heap of table ids with lazy deletion, and the non-empty
+    seat levels are kept sorted, so a lookup is a bisect plus a heap peek.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._tables = {}
+        self._buckets = {}
+        self._sizes = {}
+        self._levels = []
+
+    def load(self, rows):
+        """
+        Replace the content of the index.
+
+        Args:
+            rows (iterable): `(table_id, seats, available_seats)` tuples.
+        """
+        with self._lock:
+            self._tables = {}
+            self._buckets = {}
+            self._sizes = {}
+            self._levels = []
+            for table_id, seats, available_seats in rows:
+                self._add(table_id, seats, available_seats)
+            self._loaded = True
+
+    def update(self, rows):
+        """
+        Insert or refresh tables.
+
+        Args:
+            rows (iterable): `(table_id, seats, available_seats)` tuples.
+        """
+        with self._lock:
+            for table_id, seats, available_seats in rows:
+                self._discard(table_id)
+                self._add(table_id, seats, available_seats)
+
+    def discard(self, table_id):
+        """
+        Forget a table.
+        """
+        with self._lock:
+            self._discard(table_id)
+
+    def cheapest(self, people, exclude=()):
+        """
+        Find the cheapest table for `people`, ordered like `cheapest_classes`:
+        by cost, then by available seats.
+
+        Args:
+            people (int): Party size.
+            exclude (set): Table ids to skip.
+
+        Returns:
+            tuple: `(table_id, cost, number_of_seats)`, or None.
+        """
+        adjusted = adjusted_seats(people)
+        seat_cost = get_price_table().seat_cost
+        with self._lock:
+            self._ensure_loaded()
+
+            # a full table of exactly the party size
+            table_id = self._peek((people, True), exclude)
+            if table_id is not None:
+                return table_id, (people - 1) * seat_cost, people
+            # exactly the party size left on a partially booked table
+            table_id = self._peek((people, False), exclude)
+            if table_id is not None:
+                return table_id, people * seat_cost, people
+            # an odd party at a full table one seat larger
+            if adjusted != people:
+                table_id = self._peek((adjusted, True), exclude)
+                if table_id is not None:
+                    return table_id, (adjusted - 1) * seat_cost, adjusted
+
+            # any table with room for the rounded-up party; fewest seats left wins
+            start = bisect.bisect_left(self._levels, adjusted)
+            for level in self._levels[start:]:
+                found = [
+                    table_id
+                    for table_id in (
+                        self._peek((level, True), exclude)
+                        if level != adjusted or adjusted == people
+                        else None,
+                        self._peek((level, False), exclude),
+                    )
+                    if table_id is not None
+                ]
+                if found:
+                    return min(found), adjusted * seat_cost, adjusted
+        return None
+
+    def __len__(self):
+        return len(self._tables)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load(Table.objects.values_list("id", "seats", "available_seats"))
+
+    def _add(self, table_id, seats, available_seats):
+        if seats <= 0 or available_seats <= 0:
+            # tombstones and fully booked tables can't take anyone
+            return
+        key = (available_seats, available_seats == seats)
+        self._tables[table_id] = key
+        heapq.heappush(self._buckets.setdefault(key, []), table_id)
+        self._sizes[key] = self._sizes.get(key, 0) + 1
+        if self._sizes[key] == 1 and self._sizes.get((key[0], not key[1]), 0) == 0:
+            bisect.insort(self._levels, key[0])
+
+    def _discard(self, table_id):
+        key = self._tables.pop(table_id, None)
+        if key is None:
+            return
+        self._sizes[key] -= 1
+        if self._sizes[key] == 0 and self._sizes.get((key[0], not key[1]), 0) == 0:
+            self._levels.remove(key[0])
+        heap = self._buckets[key]
+        if len(heap) > 2 * self._sizes[key] + 64:
+            # drop the lazily deleted entries once they dominate the heap
+            heap[:] = {pk for pk in heap if self._tables.get(pk) == key}
+            heapq.heapify(heap)
+
+    def _peek(self, key, exclude):
+        heap = self._buckets.get(key)
+        if not heap:
+            return None
+        while heap and self._tables.get(heap[0]) != key:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        if heap[0] not in exclude:
+            return heap[0]
+
+        skipped = []
+        found = None
+        while heap:
+            table_id = heapq.heappop(heap)
+            if self._tables.get(table_id) != key:
+                continue
+            skipped.append(table_id)
+            if table_id not in exclude:
+                found = table_id
+                break
+        for table_id in skipped:
+            heapq.heappush(heap, table_id)
+        return found
+
+
+class SharedAllocationIndex(AllocationIndex):
+    """
+    An `AllocationIndex` whose content is shared by every worker process on
+    the host through `multiprocessing.shared_memory`.
+
+    The segment holds one `(table_id, seats, available_seats)` record per
+    table plus a ring of recently written slots. Each process keeps its own
+    buckets and replays the ring before answering, so staying in sync costs
+    work proportional to the changes made by other workers, not to the
+    number of tables. Writers serialize on a lock file; readers never block.
+    """
+
+    MAGIC = 0x7AB1E5
+    HEADER = struct.Struct("<IIQII")
+    RECORD = struct.Struct("<qii")
+    SLOT = struct.Struct("<I")
+    RING_SIZE = 1024
+
+    def __init__(self, name, capacity):
+        super().__init__()
+        self.name = name
+        self.capacity = capacity
+        self._slots = {}
+        self._generation = 0
+
+        size = (
+            self.HEADER.size
+            + capacity * self.RECORD.size
+            + self.RING_SIZE * self.SLOT.size
+        )
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+        # the segment outlives any single worker; see `unlink`
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        self._buf = self._shm.buf
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+    def update(self, rows):
+        rows = list(rows)
+        with self._lock, self._writing():
+            if not self._published():
+                # the first lookup loads every table from the database
+                return
+            self._sync()
+            for table_id, seats, available_seats in rows:
+                self._write(table_id, seats, available_seats)
+            super().update(rows)
+
+    def discard(self, table_id):
+        with self._lock, self._writing():
+            if not self._published():
+                return
+            self._sync()
+            self._write(table_id, 0, 0)
+            super().discard(table_id)
+
+    def unlink(self):
+        """
+        Remove the shared segment, e.g. when the server shuts down.
+        """
+        self._shm.close()
+        resource_tracker.register(self._shm._name, "shared_memory")
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _published(self):
+        return self.HEADER.unpack_from(self._buf, 0)[0] == self.MAGIC
+
+    def _ensure_loaded(self):
+        if not self._published():
+            with self._writing():
+                if not self._published():
+                    self._publish(
+                        Table.objects.values_list("id", "seats", "available_seats")
+                    )
+        self._sync()
+
+    def _publish(self, rows):
+        rows = list(rows)
+        if len(rows) > self.capacity:
+            raise ValueError(
+                f"{len(rows)} tables don't fit an allocation index of {self.capacity}."
+            )
+        offset = self.HEADER.size
+        for slot, row in enumerate(rows):
+            self.RECORD.pack_into(self._buf, offset + slot * self.RECORD.size, *row)
+        self.HEADER.pack_into(self._buf, 0, self.MAGIC, len(rows), 1, self.capacity, 0)
+
+    def _sync(self):
+        _, count, generation, _, _ = self.HEADER.unpack_from(self._buf, 0)
+        if generation == self._generation and self._loaded:
+            return
+        if not self._loaded or generation - self._generation > self.RING_SIZE:
+            self._reload(count)
+        else:
+            ring = self.HEADER.size + self.capacity * self.RECORD.size
+            changed = {
+                self.SLOT.unpack_from(
+                    self._buf, ring + (g % self.RING_SIZE) * self.SLOT.size
+                )[0]
+                for g in range(self._generation + 1, generation + 1)
+            }
+            if self.HEADER.unpack_from(self._buf, 0)[2] - self._generation > self.RING_SIZE:
+                # lapped by writers while reading the ring
+                self._reload(count)
+            else:
+                rows = [self._read(slot) for slot in changed if slot < count]
+                for row in rows:
+                    self._slots[row[0]] = row[3]
+                AllocationIndex.update(self, (row[:3] for row in rows))
+        self._generation = generation
+
+    def _reload(self, count):
+        rows = [self._read(slot) for slot in range(count)]
+        self._slots = {row[0]: row[3] for row in rows}
+        AllocationIndex.load(self, (row[:3] for row in rows))
+
+    def _read(self, slot):
+        offset = self.HEADER.size + slot * self.RECORD.size
+        return (*self.RECORD.unpack_from(self._buf, offset), slot)
+
+    def _write(self, table_id, seats, available_seats):
+        magic, count, generation, capacity, _ = self.HEADER.unpack_from(self._buf, 0)
+        slot = self._slots.get(table_id)
+        if slot is None:
+            if count >= capacity:
+                raise ValueError(
+                    f"Allocation index is full ({capacity} tables); "
+                    "raise BOOKING_ALLOCATION_INDEX_CAPACITY."
+                )
+            slot = count
+            count += 1
+            self._slots[table_id] = slot
+        self.RECORD.pack_into(
+            self._buf,
+            self.HEADER.size + slot * self.RECORD.size,
+            table_id,
+            seats,
+            available_seats,
+        )
+        generation += 1
+        ring = self.HEADER.size + capacity * self.RECORD.size
+        self.SLOT.pack_into(
+            self._buf, ring + (generation % self.RING_SIZE) * self.SLOT.size, slot
+        )
+        self.HEADER.pack_into(self._buf, 0, magic, count, generation, capacity, 0)
+        self._generation = generation
+
+    def _writing(self):
+        return _FileLock(self._lock_path)
+
+
+class _FileLock:
+    """
+    Exclusive `flock` on a file, shared by every process on the host.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+@cache
+def get_allocation_index():
+    """
+    The allocation index selected by `BOOKING_ALLOCATION_INDEX`, or None.
+
+    - "local": one index per process.
+    - "shared": one index per host, shared through shared memory.
+    """
+    mode = settings.BOOKING_ALLOCATION_INDEX
+    if mode == "local":
+        return AllocationIndex()
+    if mode == "shared":
+        database = settings.DATABASES["default"]["NAME"] or "default"
+        return SharedAllocationIndex(
+            name=f"booking_allocation_{database}",
+            capacity=settings.BOOKING_ALLOCATION_INDEX_CAPACITY,
+        )
+    return None
+
+
+@receiver(setting_changed)
+def reset_allocation_index(setting, **kwargs):
+    if setting.startswith("BOOKING_ALLOCATION_INDEX"):
+        get_allocation_index.cache_clear()
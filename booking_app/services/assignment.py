@@ -0,0 +1,215 @@
+"""
+Minimum-cost seating of a whole batch of parties.
+
+Tables with the same `(seats, available_seats)` are interchangeable, and so
+are parties of the same size, so the batch is solved as a transportation
+problem between party sizes and table classes: a few hundred variables even
+for thousands of tables and parties.
+"""
+
+import time
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_array
+
+from .pricing import get_price_table
+
+
+def price_matrix(people, seats, available_seats):
+    """
+    Vectorized `price` of every party size at every table.
+
+    Args:
+        people (array): Party sizes, shape (n,).
+        seats (array): Table sizes, shape (m,).
+        available_seats (array): Free seats per table, shape (m,).
+
+    Returns:
+        tuple: `(cost, number_of_seats)` arrays of shape (n, m). `cost` is
+        inf where the party doesn't fit.
+    """
+    seat_cost = get_price_table().seat_cost
+    people = np.asarray(people, dtype=np.int64)[:, None]
+    seats = np.asarray(seats, dtype=np.int64)[None, :]
+    available_seats = np.asarray(available_seats, dtype=np.int64)[None, :]
+    adjusted = people + people % 2
+    shape = np.broadcast_shapes(people.shape, seats.shape)
+
+    conditions = [
+        np.broadcast_to(condition, shape)
+        for condition in (
+            seats == people,
+            available_seats == people,
+            seats == adjusted,
+            available_seats >= adjusted,
+        )
+    ]
+    cost = np.select(
+        conditions,
+        [
+            np.broadcast_to(choice, shape)
+            for choice in (
+                (people - 1) * seat_cost,
+                people * seat_cost,
+                (adjusted - 1) * seat_cost,
+                adjusted * seat_cost,
+            )
+        ],
+        default=0,
+    ).astype(float)
+    number_of_seats = np.select(
+        conditions,
+        [
+            np.broadcast_to(choice, shape)
+            for choice in (people, people, adjusted, adjusted)
+        ],
+        default=0,
+    )
+    cost[(available_seats < people) | (number_of_seats == 0)] = np.inf
+    return cost, number_of_seats
+
+
+def optimal_assignment(parties, tables, max_variables=None, time_limit=None):
+    """
+    Seat as many parties as possible, and among those seatings the cheapest.
+
+    Each round solves the transportation problem for the parties still
+    waiting against the current table classes, seating at most one party per
+    table; rounds repeat until nobody else can be seated. A round is exact,
+    so the result is optimal when every table takes at most one party of the
+    batch. When parties share tables it is a heuristic (that is bin packing),
+    which is why `assign_parties` keeps the greedy order if it does better.
+
+    Args:
+        parties (list): Party sizes.
+        tables (list): `(table_id, seats, available_seats)` tuples.
+        max_variables (int): Give up when a round has more
+            (party size, table class) pairs than this.
+        time_limit (float): Give up when solving takes more seconds in total.
+
+    Returns:
+        list: `(table_id, cost, number_of_seats)` or None for each party, or
+        None when the batch is over budget.
+    """
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    assignment = [None] * len(parties)
+    tables = {table_id: (seats, free) for table_id, seats, free in tables}
+    waiting = list(range(len(parties)))
+
+    while waiting and tables:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return None
+        seated = _solve_round(
+            [parties[party] for party in waiting],
+            [(table_id, seats, free) for table_id, (seats, free) in tables.items()],
+            max_variables,
+            remaining,
+        )
+        if seated is None:
+            return None
+        if not seated:
+            break
+
+        for position, (table_id, cost, number_of_seats) in seated.items():
+            assignment[waiting[position]] = (table_id, cost, number_of_seats)
+            seats, free = tables[table_id]
+            tables[table_id] = (seats, free - number_of_seats)
+        waiting = [
+            party for position, party in enumerate(waiting) if position not in seated
+        ]
+        tables = {
+            table_id: (seats, free)
+            for table_id, (seats, free) in tables.items()
+            if free >= min((parties[party] for party in waiting), default=1)
+        }
+    return assignment
+
+
+def _solve_round(parties, tables, max_variables, time_limit):
+    """
+    Seat at most one party per table, optimally.
+
+    Returns:
+        dict: Position in `parties` to `(table_id, cost, number_of_seats)`,
+        or None when over budget.
+    """
+    sizes, party_class = np.unique(np.asarray(parties), return_inverse=True)
+    party_class = party_class.ravel()
+    rows = np.asarray(tables, dtype=np.int64).reshape(-1, 3)
+    classes, table_class = np.unique(rows[:, 1:], axis=0, return_inverse=True)
+    table_class = table_class.ravel()
+    cost, number_of_seats = price_matrix(sizes, classes[:, 0], classes[:, 1])
+
+    size_idx, class_idx = np.nonzero(np.isfinite(cost))
+    n_variables = len(size_idx)
+    if n_variables == 0:
+        return {}
+    if max_variables is not None and n_variables > max_variables:
+        return None
+
+    # A reward per seated party larger than any difference in total cost, so
+    # seating one more party always wins over a cheaper seating; and, below
+    # the smallest price step, a preference for the tightest fit so that
+    # later rounds keep the large tables.
+    seat_cost = get_price_table().seat_cost
+    costs = cost[size_idx, class_idx]
+    reward = (len(parties) + 1) * (costs.max() + seat_cost)
+    slack = classes[class_idx, 1] - number_of_seats[size_idx, class_idx]
+    objective = (
+        costs - reward + slack * seat_cost / ((slack.max() + 1) * (len(parties) + 1))
+    )
+
+    variables = np.arange(n_variables)
+    constraints = coo_array(
+        (
+            np.ones(2 * n_variables),
+            (
+                np.concatenate([size_idx, len(sizes) + class_idx]),
+                np.concatenate([variables, variables]),
+            ),
+        ),
+        shape=(len(sizes) + len(classes), n_variables),
+    )
+    limits = np.concatenate(
+        [
+            np.bincount(party_class, minlength=len(sizes)),
+            np.bincount(table_class, minlength=len(classes)),
+        ]
+    )
+    # the constraint matrix is totally unimodular, so the simplex vertex is
+    # already integral
+    options = {"time_limit": time_limit} if time_limit is not None else {}
+    result = linprog(
+        objective,
+        A_ub=constraints,
+        b_ub=limits,
+        bounds=(0, None),
+        method="highs-ds",
+        options=options,
+    )
+    if result.status != 0:
+        return None
+    counts = np.rint(result.x).astype(np.int64)
+
+    # lowest table ids of each class first, parties of each size in order
+    order = np.lexsort((rows[:, 0], table_class))
+    tables_by_class = np.split(
+        rows[order, 0], np.cumsum(np.bincount(table_class))[:-1]
+    )
+    tables_by_class = [list(ids[::-1]) for ids in tables_by_class]
+    parties_by_size = [
+        list(np.flatnonzero(party_class == i)[::-1]) for i in range(len(sizes))
+    ]
+
+    seated = {}
+    for variable in np.flatnonzero(counts):
+        i, j = size_idx[variable], class_idx[variable]
+        for _ in range(counts[variable]):
+            seated[int(parties_by_size[i].pop())] = (
+                int(tables_by_class[j].pop()),
+                int(cost[i, j]),
+                int(number_of_seats[i, j]),
+            )
+    return seated
@@ -0,0 +1,109 @@
+"""
+Free seats by table size, served from the Django cache.
+
+What is cached is the list of table classes: the number of tables for each
+`(seats, available_seats)` pair. The availability summary and the booking
+quotes are both derived from it.
+
+The classes are cached under a generation number. Every committed change to
+`available_seats` (booking, cancelling, reconciling) or to the tables bumps
+the generation instead of deleting the entry. Classes read while a
+booking commits is therefore stored under the generation it started from
+and never read again, so a race can't put stale counts back in the cache.
+
+With a cache shared by the workers (`BOOKING_AVAILABILITY_CACHE_ALIAS`, e.g.
+Redis) every worker sees a change at once. With the default per-process
+cache, a worker may serve counts up to `BOOKING_AVAILABILITY_CACHE_TTL`
+seconds old for changes made in other workers.
+
+Each restaurant has its own classes, under the same generation.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from booking_app.models import Table
+from booking_app.routers import current_restaurant
+
+GENERATION_KEY = "booking_availability:generation"
+CLASSES_KEY = "booking_availability:{generation}:{restaurant}"
+
+
+def _cache():
+    return caches[settings.BOOKING_AVAILABILITY_CACHE_ALIAS]
+
+
+def _generation(cache):
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # a fresh value, so that summaries from before the key was evicted
+        # are never picked up again
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def compute_table_classes():
+    """
+    Returns:
+        list: `(seats, available_seats, tables)` for each pair present, in
+        that order.
+    """
+    return list(
+        Table.objects.values_list("seats", "available_seats")
+        .annotate(Count("id"))
+        .order_by("seats", "available_seats")
+    )
+
+
+def table_classes():
+    """
+    `compute_table_classes()`, from the cache when it is up to date.
+    """
+    cache = _cache()
+    restaurant = current_restaurant()
+    key = CLASSES_KEY.format(
+        generation=_generation(cache),
+        restaurant=restaurant.pk if restaurant is not None else "",
+    )
+    classes = cache.get(key)
+    if classes is None:
+        classes = compute_table_classes()
+        cache.set(key, classes, settings.BOOKING_AVAILABILITY_CACHE_TTL)
+    return classes
+
+
+def availability():
+    """
+    Free seats by table size, from `table_classes()`.
+
+    Returns:
+        list: One dict per table size, smallest first, with `seats`, `tables`,
+        `available_seats` (free seats over all tables of that size) and
+        `largest_party` (most free seats at a single table).
+    """
+    sizes = {}
+    for seats, available_seats, tables in table_classes():
+        size = sizes.setdefault(
+            seats,
+            {"seats": seats, "tables": 0, "available_seats": 0, "largest_party": 0},
+        )
+        size["tables"] += tables
+        size["available_seats"] += available_seats * tables
+        size["largest_party"] = max(size["largest_party"], available_seats)
+    return list(sizes.values())
+
+
+def invalidate_availability():
+    """
+    Make the next `table_classes()` call read the tables again.
+    """
+    cache = _cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # no generation yet; the next read starts a fresh one
+        pass
@@ -0,0 +1,527 @@
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+
+from booking_app.models import Table, Reservation
+from booking_app.routers import current_restaurant, current_shard
+from .allocation_index import AllocationIndex, get_allocation_index
+from .availability import table_classes
+from .exceptions import NoTableAvailable, TablesBusy
+from .pricing import get_price_table, price
+
+
+def cheapest_classes(people):
+    """
+    Classes of interchangeable tables that can seat `people`, cheapest first.
+
+    The distinct `(seats, available_seats)` pairs come from one scan of the
+    `(available_seats, seats)` index and are priced with `get_price_table()`,
+    so the database doesn't evaluate the pricing rules for every table.
+
+    Returns:
+        list: `(seats, available_seats, cost, number_of_seats)` tuples.
+    """
+    classes = (
+        Table.objects.filter(available_seats__gte=people)
+        .order_by()
+        .values_list("seats", "available_seats")
+        .distinct()
+    )
+    return get_price_table().cheapest(people, classes)
+
+
+def quote(people):
+    """
+    What booking an open-ended table for `people` would cost now, without
+    locking or writing anything.
+
+    Priced from the cached `table_classes()`, so it never reads
+    `Reservation` and, between bookings, doesn't query at all. Seats held by
+    time-slotted reservations are not taken off, so `book_table` can still
+    pick a different table.
+
+    Returns:
+        tuple: `(seats, available_seats, cost, number_of_seats)` of the
+        cheapest table class, or None when no table can seat the party.
+    """
+    classes = get_price_table().cheapest(
+        people, ((seats, available_seats) for seats, available_seats, _ in table_classes())
+    )
+    return classes[0] if classes else None
+
+
+# Peak seats in use per table during the span: each overlapping reservation
+# adds its seats where it starts (or where the span does) and gives them back
+# where it ends, ends before starts at the same moment; the largest running
+# total is what the table needs free. The capacity trigger (migration 0011)
+# checks the same.
+HELD_SEATS_SQL = """
+SELECT table_id, max(in_use) FROM (
+    SELECT table_id, sum(delta) OVER (
+        PARTITION BY table_id ORDER BY moment, delta ROWS UNBOUNDED PRECEDING
+    ) AS in_use
+    FROM {reservations},
+        LATERAL (VALUES
+            (
+                coalesce(greatest(lower(period), lower(%(span)s)), '-infinity'),
+                number_of_seats
+            ),
+            (coalesce(upper(period), 'infinity'), -number_of_seats)
+        ) AS edge (moment, delta)
+    WHERE period && %(span)s {tables}
+) AS usage
+GROUP BY table_id
+"""
+
+
+def held_seats(span, tables=None):
+    """
+    Seats held by time-slotted reservations during `span`, per table: the
+    most held at any one moment, so back-to-back slots don't add up.
+
+    The overlapping reservations are found through the GiST index on
+    `Reservation.period`, so it reads the reservations of the slot rather
+    than the whole history.
+
+    Args:
+        span (DateTimeTZRange): Time range to check.
+        tables (list): Only look at these table ids.
+
+    Returns:
+        dict: Table id to the number of seats held.
+    """
+    connection = connections[current_shard()]
+    with connection.cursor() as cursor:
+        cursor.execute(*_held_seats_query(connection, span, tables))
+        return dict(cursor.fetchall())
+
+
+def _held_seats_query(connection, span, tables=None):
+    """
+    Returns:
+        tuple: `(sql, params)` of `HELD_SEATS_SQL` for `held_seats()`.
+    """
+    params = {"span": span}
+    condition = ""
+    if tables is not None:
+        condition = "AND table_id = ANY(%(tables)s)"
+        params["tables"] = list(tables)
+    sql = HELD_SEATS_SQL.format(
+        reservations=connection.ops.quote_name(Reservation._meta.db_table),
+        tables=condition,
+    )
+    return sql, params
+
+
+def book_table(user, people, period=None):
+    """
+    Reserve the cheapest fitting table for `people`.
+
+    With a `period` the seats are only held for that time slot, otherwise
+    the reservation is open-ended. Seats held by time-slotted reservations
+    overlapping the booking (for an open-ended one, any that hasn't ended)
+    are not available.
+
+    Only the chosen table row is locked. Rows locked by concurrent bookings
+    are skipped, so the query falls through to the next-cheapest table; when
+    every candidate is locked the attempt is retried with a short backoff,
+    up to `BOOKING_LOCK_RETRIES` times. When time-slotted reservations leave
+    the chosen table too few seats, the tables are priced again with their
+    held seats taken off (`_book_around`).
+
+    When `BOOKING_ALLOCATION_INDEX` is enabled the in-memory index suggests
+    the table first and the table classes are only read if its suggestions
+    run out.
+
+    Args:
+        user (User): The user booking.
+        people (int): Party size.
+        period (DateTimeTZRange): Time slot to hold the seats for.
+
+    Returns:
+        Reservation: The created reservation.
+
+    Raises:
+        NoTableAvailable: No table can seat the party.
+        TablesBusy: Every fitting table stayed locked after all retries.
+    """
+    span = period or DateTimeTZRange(timezone.now(), None)
+
+    # the index holds the tables of every restaurant
+    index = get_allocation_index() if current_restaurant() is None else None
+    if index is not None:
+        reservation = _book_from_index(index, user, people, period, span)
+        if reservation is not None:
+            return reservation
+
+    for attempt in range(settings.BOOKING_LOCK_RETRIES + 1):
+        classes = cheapest_classes(people)
+        if not classes:
+            raise NoTableAvailable()
+
+        table = reservation = None
+        with transaction.atomic(using=current_shard()):
+            for seats, available_seats, cost, number_of_seats in classes:
+                table = (
+                    Table.objects.select_for_update(skip_locked=True)
+                    .filter(seats=seats, available_seats=available_seats)
+                    .order_by("pk")
+                    .first()
+                )
+                if table is not None:
+                    reservation = _reserve(
+                        user, table, people, period, span, (cost, number_of_seats)
+                    )
+                    break
+        if reservation is not None:
+            return reservation
+        if table is not None:
+            # a time-slotted reservation took seats of the table meanwhile
+            return _book_around(user, people, period, span)
+
+        if attempt < settings.BOOKING_LOCK_RETRIES:
+            time.sleep(
+                settings.BOOKING_LOCK_BACKOFF * (attempt + 1) * random.uniform(0.5, 1.5)
+            )
+
+    raise TablesBusy()
+
+
+def _reserve(user, table, people, period, span, quote):
+    """
+    Create the reservation at a locked `table`, if the table still prices
+    the party at `quote` once the seats held during `span` are taken off.
+
+    Returns:
+        Reservation: The created reservation, or None.
+    """
+    free = table.available_seats - held_seats(span, tables=[table.pk]).get(table.pk, 0)
+    if price(people, table.seats, free) != quote:
+        return None
+    cost, number_of_seats = quote
+    return Reservation.objects.create(
+        user=user,
+        table=table,
+        number_of_seats=number_of_seats,
+        cost=cost,
+        period=period,
+    )
+
+
+def _book_around(user, people, period, span):
+    """
+    Book when time-slotted reservations overlap the booking.
+
+    Tables are priced here from `available_seats` minus their seats held
+    during `span`; the chosen row is then locked and checked again like in
+    `_book_from_index`. A locked table is left out of the next attempt, a
+    stale one is priced again.
+
+    Returns:
+        Reservation: The created reservation.
+    """
+    locked = set()
+    for _ in range(settings.BOOKING_LOCK_RETRIES + 1):
+        tables = list(
+            Table.objects.filter(available_seats__gte=people)
+            .exclude(pk__in=locked)
+            .values_list("id", "seats", "available_seats")
+        )
+        held = held_seats(span, tables=[pk for pk, _, _ in tables])
+        seat = greedy_assignment(
+            [people],
+            [(pk, seats, free - held.get(pk, 0)) for pk, seats, free in tables],
+        )[0]
+        if seat is None:
+            raise TablesBusy() if locked else NoTableAvailable()
+        table_id, cost, number_of_seats = seat
+
+        reservation = None
+        with transaction.atomic(using=current_shard()):
+            table = (
+                Table.objects.select_for_update(skip_locked=True)
+                .filter(pk=table_id)
+                .first()
+            )
+            if table is None:
+                locked.add(table_id)
+            else:
+                reservation = _reserve(
+                    user, table, people, period, span, (cost, number_of_seats)
+                )
+        if reservation is not None:
+            return reservation
+
+    raise TablesBusy()
+
+
+def _book_from_index(index, user, people, period, span):
+    """
+    Book one of the tables suggested by the allocation index.
+
+    The suggested row is locked and priced again from the database before
+    writing; a locked or stale suggestion is skipped (and the index
+    refreshed) in favour of the next one.
+
+    Returns:
+        Reservation: The created reservation, or None when the index has no
+        usable suggestion.
+    """
+    tried = set()
+    for _ in range(settings.BOOKING_LOCK_RETRIES + 1):
+        suggestion = index.cheapest(people, exclude=tried)
+        if suggestion is None:
+            return None
+        table_id, cost, number_of_seats = suggestion
+        tried.add(table_id)
+
+        with transaction.atomic(using=current_shard()):
+            table = (
+                Table.objects.select_for_update(skip_locked=True)
+                .filter(pk=table_id)
+                .first()
+            )
+            if table is None:
+                continue
+            reservation = _reserve(
+                user, table, people, period, span, (cost, number_of_seats)
+            )
+            if reservation is None:
+                index.update([(table.id, table.seats, table.available_seats)])
+                continue
+            return reservation
+    return None
+
+
+def greedy_assignment(parties, tables):
+    """
+    Seat parties in order, each at the cheapest table left, exactly as if
+    they had been booked one after another.
+
+    Args:
+        parties (list): Party sizes.
+        tables (list): `(table_id, seats, available_seats)` tuples.
+
+    Returns:
+        list: `(table_id, cost, number_of_seats)` or None for each party.
+    """
+    index = AllocationIndex()
+    index.load(tables)
+    seats = {table_id: seats for table_id, seats, _ in tables}
+    available = {table_id: available for table_id, _, available in tables}
+
+    assignment = []
+    for people in parties:
+        suggestion = index.cheapest(people)
+        if suggestion is not None:
+            table_id, _, number_of_seats = suggestion
+            available[table_id] -= number_of_seats
+            index.update([(table_id, seats[table_id], available[table_id])])
+        assignment.append(suggestion)
+    return assignment
+
+
+def assign_parties(parties, tables):
+    """
+    Pick a table for each party of a batch.
+
+    With `BOOKING_BATCH_STRATEGY = "optimal"` the batch is solved as a whole
+    (see `assignment.optimal_assignment`) and the result is kept when it seats
+    more parties, or the same parties for less, than the greedy order. Over
+    the size or time budget the greedy order is used.
+
+    Returns:
+        list: `(table_id, cost, number_of_seats)` or None for each party.
+    """
+    assignment = greedy_assignment(parties, tables)
+    if settings.BOOKING_BATCH_STRATEGY != "optimal":
+        return assignment
+
+    # numpy/scipy are only loaded by workers that solve batches
+    from .assignment import optimal_assignment
+
+    optimal = optimal_assignment(
+        parties,
+        tables,
+        max_variables=settings.BOOKING_BATCH_MAX_VARIABLES,
+        time_limit=settings.BOOKING_BATCH_TIME_LIMIT,
+    )
+    if optimal is not None and _score(optimal) > _score(assignment):
+        return optimal
+    return assignment
+
+
+def _score(assignment):
+    seated = [seat for seat in assignment if seat is not None]
+    return len(seated), -sum(cost for _, cost, _ in seated)
+
+
+def book_tables(user, parties):
+    """
+    Book a table for each party in `parties` within one transaction.
+
+    Only the tables picked for the batch are locked; tables locked by
+    concurrent bookings are left out of it. The reservations are open-ended,
+    so seats held by time-slotted reservations that haven't ended are not
+    available. Reservations are written with a single `bulk_create` and the
+    table counters with a single update.
+
+    Args:
+        parties (list): Party sizes.
+
+    Returns:
+        list: A Reservation, or None when no table was left, for each party.
+    """
+    if not parties:
+        return []
+
+    with transaction.atomic(using=current_shard()):
+        return seat_parties([(user.pk, people) for people in parties], assign_parties)
+
+
+def seat_parties(bookings, assign):
+    """
+    Create open-ended reservations for `bookings` at the tables picked by
+    `assign`, in the current transaction; see `book_tables`.
+
+    The tables are read without locking and `assign` runs on them; then only
+    the picked rows are locked (skipping locked ones) and checked again like
+    in `_book_from_index`. The parties of a locked or changed table are
+    assigned again among the tables left, up to `BOOKING_LOCK_RETRIES` times.
+
+    Args:
+        bookings (list): `(user_id, people)` tuples.
+        assign (callable): `assign_parties` or `greedy_assignment`.
+
+    Returns:
+        list: A Reservation, or None when no table was left, for each booking.
+    """
+    if not bookings:
+        return []
+
+    span = DateTimeTZRange(timezone.now(), None)
+    seated = [None] * len(bookings)
+    tables = {}
+    pending = list(range(len(bookings)))
+    busy = set()
+    for _ in range(settings.BOOKING_LOCK_RETRIES + 1):
+        candidates = list(
+            Table.objects.filter(
+                available_seats__gte=min(bookings[i][1] for i in pending)
+            )
+            .exclude(pk__in=busy)
+            .values_list("id", "seats", "available_seats")
+        )
+        held = held_seats(span, tables=[pk for pk, _, _ in candidates])
+        free = {
+            pk: (seats, available - held.get(pk, 0))
+            for pk, seats, available in candidates
+        }
+        assignment = assign(
+            [bookings[i][1] for i in pending],
+            [(pk, seats, available) for pk, (seats, available) in free.items()],
+        )
+        picked = {seat[0] for seat in assignment if seat is not None}
+        if not picked:
+            break
+
+        locked = {
+            table.pk: table
+            for table in Table.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=picked)
+            .only("id", "seats", "available_seats")
+        }
+        busy |= picked - set(locked)
+        held = held_seats(span, tables=list(locked))
+        current = {
+            pk: (table.seats, table.available_seats - held.get(pk, 0))
+            for pk, table in locked.items()
+        }
+        retry = []
+        for index, seat in zip(pending, assignment):
+            if seat is None:
+                continue
+            if seat[0] in locked and current[seat[0]] == free[seat[0]]:
+                seated[index] = seat
+                tables[seat[0]] = locked[seat[0]]
+            else:
+                retry.append(index)
+        if not retry:
+            break
+        # what was read of the tables locked this round is out of date now
+        busy |= set(locked)
+        pending = retry
+
+    reservations = [
+        Reservation(
+            user_id=user_id,
+            table=tables[seat[0]],
+            number_of_seats=seat[2],
+            cost=seat[1],
+        )
+        if seat is not None
+        else None
+        for (user_id, _), seat in zip(bookings, seated)
+    ]
+    booked = [reservation for reservation in reservations if reservation]
+    Reservation.objects.bulk_create(booked)
+    deltas = Counter()
+    for reservation in booked:
+        deltas[reservation.table_id] -= reservation.number_of_seats
+    Table.objects.adjust_available_seats(deltas)
+
+    return reservations
+
+
+def cancel_reservations(user, reservation_ids):
+    """
+    Cancel the reservations of `user` among `reservation_ids`.
+
+    A single `DELETE ... RETURNING` removes them, and the seats of the
+    open-ended ones go back to their tables in one counter update within the
+    same transaction. Ids that don't exist, were already cancelled, belong
+    to someone else or, with a current restaurant, to another restaurant
+    are skipped, so cancelling again is harmless.
+
+    The rows are deleted without Django's collector, so no `post_delete` is
+    sent for them; `available_seats_changed` is, once the transaction commits.
+
+    Args:
+        user (User): The user cancelling.
+        reservation_ids (list): Ids of the reservations to cancel.
+
+    Returns:
+        set: Ids of the reservations cancelled.
+    """
+    if not reservation_ids:
+        return set()
+
+    using = current_shard()
+    connection = connections[using]
+    table = connection.ops.quote_name(Reservation._meta.db_table)
+    sql = f"DELETE FROM {table} WHERE id = ANY(%s) AND user_id = %s "
+    params = [sorted(set(reservation_ids)), user.pk]
+    restaurant = current_restaurant()
+    if restaurant is not None:
+        tables = connection.ops.quote_name(Table._meta.db_table)
+        sql += f"AND table_id IN (SELECT id FROM {tables} WHERE restaurant_id = %s) "
+        params.append(restaurant.pk)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql + "RETURNING id, table_id, number_of_seats, period IS NULL",
+                params,
+            )
+            rows = cursor.fetchall()
+        deltas = Counter()
+        for _, table_id, number_of_seats, open_ended in rows:
+            if open_ended:
+                deltas[table_id] += number_of_seats
+        Table.objects.adjust_available_seats(deltas)
+
+    return {row[0] for row in rows}
@@ -0,0 +1,53 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class NoTableAvailable(APIException):
+    """
+    Raised when no table can seat the requested party.
+    """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "No suitable table available."
+    default_code = "no_table_available"
+
+
+class TablesBusy(APIException):
+    """
+    Raised when every fitting table stayed locked by concurrent bookings.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "All suitable tables are being booked, please retry."
+    default_code = "tables_busy"
+
+
+class LoginBusy(APIException):
+    """
+    Raised when too many logins are already waiting for password hashing.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, please retry."
+    default_code = "login_busy"
+
+
+class IdempotencyKeyReused(APIException):
+    """
+    Raised when an `Idempotency-Key` comes back with a different request.
+    """
+
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request."
+    default_code = "idempotency_key_reused"
+
+
+class PartitionMissing(APIException):
+    """
+    Raised when a reservation falls in a month without a partition, because
+    `reservation_partitions` hasn't run.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Reservations can't be stored right now, please retry later."
+    default_code = "partition_missing"
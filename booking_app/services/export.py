@@ -0,0 +1,132 @@
+"""
+Streaming export of reservations as NDJSON or CSV.
+
+Rows are read with `QuerySet.iterator`, which on PostgreSQL goes through a
+server-side cursor, and are rendered one at a time into a
+`StreamingHttpResponse`. Memory use doesn't depend on the number of rows and
+the first line is sent as soon as the first chunk is fetched.
+
+Reservations can live on a shard while users stay in the default database
+(see `booking_app.routers`), so the usernames aren't joined in: they are
+fetched from the users' database for each chunk of rows.
+"""
+
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+EXPORT_COLUMNS = (
+    "id",
+    "user",
+    "table",
+    "number_of_seats",
+    "cost",
+    "start",
+    "end",
+    "created",
+)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+class _Echo:
+    """
+    File-like object handing back what `csv.writer` writes to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """
+    Yield each reservation of `queryset` as a tuple of `EXPORT_COLUMNS` values.
+    """
+    size = settings.BOOKING_EXPORT_CHUNK_SIZE
+    rows = (
+        queryset.order_by("id")
+        .values_list(
+            "id",
+            "user_id",
+            "table_id",
+            "number_of_seats",
+            "cost",
+            "period",
+            "created",
+        )
+        .iterator(chunk_size=size)
+    )
+    while chunk := list(islice(rows, size)):
+        usernames = dict(
+            get_user_model()
+            .objects.filter(pk__in={row[1] for row in chunk})
+            .values_list("pk", "username")
+        )
+        for pk, user_id, *head, period, created in chunk:
+            yield (
+                pk,
+                usernames.get(user_id),
+                *head,
+                period.lower if period else None,
+                period.upper if period else None,
+                created,
+            )
+
+
+def _ndjson_lines(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+        )
+
+
+def _buffered(lines, size):
+    # one write to the client per chunk of rows rather than per row
+    lines = iter(lines)
+    while chunk := "".join(islice(lines, size)):
+        yield chunk
+
+
+def export_reservations(queryset, export_format="ndjson"):
+    """
+    Stream the reservations of `queryset` as a file download.
+
+    Args:
+        queryset (QuerySet): Reservations to export.
+        export_format (str): "ndjson" or "csv".
+
+    Returns:
+        StreamingHttpResponse: The export, one reservation per line.
+
+    Raises:
+        ValueError: Unknown `export_format`.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format {export_format!r}, "
+            f"expected one of {', '.join(EXPORT_FORMATS)}."
+        )
+    render = _csv_lines if export_format == "csv" else _ndjson_lines
+    response = StreamingHttpResponse(
+        _buffered(render(export_rows(queryset)), settings.BOOKING_EXPORT_CHUNK_SIZE),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    filename = f"reservations-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,141 @@
+"""
+Stored responses of requests sent with an `Idempotency-Key` header.
+
+The first request with a key claims an `IdempotencyKey` row, inside the
+transaction that does the work, and stores its response there; the row is
+unique per user and key. A retry finds the response in the
+`BOOKING_IDEMPOTENCY_CACHE_ALIAS` cache, or else in the table, and gets it
+back without the work being done again. A retry that arrives while the first
+request is still running waits on the row and then gets its response.
+
+Keys expire after `BOOKING_IDEMPOTENCY_TTL` seconds; after that the key can
+be used for a new request, and `purge_idempotency_keys` deletes the rows.
+The rows are kept in the shard of the current restaurant.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from booking_app.models import IdempotencyKey
+from booking_app.routers import current_shard
+
+CACHE_KEY = "booking_idempotency:{user}:{key}"
+
+
+def _cache():
+    return caches[settings.BOOKING_IDEMPOTENCY_CACHE_ALIAS]
+
+
+def _cache_key(user, key):
+    # header values can hold characters memcached doesn't accept in keys
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return CACHE_KEY.format(user=user.pk, key=digest)
+
+
+def request_fingerprint(data, path=""):
+    """
+    SHA-256 of a request body and path, the same for equal JSON or form
+    data. The path tells apart the same booking at two restaurants.
+    """
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    return hashlib.sha256(
+        json.dumps([path, data], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def cached_response(user, key):
+    """
+    Returns:
+        tuple: `(fingerprint, status_code, response, headers)` stored for
+        the key, or None when it isn't cached.
+    """
+    return _cache().get(_cache_key(user, key))
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Claim `key` for a new request of `user` in the current transaction.
+
+    A key whose request is still running is waited for. An expired key is
+    taken over.
+
+    Returns:
+        tuple: None when the key was claimed, or else the stored
+        `(fingerprint, status_code, response, headers)`.
+    """
+    connection = connections[current_shard()]
+    table = connection.ops.quote_name(IdempotencyKey._meta.db_table)
+    now = timezone.now()
+    expires = now + timedelta(seconds=settings.BOOKING_IDEMPOTENCY_TTL)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} "
+            "(created, modified, user_id, key, fingerprint, headers, expires) "
+            "VALUES (%s, %s, %s, %s, %s, '{}', %s) "
+            "ON CONFLICT (user_id, key) DO UPDATE SET "
+            "created = EXCLUDED.created, modified = EXCLUDED.modified, "
+            "fingerprint = EXCLUDED.fingerprint, status_code = NULL, "
+            "response = NULL, headers = EXCLUDED.headers, expires = EXCLUDED.expires "
+            f"WHERE {table}.expires <= %s "
+            "RETURNING id",
+            [now, now, user.pk, key, fingerprint, expires, now],
+        )
+        if cursor.fetchone() is not None:
+            return None
+    # the row is locked now, so its request has committed
+    return (
+        IdempotencyKey.objects.filter(user=user, key=key)
+        .values_list("fingerprint", "status_code", "response", "headers")
+        .get()
+    )
+
+
+def save_response(user, key, fingerprint, status_code, response, headers):
+    """
+    Store the response of the request that claimed `key`, in the table now
+    and in the cache once the transaction commits.
+    """
+    IdempotencyKey.objects.filter(user=user, key=key).update(
+        status_code=status_code, response=response, headers=headers
+    )
+    stored = (fingerprint, status_code, response, headers)
+    cache_key = _cache_key(user, key)
+    transaction.on_commit(
+        lambda: _cache().set(cache_key, stored, settings.BOOKING_IDEMPOTENCY_TTL),
+        using=current_shard(),
+    )
+
+
+def release_key(user, key):
+    """
+    Give up a claimed key, so that a retry runs the request again.
+    """
+    IdempotencyKey.objects.filter(user=user, key=key).delete()
+
+
+def purge_idempotency_keys(batch_size=10000, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the expired keys of database `using`, `batch_size` rows per
+    statement.
+
+    Returns:
+        int: Number of keys deleted.
+    """
+    keys = IdempotencyKey.objects.db_manager(using)
+    deleted = 0
+    while True:
+        ids = list(
+            keys.filter(expires__lte=timezone.now())
+            .order_by()
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += keys.filter(id__in=ids).delete()[0]
@@ -0,0 +1,160 @@
+"""
+Monthly partitions of the reservation table.
+
+`booking_app_reservation` is range-partitioned on `created` (migration
+0007), one partition per calendar month in UTC, named
+`booking_app_reservation_pYYYY_MM`. There is no default partition: a
+booking made in a month without a partition fails, and the API answers 503
+(`PartitionMissing`). Partitions are therefore created
+`BOOKING_RESERVATION_PARTITIONS_AHEAD` months in advance by the
+`reservation_partitions` command, which must run daily; gunicorn also
+creates them when it starts (`kernel.gunicorn_conf`).
+
+Without a default partition, Postgres reads the partitions of a
+`created`-ordered query one after the other, newest first, and stops once
+the page is full. The list endpoint and the admin therefore only touch the
+current partitions. Lookups on other columns (a table's open-ended seats,
+the slots overlapping a time range) probe one small index per attached
+partition, so old months are archived: detached and moved to the
+`BOOKING_RESERVATION_ARCHIVE_SCHEMA` schema.
+
+A month is only archived once none of its reservations holds seats any
+more: no open-ended reservation and no slot ending in the future. A month
+with an open-ended reservation that is never cancelled stays attached.
+"""
+
+import re
+from datetime import date, datetime, timezone
+
+from django.db import IntegrityError, connections
+
+from booking_app.models import Reservation
+
+PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def month_start(value):
+    """
+    The first day of the UTC month of a date or datetime.
+    """
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    """
+    The first day of the month `months` after (or before) `month`.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{Reservation._meta.db_table}_p{month:%Y_%m}"
+
+
+def attached_partitions(using="default"):
+    """
+    Returns:
+        list: `(month, name)` of the monthly partitions attached to the
+        reservation table, oldest first.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [Reservation._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.search(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def create_partitions(first, last, using="default"):
+    """
+    Create the missing partitions for the months from `first` to `last`.
+
+    Args:
+        first (date): Any day of the first month.
+        last (date): Any day of the last month.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    existing = {month for month, _ in attached_partitions(using)}
+    created = []
+    month, last = month_start(first), month_start(last)
+    with connection.cursor() as cursor:
+        while month <= last:
+            if month not in existing:
+                name = partition_name(month)
+                cursor.execute(
+                    f"CREATE TABLE {quote_name(name)} PARTITION OF "
+                    f"{quote_name(Reservation._meta.db_table)} "
+                    f"FOR VALUES FROM ('{month} 00:00:00+00') "
+                    f"TO ('{add_months(month, 1)} 00:00:00+00')"
+                )
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def missing_partition(error):
+    """
+    Whether `error` comes from a row that falls in no partition: a check
+    violation not raised by any named constraint.
+    """
+    if not isinstance(error, IntegrityError):
+        return False
+    cause = error.__cause__
+    # psycopg2 and psycopg 3 name the SQLSTATE differently
+    sqlstate = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+    diag = getattr(cause, "diag", None)
+    return sqlstate == "23514" and diag is not None and not diag.constraint_name
+
+
+def live_reservations(name, using="default"):
+    """
+    Reservations of partition `name` that still hold seats: open-ended ones
+    and slots that haven't ended.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT count(*) FROM {connections[using].ops.quote_name(name)} "
+            "WHERE period IS NULL OR upper(period) > now()"
+        )
+        return cursor.fetchone()[0]
+
+
+def archive_partition(name, schema, drop=False, using="default"):
+    """
+    Detach partition `name` and move it to `schema`, or drop it.
+
+    Outside a transaction the partition is detached concurrently, so
+    bookings aren't blocked meanwhile.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    concurrently = " CONCURRENTLY" if not connection.in_atomic_block else ""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {quote_name(Reservation._meta.db_table)} "
+            f"DETACH PARTITION {quote_name(name)}{concurrently}"
+        )
+        if drop:
+            cursor.execute(f"DROP TABLE {quote_name(name)}")
+        else:
+            # the id default would tie the archive to the live id sequence
+            cursor.execute(f"ALTER TABLE {quote_name(name)} ALTER COLUMN id DROP DEFAULT")
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quote_name(schema)}")
+            cursor.execute(
+                f"ALTER TABLE {quote_name(name)} SET SCHEMA {quote_name(schema)}"
+            )
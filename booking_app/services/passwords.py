@@ -0,0 +1,158 @@
+"""
+Password verification off the request thread.
+
+PBKDF2 is deliberately slow, so a burst of logins keeps every worker busy
+hashing. `PasswordPoolBackend` sends the hashing to a small process pool and
+lets at most `LOGIN_MAX_CONCURRENCY` logins per process wait for it; the
+rest are turned away with `LoginBusy` instead of queueing behind them.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cache
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .exceptions import LoginBusy
+
+
+def _check(password, encoded):
+    """
+    Verify `password` against `encoded`, in a pool process.
+
+    Returns:
+        tuple: `(valid, upgraded)`, where `upgraded` is a new hash when the
+        hasher settings changed since `encoded` was made, else None.
+    """
+    upgraded = []
+    valid = check_password(
+        password, encoded, setter=lambda raw: upgraded.append(make_password(raw))
+    )
+    return valid, upgraded[0] if upgraded else None
+
+
+def _hash(password):
+    make_password(password)
+    return False, None
+
+
+class PasswordPool:
+    """
+    Runs password hashing in `workers` processes, or in the calling thread
+    when `workers` is 0, for at most `max_concurrency` callers at a time.
+    """
+
+    def __init__(self, workers, max_concurrency, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def check(self, password, encoded):
+        """
+        Returns:
+            tuple: `(valid, upgraded)`, see `_check`.
+
+        Raises:
+            LoginBusy: No slot freed up within `timeout` seconds.
+        """
+        return self._run(_check, password, encoded)
+
+    def hash(self, password):
+        """
+        Hash and discard `password`, to spend the same time as `check`.
+        """
+        self._run(_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise LoginBusy()
+        try:
+            if not self.workers:
+                return function(*args)
+            try:
+                return self._get_executor().submit(function, *args).result()
+            except BrokenProcessPool:
+                # a worker died; start a new pool next time
+                self.shutdown()
+                return function(*args)
+        finally:
+            self._slots.release()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(
+                        "forkserver" if "forkserver" in methods else "spawn"
+                    ),
+                    # set up before any task unpickles this module's functions;
+                    # DJANGO_SETTINGS_MODULE is inherited from the environment
+                    initializer=django.setup,
+                )
+            return self._executor
+
+
+@cache
+def get_password_pool():
+    """
+    The process-wide `PasswordPool` configured by the `LOGIN_*` settings.
+    """
+    return PasswordPool(
+        workers=settings.LOGIN_HASH_WORKERS,
+        max_concurrency=settings.LOGIN_MAX_CONCURRENCY,
+        timeout=settings.LOGIN_QUEUE_TIMEOUT,
+    )
+
+
+@receiver(setting_changed)
+def reset_password_pool(setting, **kwargs):
+    if setting.startswith("LOGIN_") and get_password_pool.cache_info().currsize:
+        get_password_pool().shutdown()
+        get_password_pool.cache_clear()
+
+
+class PasswordPoolBackend(ModelBackend):
+    """
+    `ModelBackend` that checks passwords through `get_password_pool()`.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        pool = get_password_pool()
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # hash anyway, so unknown usernames take as long as wrong passwords
+            pool.hash(password)
+            return None
+
+        valid, upgraded = pool.check(password, user.password)
+        if not valid or not self.user_can_authenticate(user):
+            return None
+        if upgraded:
+            user.password = upgraded
+            user.save(update_fields=["password"])
+        return user
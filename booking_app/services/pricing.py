@@ -0,0 +1,122 @@
+"""
+Booking prices.
+
+The rules are written once, in `_price_rule`. `PriceTable` evaluates them
+for every party size, table size and number of free seats up to
+`BOOKING_MAX_TABLE_SEATS`, so pricing at booking time is a dict lookup.
+`get_price_table()` keeps one table per process, rebuilt when the
+`BOOKING_SEAT_COST` or `BOOKING_MAX_TABLE_SEATS` setting changes.
+"""
+
+from functools import cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+def adjusted_seats(people):
+    """
+    Seats charged for `people`: odd parties are rounded up to an even number.
+    """
+    if people % 2 == 1:
+        return people + 1
+    return people
+
+
+def _price_rule(people, seats, available_seats, seat_cost):
+    if available_seats < people:
+        return None
+    adjusted = adjusted_seats(people)
+    if seats == people:
+        return (people - 1) * seat_cost, people
+    if available_seats == people:
+        return people * seat_cost, people
+    if seats == adjusted:
+        return (adjusted - 1) * seat_cost, adjusted
+    if available_seats >= adjusted:
+        return adjusted * seat_cost, adjusted
+    return None
+
+
+class PriceTable:
+    """
+    `(cost, number_of_seats)` for every `(people, seats, available_seats)`
+    with tables of up to `max_seats` seats. Larger tables are priced on the
+    fly with the same rules.
+    """
+
+    def __init__(self, seat_cost, max_seats):
+        self.seat_cost = seat_cost
+        self.max_seats = max_seats
+        self._prices = {
+            (people, seats, available_seats): _price_rule(
+                people, seats, available_seats, seat_cost
+            )
+            for seats in range(1, max_seats + 1)
+            for available_seats in range(seats + 1)
+            for people in range(1, available_seats + 1)
+        }
+
+    def price(self, people, seats, available_seats):
+        """
+        Returns:
+            tuple: `(cost, number_of_seats)`, or None if the party doesn't fit.
+        """
+        try:
+            return self._prices[people, seats, available_seats]
+        except KeyError:
+            return _price_rule(people, seats, available_seats, self.seat_cost)
+
+    def cheapest(self, people, classes):
+        """
+        Price `people` at each table class, cheapest first and, at the same
+        cost, fewest free seats first (the order `book_table` picks tables in).
+
+        Args:
+            people (int): Party size.
+            classes (iterable): `(seats, available_seats)` pairs.
+
+        Returns:
+            list: `(seats, available_seats, cost, number_of_seats)` for the
+            classes that can seat the party.
+        """
+        quotes = []
+        for seats, available_seats in classes:
+            quote = self.price(people, seats, available_seats)
+            if quote is not None:
+                quotes.append((seats, available_seats, *quote))
+        quotes.sort(key=lambda quote: (quote[2], quote[1], quote[0]))
+        return quotes
+
+
+@cache
+def get_price_table():
+    """
+    The process-wide `PriceTable` for the current pricing settings.
+    """
+    return PriceTable(
+        seat_cost=settings.BOOKING_SEAT_COST,
+        max_seats=settings.BOOKING_MAX_TABLE_SEATS,
+    )
+
+
+@receiver(setting_changed)
+def reset_price_table(setting, **kwargs):
+    if setting in ("BOOKING_SEAT_COST", "BOOKING_MAX_TABLE_SEATS"):
+        get_price_table.cache_clear()
+
+
+def price(people, seats, available_seats):
+    """
+    Price `people` at a table, from `get_price_table()`.
+
+    Args:
+        people (int): Party size.
+        seats (int): Table size.
+        available_seats (int): Seats still free at the table.
+
+    Returns:
+        tuple: `(cost, number_of_seats)`, or None if the party doesn't fit.
+    """
+    return get_price_table().price(people, seats, available_seats)
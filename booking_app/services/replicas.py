@@ -0,0 +1,150 @@
+"""
+Read replicas of the default database.
+
+`choose_replica()` picks one of `BOOKING_REPLICAS` for a request whose
+reads may be slightly stale. A replica lagging more than
+`BOOKING_REPLICA_MAX_LAG` seconds behind the primary, or not answering, is
+left out until its next check, `BOOKING_REPLICA_LAG_CHECK_INTERVAL` seconds
+later; with none left the reads stay on the primary. One thread of the
+process runs a due check while the others keep using the last result, and
+the replicas connect with a short timeout (`BOOKING_REPLICA_CONNECT_TIMEOUT`)
+so an unreachable one holds up that request only briefly.
+
+So that users see their own bookings, `pin_to_primary()` keeps the reads of
+a user who just booked or cancelled on the primary for
+`BOOKING_REPLICA_STICKY_SECONDS`.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DatabaseError, connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+PINNED_KEY = "booking_primary:{user}"
+
+# seconds the replica is behind the primary; 0 when it has replayed all it
+# received, since the last replay time stays old while the primary is idle.
+# That only holds while it streams: a replica cut off from the primary has
+# replayed all it received too, so it gets NULL (unhealthy), and so does a
+# promoted one, which no longer follows the primary. Seeing the receiver's
+# status needs the role to have pg_read_all_stats.
+LAG_SQL = (
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN NULL "
+    "WHEN NOT EXISTS ("
+    "SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'"
+    ") THEN NULL "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) "
+    "END::float"
+)
+
+_lock = threading.Lock()
+_checks = {}
+# aliases a thread is checking right now
+_refreshing = set()
+
+
+def _cache():
+    return caches[settings.BOOKING_REPLICA_CACHE_ALIAS]
+
+
+def replica_lag(alias):
+    """
+    Returns:
+        float: Seconds the replica `alias` is behind the primary, or None
+        when it isn't streaming from the primary, was promoted, or hasn't
+        replayed anything yet.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return cursor.fetchone()[0]
+
+
+def replica_healthy(alias):
+    """
+    Whether `alias` is within `BOOKING_REPLICA_MAX_LAG`, as of its last
+    check.
+
+    While another thread checks it, the last result is used, or the replica
+    counts as unhealthy when it was never checked.
+    """
+    now = time.monotonic()
+    with _lock:
+        checked = _checks.get(alias)
+        if checked is not None and checked[0] > now:
+            return checked[1]
+        if alias in _refreshing:
+            return checked is not None and checked[1]
+        _refreshing.add(alias)
+
+    healthy = False
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError:
+        logger.warning("Replica %s is unavailable.", alias, exc_info=True)
+    else:
+        healthy = lag is not None and lag <= settings.BOOKING_REPLICA_MAX_LAG
+        if lag is None:
+            logger.warning("Replica %s isn't streaming from the primary.", alias)
+        elif not healthy:
+            logger.warning("Replica %s is %s seconds behind.", alias, lag)
+    finally:
+        with _lock:
+            _checks[alias] = (
+                time.monotonic() + settings.BOOKING_REPLICA_LAG_CHECK_INTERVAL,
+                healthy,
+            )
+            _refreshing.discard(alias)
+    return healthy
+
+
+def choose_replica():
+    """
+    Returns:
+        str: A random healthy replica, or None to read from the primary.
+    """
+    healthy = [alias for alias in settings.BOOKING_REPLICAS if replica_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def pin_to_primary(user):
+    """
+    Keep the reads of `user` on the primary for
+    `BOOKING_REPLICA_STICKY_SECONDS`, after a write of theirs.
+    """
+    if settings.BOOKING_REPLICAS:
+        _cache().set(
+            PINNED_KEY.format(user=user.pk),
+            True,
+            settings.BOOKING_REPLICA_STICKY_SECONDS,
+        )
+
+
+def pinned_to_primary(user):
+    return bool(_cache().get(PINNED_KEY.format(user=user.pk)))
+
+
+def replica_for(user):
+    """
+    The replica the reads of `user` can go to, or None when there is no
+    healthy one or the user wrote recently.
+    """
+    if not settings.BOOKING_REPLICAS or pinned_to_primary(user):
+        return None
+    return choose_replica()
+
+
+@receiver(setting_changed)
+def forget_replica_checks(setting, **kwargs):
+    if setting.startswith("BOOKING_REPLICA"):
+        with _lock:
+            _checks.clear()
@@ -0,0 +1,36 @@
+"""
+Restaurants by slug, served from the Django cache.
+
+Every request to a restaurant route looks its restaurant up, so the rows
+are cached for `BOOKING_RESTAURANT_CACHE_TTL` seconds and dropped when a
+restaurant is saved or deleted. A renamed slug keeps resolving until its
+entry expires.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from booking_app.models import Restaurant
+
+CACHE_KEY = "booking_restaurant:{slug}"
+
+
+def get_restaurant(slug):
+    """
+    Returns:
+        Restaurant: The restaurant with `slug`, or None.
+    """
+    key = CACHE_KEY.format(slug=slug)
+    restaurant = cache.get(key)
+    if restaurant is None:
+        restaurant = Restaurant.objects.filter(slug=slug).first()
+        if restaurant is not None:
+            cache.set(key, restaurant, settings.BOOKING_RESTAURANT_CACHE_TTL)
+    return restaurant
+
+
+def forget_restaurant(slug):
+    """
+    Make the next `get_restaurant(slug)` read the database again.
+    """
+    cache.delete(CACHE_KEY.format(slug=slug))
@@ -0,0 +1,164 @@
+"""
+Waitlist of open-ended bookings that found no table.
+
+A rejected booking can be queued as a `WaitlistEntry`. The
+`process_waitlist` worker books the waiting entries whenever seats may have
+been released: triggers on the reservation and table tables send a
+`NOTIFY booking_waitlist` when a reservation is deleted, a counter goes up
+or a table is added, and the worker `LISTEN`s on that channel. The queue
+lives in Postgres, so no broker is needed, and several workers can drain it
+at once since each batch is locked with `FOR UPDATE SKIP LOCKED`.
+
+Notifications are only a wake-up call: the worker also drains every
+`BOOKING_WAITLIST_POLL_INTERVAL` seconds, which catches seats freed without
+a notification (a time-slotted reservation ending) and expires old entries.
+
+Entries are kept in the shard of their restaurant, and a worker drains the
+queue of one database (see `process_waitlist --database`).
+"""
+
+import select
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.models import Max
+from django.utils import timezone
+
+from booking_app.models import Restaurant, Table, WaitlistEntry
+from booking_app.routers import current_restaurant, use_restaurant
+from .booking import greedy_assignment, seat_parties
+
+# also named in the triggers of migration 0008
+WAITLIST_CHANNEL = "booking_waitlist"
+
+
+def join_waitlist(user, people):
+    """
+    Queue an open-ended booking for `people` at the current restaurant. A
+    user already waiting there with the same party size gets that entry
+    back, so retries don't queue twice.
+
+    Returns:
+        WaitlistEntry: The waiting entry.
+    """
+    entry, _ = WaitlistEntry.objects.get_or_create(
+        user=user,
+        restaurant=current_restaurant(),
+        number_of_people=people,
+        status=WaitlistEntry.Status.WAITING,
+        defaults={
+            "expires": timezone.now()
+            + timedelta(seconds=settings.BOOKING_WAITLIST_TTL)
+        },
+    )
+    return entry
+
+
+def drain_waitlist(batch_size=None, using=DEFAULT_DB_ALIAS):
+    """
+    Book the waiting entries of database `using` that fit, in queue order,
+    and expire the ones past `expires`.
+
+    The queue is walked `batch_size` entries at a time, one transaction per
+    batch. Entries locked by another worker are skipped. The entries of each
+    restaurant in a batch are seated like `book_tables` but in greedy order,
+    so the earliest entry gets the cheapest table; entries that still don't
+    fit keep waiting. Only the tables picked are locked, and none when no
+    table has room for any of the entries, so a wake-up after every
+    cancellation doesn't hold up concurrent bookings.
+
+    Returns:
+        Counter: Number of entries "booked" and "expired".
+    """
+    batch_size = batch_size or settings.BOOKING_WAITLIST_BATCH_SIZE
+    entries_in = WaitlistEntry.objects.db_manager(using)
+    done = Counter()
+    last = 0
+    while True:
+        with transaction.atomic(using=using):
+            entries = list(
+                entries_in.select_for_update(skip_locked=True)
+                .filter(status=WaitlistEntry.Status.WAITING, id__gt=last)
+                .order_by("id")[:batch_size]
+            )
+            if not entries:
+                break
+            last = entries[-1].id
+
+            now = timezone.now()
+            queues = defaultdict(list)
+            for entry in entries:
+                if entry.expires > now:
+                    queues[entry.restaurant_id].append(entry)
+            restaurants = Restaurant.objects.in_bulk(
+                [restaurant_id for restaurant_id in queues if restaurant_id]
+            )
+            changed = []
+            for restaurant_id, waiting in queues.items():
+                restaurant = restaurants.get(restaurant_id)
+                shard = restaurant.shard if restaurant else DEFAULT_DB_ALIAS
+                if (restaurant_id and restaurant is None) or shard != using:
+                    # a deleted or moved restaurant; the entries wait until
+                    # they expire
+                    continue
+                with use_restaurant(restaurant):
+                    room = Table.objects.aggregate(room=Max("available_seats"))["room"]
+                    waiting = [
+                        entry
+                        for entry in waiting
+                        if entry.number_of_people <= (room or 0)
+                    ]
+                    reservations = seat_parties(
+                        [(entry.user_id, entry.number_of_people) for entry in waiting],
+                        greedy_assignment,
+                    )
+                for entry, reservation in zip(waiting, reservations):
+                    if reservation is not None:
+                        entry.status = WaitlistEntry.Status.BOOKED
+                        entry.reservation_id = reservation.pk
+                        changed.append(entry)
+            for entry in entries:
+                if entry.expires <= now:
+                    entry.status = WaitlistEntry.Status.EXPIRED
+                    changed.append(entry)
+            for entry in changed:
+                entry.modified = now
+                done[entry.status] += 1
+            entries_in.bulk_update(changed, ["status", "reservation_id", "modified"])
+
+        if len(entries) < batch_size:
+            break
+    return done
+
+
+def listen(using=DEFAULT_DB_ALIAS):
+    """
+    Subscribe the connection to the waitlist channel. It must stay in
+    autocommit mode for the notifications to arrive.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"LISTEN {WAITLIST_CHANNEL}")
+
+
+def wait_for_notification(timeout, using=DEFAULT_DB_ALIAS):
+    """
+    Wait up to `timeout` seconds for a notification on a connection that
+    called `listen()`.
+
+    Returns:
+        bool: Whether one arrived.
+    """
+    connection = connections[using].connection
+    if is_psycopg3:
+        return any(True for _ in connection.notifies(timeout=timeout, stop_after=1))
+
+    # notifications that came with earlier queries are already queued
+    if not connection.notifies:
+        select.select([connection], [], [], timeout)
+        connection.poll()
+    received = bool(connection.notifies)
+    connection.notifies.clear()
+    return received
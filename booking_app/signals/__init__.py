@@ -0,0 +1,19 @@
+from .reservation import (
+    remember_held_seats,
+    hold_reserved_seats,
+    release_reserved_seats,
+)
+from .table import (
+    sync_index_with_counters,
+    sync_index_with_table,
+    drop_table_from_index,
+)
+from .authentication import (
+    forget_deleted_token,
+    forget_user_tokens,
+)
+from .availability import (
+    refresh_availability,
+    refresh_availability_for_table,
+)
+from .restaurant import forget_cached_restaurant
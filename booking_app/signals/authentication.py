@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from booking_app.api.authentication import token_cache
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """
+    Stop authenticating with a deleted token.
+    """
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached tokens of a saved user, so deactivation, password or
+    permission changes apply to the next request.
+    """
+    if raw:
+        return
+    token_cache.delete(*Token.objects.filter(user=instance).values_list("key", flat=True))
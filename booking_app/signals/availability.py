@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from booking_app.models import Table, available_seats_changed
+from booking_app.services import invalidate_availability
+
+
+@receiver(available_seats_changed, sender=Table)
+def refresh_availability(sender, tables, **kwargs):
+    """
+    Drop the cached availability once a booking, cancellation or
+    reconciliation has committed.
+    """
+    invalidate_availability()
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def refresh_availability_for_table(sender, instance, using, raw=False, **kwargs):
+    """
+    Drop the cached availability once a table is added, edited or removed.
+    """
+    if raw:
+        return
+    transaction.on_commit(invalidate_availability, using=using)
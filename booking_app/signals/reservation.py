@@ -0,0 +1,53 @@
+from collections import Counter
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from booking_app.models import Reservation, Table
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_held_seats(sender, instance, using, **kwargs):
+    """
+    Remember which table and how many seats an existing open-ended
+    reservation held, so an update can move the difference between table
+    counters.
+    """
+    instance._held_seats = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._held_seats = (
+            Reservation.objects.using(using)
+            .filter(pk=instance.pk, period__isnull=True)
+            .values_list("table_id", "number_of_seats")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Reservation)
+def hold_reserved_seats(sender, instance, created, using, raw=False, **kwargs):
+    """
+    Take the seats of an open-ended reservation off the table's
+    `available_seats` counter. Time-slotted reservations don't touch it.
+    """
+    if raw:
+        return
+    deltas = Counter()
+    if instance.period is None:
+        deltas[instance.table_id] -= instance.number_of_seats
+    held = getattr(instance, "_held_seats", None)
+    if not created and held:
+        table_id, number_of_seats = held
+        deltas[table_id] += number_of_seats
+    Table.objects.db_manager(using).adjust_available_seats(deltas)
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reserved_seats(sender, instance, using, **kwargs):
+    """
+    Give the seats of a deleted open-ended reservation back to its table.
+    """
+    if instance.period is not None:
+        return
+    Table.objects.db_manager(using).adjust_available_seats(
+        {instance.table_id: instance.number_of_seats}
+    )
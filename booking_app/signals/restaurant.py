@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from booking_app.models import Restaurant
+from booking_app.services import forget_restaurant
+
+
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+def forget_cached_restaurant(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached restaurant once it is edited or removed, so a moved
+    shard applies to the next request.
+    """
+    if raw:
+        return
+    slug = instance.slug
+    transaction.on_commit(lambda: forget_restaurant(slug))
@@ -0,0 +1,52 @@
+import logging
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from booking_app.models import Table, available_seats_changed
+from booking_app.services import get_allocation_index
+
+logger = logging.getLogger(__name__)
+
+
+def _update_index(tables):
+    index = get_allocation_index()
+    if index is None:
+        return
+    try:
+        index.update(tables)
+    except ValueError:
+        logger.warning("Allocation index update failed.", exc_info=True)
+
+
+@receiver(available_seats_changed, sender=Table)
+def sync_index_with_counters(sender, tables, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Keep the allocation index in step with `available_seats` changes. It
+    only holds the tables of the default database.
+    """
+    if using == DEFAULT_DB_ALIAS:
+        _update_index(tables)
+
+
+@receiver(post_save, sender=Table)
+def sync_index_with_table(sender, instance, using, raw=False, **kwargs):
+    """
+    Add new tables to the allocation index and refresh edited ones.
+    """
+    if raw or using != DEFAULT_DB_ALIAS:
+        return
+    row = (instance.pk, instance.seats, instance.available_seats)
+    transaction.on_commit(lambda: _update_index([row]), using=using)
+
+
+@receiver(post_delete, sender=Table)
+def drop_table_from_index(sender, instance, using, **kwargs):
+    """
+    Remove deleted tables from the allocation index.
+    """
+    index = get_allocation_index()
+    if index is not None and using == DEFAULT_DB_ALIAS:
+        table_id = instance.pk
+        transaction.on_commit(lambda: index.discard(table_id), using=using)
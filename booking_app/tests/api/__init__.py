@@ -1 +1,9 @@
 from .test_reservation import ReservationViewSetTest
+from .test_book_concurrency import BatchLockTest, BookConcurrencyStressTest
+from .test_authentication import CachedTokenAuthenticationTest
+from .test_login import LoginTest
+from .test_reservation_async import AsyncReservationViewSetTest
+from .test_metrics import QueryMetricsTest
+from .test_hot_queries import HotQueryTest
+from .test_idempotency import IdempotencyKeyTest
+from .test_restaurants import RestaurantRoutesTest
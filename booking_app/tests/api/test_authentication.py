@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import CachedTokenAuthentication, token_cache
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_query(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/reservations/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/reservations/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get("/api/reservations/")
+        Token.objects.filter(pk=self.token.pk).get().delete()
+
+        response = self.client.get("/api/reservations/")
+        self.assertEqual(
+            response.status_code,
+            401,
+            msg=f"Expected 401, but got {response.status_code}",
+        )
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get("/api/reservations/")
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get("/api/reservations/")
+        self.assertEqual(
+            response.status_code,
+            401,
+            msg=f"Expected 401, but got {response.status_code}",
+        )
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS="default")
+    def test_shared_cache(self):
+        self.client.get("/api/reservations/")
+        token_cache.clear()
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/reservations/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+
+    def test_lookup_started_before_invalidation_is_not_cached(self):
+        generation = token_cache.generation()
+        user = User.objects.get(pk=self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+
+        token_cache.set(self.token.key, (user, self.token), generation)
+        self.assertIsNone(
+            token_cache.get(self.token.key),
+            msg="Expected no entry from before the user was saved, but got one",
+        )
+
+    @override_settings(AUTH_TOKEN_CACHE_ALIAS="default")
+    def test_shared_lookup_started_before_invalidation_is_not_cached(self):
+        generation = token_cache.generation()
+        user = User.objects.get(pk=self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+
+        token_cache.set(self.token.key, (user, self.token), generation)
+        token_cache.clear()
+        self.assertIsNone(
+            token_cache.get(self.token.key),
+            msg="Expected no shared entry from before the user was saved, but got one",
+        )
+
+    def test_requests_get_their_own_user(self):
+        self.client.get("/api/reservations/")
+        first, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        second, _ = CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+        self.assertIsNot(
+            first._state,
+            second._state,
+            msg="Expected each request's user to have its own state, but it is shared",
+        )
+        self.assertFalse(
+            first._state.adding,
+            msg="Expected the cached user to be marked as saved, but it is new",
+        )
@@ -0,0 +1,165 @@
+import logging
+import random
+import threading
+import time
+import unittest
+from collections import Counter
+
+from django.test import TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+
+from booking_app.models import Table, Reservation
+from booking_app.services import book_tables
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+THREADS = 12
+BOOKINGS_PER_THREAD = 40
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "row locking needs PostgreSQL"
+)
+class BookConcurrencyStressTest(TransactionTestCase):
+    """
+    Many threads book at once; no table may end up with more reserved
+    seats than it has.
+    """
+
+    def setUp(self):
+        rng = random.Random(42)
+        Table.objects.bulk_create(
+            Table(seats=seats, available_seats=seats)
+            for seats in (rng.randint(4, 10) for _ in range(120))
+        )
+        self.tokens = [
+            Token.objects.create(
+                user=User.objects.create_user(username=f"user{i}", password="pass")
+            ).key
+            for i in range(THREADS)
+        ]
+
+    def _book(self, token, seed, statuses, lock):
+        rng = random.Random(seed)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        try:
+            for _ in range(BOOKINGS_PER_THREAD):
+                response = client.post(
+                    "/api/reservations/book/",
+                    {"number_of_people": rng.randint(1, 6)},
+                )
+                with lock:
+                    statuses[response.status_code] += 1
+        finally:
+            connection.close()
+
+    def test_no_overbooking_under_concurrency(self):
+        statuses = Counter()
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._book, args=(token, i, statuses, lock))
+            for i, token in enumerate(self.tokens)
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        logger.info(
+            "%d bookings in %.2fs (%.1f bookings/s, statuses=%s)",
+            statuses[200],
+            elapsed,
+            statuses[200] / elapsed,
+            dict(statuses),
+        )
+        self.assertEqual(
+            set(statuses) - {200, 400, 409},
+            set(),
+            msg=f"Unexpected statuses {dict(statuses)}",
+        )
+        self.assertEqual(Reservation.objects.count(), statuses[200])
+
+        for table in Table.objects.annotate(reserved=Sum("reservations__number_of_seats")):
+            reserved = table.reserved or 0
+            self.assertLessEqual(
+                reserved,
+                table.seats,
+                msg=f"{table} is overbooked with {reserved} seats",
+            )
+            self.assertEqual(
+                table.available_seats,
+                table.seats - reserved,
+                msg=f"{table} counter is {table.available_seats}, expected {table.seats - reserved}",
+            )
+
+
+@unittest.skipUnless(
+    connection.vendor == "postgresql", "row locking needs PostgreSQL"
+)
+class BatchLockTest(TransactionTestCase):
+    """
+    A batch only locks the tables it books, so single bookings of the other
+    tables aren't held up until it commits.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.small, self.large = Table.objects.bulk_create(
+            [Table(seats=4, available_seats=4), Table(seats=8, available_seats=8)]
+        )
+
+    def in_thread(self, function, *args):
+        # another thread gets its own database connection
+        result = []
+
+        def run():
+            try:
+                result.append(function(*args))
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def try_lock(self, table):
+        try:
+            with transaction.atomic():
+                return (
+                    Table.objects.select_for_update(nowait=True)
+                    .filter(pk=table.pk)
+                    .exists()
+                )
+        except OperationalError:
+            return False
+
+    def test_only_booked_tables_locked(self):
+        with transaction.atomic():
+            [reservation] = book_tables(self.user, [3])
+            self.assertEqual(reservation.table, self.small)
+            self.assertTrue(
+                self.in_thread(self.try_lock, self.large),
+                msg="Expected the table left out of the batch to stay unlocked.",
+            )
+            self.assertFalse(self.in_thread(self.try_lock, self.small))
+
+    def test_locked_table_skipped(self):
+        with transaction.atomic():
+            Table.objects.select_for_update().get(pk=self.small.pk)
+            [reservation] = self.in_thread(book_tables, self.user, [3])
+        self.assertEqual(
+            reservation.table,
+            self.large,
+            msg="Expected the batch to book around the locked table.",
+        )
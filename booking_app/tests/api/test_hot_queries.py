@@ -0,0 +1,262 @@
+import json
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+from booking_app.api.pagination import ReservationCursorPagination
+from booking_app.models import Reservation, Table
+from booking_app.services import create_partitions, invalidate_availability
+from booking_app.services.booking import _held_seats_query
+
+User = get_user_model()
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+class HotQueryTest(TestCase):
+    """
+    Plans and query counts of the hot reservation queries, on enough seeded
+    and analyzed rows for the planner to choose as it would in production.
+    """
+
+    TABLES = 1000
+    USERS = 200
+    RESERVATIONS = 40000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(17)
+        users = User.objects.bulk_create(
+            User(username=f"hot-{index}") for index in range(cls.USERS)
+        )
+        tables = Table.objects.bulk_create(
+            Table(seats=seats, available_seats=seats)
+            for seats in (rng.randint(4, 10) for _ in range(cls.TABLES))
+        )
+
+        # a fifth of the reservations hold a past two-hour slot; slots on the
+        # same table don't overlap, so the capacity trigger lets them through
+        now = timezone.now()
+        first_slot = now - timedelta(days=365)
+        slots = dict.fromkeys(tables, 0)
+        reservations = []
+        for _ in range(cls.RESERVATIONS):
+            table = rng.choice(tables)
+            period = None
+            if rng.random() < 0.2:
+                start = first_slot + timedelta(hours=2 * slots[table])
+                slots[table] += 1
+                period = DateTimeTZRange(start, start + timedelta(hours=2))
+            reservations.append(
+                Reservation(
+                    user=rng.choice(users),
+                    table=table,
+                    number_of_seats=rng.randint(1, 4),
+                    cost=100,
+                    period=period,
+                )
+            )
+        created = Reservation.objects.bulk_create(reservations, batch_size=5000)
+        # the history spreads over about a month
+        create_partitions(now - timedelta(minutes=cls.RESERVATIONS), now)
+
+        with connection.cursor() as cursor:
+            # auto_now_add gave every row the same time; spread them out
+            cursor.execute(
+                "UPDATE booking_app_reservation "
+                "SET created = now() - (id - %s) * interval '1 minute'",
+                [created[0].pk],
+            )
+            # run the deferred capacity checks once here rather than again
+            # at the end of every test
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            for table in ("booking_app_reservation", "booking_app_table", "auth_user"):
+                cursor.execute(f"ANALYZE {table}")
+
+        cls.user = users[0]
+        cls.table = tables[0]
+        cls.token = Token.objects.create(user=cls.user)
+        cls.slot = DateTimeTZRange(first_slot, first_slot + timedelta(hours=2))
+
+    def setUp(self):
+        token_cache.clear()
+        invalidate_availability()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def _explain(self, query, json_format=False):
+        """
+        EXPLAIN a queryset, or a raw `(sql, params)` query.
+        """
+        if not isinstance(query, tuple):
+            return query.explain(format="json") if json_format else query.explain()
+        sql, params = query
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"EXPLAIN {'(FORMAT JSON) ' if json_format else ''}{sql}", params
+            )
+            rows = [row[0] for row in cursor.fetchall()]
+        if json_format:
+            # json columns come back parsed
+            return rows[0] if isinstance(rows[0], str) else json.dumps(rows[0])
+        return "\n".join(rows)
+
+    def assertIndexScan(self, queryset, index=None):
+        """
+        Fail if the plan of `queryset` (or of a raw `(sql, params)` query)
+        reads the reservation table sequentially, or doesn't use `index` when
+        given.
+
+        Returns:
+            list: The nodes of the plan.
+        """
+        plan = json.loads(self._explain(queryset, json_format=True))[0]["Plan"]
+        nodes = list(_plan_nodes(plan))
+        scanned = [
+            node["Relation Name"]
+            for node in nodes
+            if node["Node Type"] == "Seq Scan"
+            and node["Relation Name"].startswith("booking_app_reservation")
+        ]
+        # scanning an empty partition (an upcoming month) is fine
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname FROM pg_class "
+                "WHERE relname = ANY(%s) AND relpages > 0",
+                [scanned],
+            )
+            scanned = [row[0] for row in cursor.fetchall()]
+        self.assertFalse(
+            scanned,
+            msg=f"Expected no sequential scan of reservations, but got:\n"
+            f"{self._explain(queryset)}",
+        )
+        if index is not None:
+            # partitions have their own copies of the index
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT DISTINCT coalesce(pg_partition_root(name::regclass), name::regclass)::text "
+                    "FROM unnest(%s::text[]) AS name",
+                    [[node["Index Name"] for node in nodes if "Index Name" in node]],
+                )
+                indexes = {row[0] for row in cursor.fetchall()}
+            self.assertIn(
+                index,
+                indexes,
+                msg=f"Expected a scan of {index}, but got:\n{self._explain(queryset)}",
+            )
+        return nodes
+
+    def test_user_reservations_plan(self):
+        queryset = (
+            Reservation.objects.filter(user=self.user)
+            .select_related("table")
+            .order_by("-created", "-id")[:50]
+        )
+        nodes = self.assertIndexScan(queryset, "reservation_user_created_idx")
+        # partitions are read newest first until the page is full, instead
+        # of merging all of them
+        self.assertFalse(
+            {"Merge Append", "Sort"} & {node["Node Type"] for node in nodes},
+            msg=f"Expected an ordered scan of the partitions, but got:\n"
+            f"{self._explain(queryset)}",
+        )
+
+    def test_user_reservations_page_plan(self):
+        # a page deep into the history, after the cursor of its 100th row
+        history = Reservation.objects.filter(user=self.user).order_by("-created", "-id")
+        pagination = ReservationCursorPagination()
+        position = pagination._get_position_from_instance(
+            history[100], pagination.ordering
+        )
+        self.assertIndexScan(
+            history.filter(pagination._past(Reservation, position, reverse=False))
+            .select_related("table")[:50],
+            "reservation_user_created_idx",
+        )
+
+    def test_recent_reservations_plan(self):
+        self.assertIndexScan(
+            Reservation.objects.select_related("user", "table").order_by(
+                "-created", "-id"
+            )[:100],
+            "reservation_created_idx",
+        )
+
+    def test_table_seats_plan(self):
+        self.assertIndexScan(
+            Reservation.objects.filter(table=self.table, period__isnull=True)
+            .values("table")
+            .annotate(total=Sum("number_of_seats")),
+            "reservation_table_seats_idx",
+        )
+
+    def test_out_of_sync_plan(self):
+        self.assertIndexScan(Table.objects.out_of_sync(), "reservation_table_seats_idx")
+
+    def test_held_seats_plan(self):
+        self.assertIndexScan(
+            _held_seats_query(connection, self.slot), "reservation_period_gist"
+        )
+        self.assertIndexScan(
+            _held_seats_query(connection, self.slot, [self.table.pk]),
+            "reservation_period_gist",
+        )
+
+    def test_cancel_lookup_plan(self):
+        reservation = Reservation.objects.filter(user=self.user).first()
+        self.assertIndexScan(
+            Reservation.objects.filter(id=reservation.id, user=self.user)
+        )
+
+    def test_list_queries(self):
+        # the token lookup and one page of reservations with their tables
+        with self.assertNumQueries(2):
+            self.client.get("/api/reservations/")
+
+    def test_book_queries(self):
+        # token lookup, savepoint and release included
+        with self.assertNumQueries(8):
+            response = self.client.post(
+                "/api/reservations/book/", {"number_of_people": 3}
+            )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+
+    def test_cancel_queries(self):
+        reservation = Reservation.objects.filter(
+            user=self.user, period__isnull=True
+        ).first()
+        # token lookup, savepoint, the delete, the counter update, release
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/reservations/cancel/", {"reservation_id": reservation.id}
+            )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+
+    def test_availability_and_quote_queries(self):
+        # the token lookup, then the table classes once for both
+        with self.assertNumQueries(2):
+            self.client.get("/api/reservations/availability/")
+            self.client.get("/api/reservations/quote/", {"people": 3})
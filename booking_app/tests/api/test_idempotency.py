@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+from booking_app.models import IdempotencyKey, Reservation, Table
+from booking_app.services import invalidate_availability
+
+User = get_user_model()
+
+
+class IdempotencyKeyTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="pass5678"
+        )
+        Table.objects.create(seats=4)
+        Table.objects.create(seats=6)
+
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.BOOKING_IDEMPOTENCY_CACHE_ALIAS].clear()
+        invalidate_availability()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def book(self, key, people=3, **data):
+        return self.client.post(
+            "/api/reservations/book/",
+            {"number_of_people": people, **data},
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def fill_tables(self):
+        for table in Table.objects.all():
+            Reservation.objects.create(
+                user=self.other_user, table=table, number_of_seats=table.seats, cost=100
+            )
+
+    def test_retry_replays_from_cache(self):
+        # the response is cached once the booking commits
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.book("retry-1")
+        self.assertEqual(
+            first.status_code,
+            200,
+            msg=f"Expected 200, but got {first.status_code}",
+        )
+
+        # the token is cached too, so the replay doesn't query at all
+        with self.assertNumQueries(0):
+            retry = self.book("retry-1")
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(
+            Reservation.objects.filter(user=self.user).count(),
+            1,
+            msg="Expected the retry not to book again.",
+        )
+
+    def test_retry_replays_from_table(self):
+        first = self.book("retry-2")
+        caches[settings.BOOKING_IDEMPOTENCY_CACHE_ALIAS].clear()
+
+        retry = self.book("retry-2")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 1)
+
+    def test_keys_are_per_user(self):
+        self.book("shared")
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.other_user).key}"
+        )
+        response = self.book("shared")
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Reservation.objects.filter(user=self.other_user).count(), 1)
+
+    def test_key_reused_for_another_request(self):
+        self.book("reused", people=3)
+        response = self.book("reused", people=4)
+        self.assertEqual(
+            response.status_code,
+            422,
+            msg=f"Expected 422, but got {response.status_code}",
+        )
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 1)
+
+    def test_errors_are_not_stored(self):
+        self.fill_tables()
+        response = self.book("after-error")
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        Reservation.objects.all().delete()
+        response = self.book("after-error")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected the retry to book, but got {response.status_code}",
+        )
+
+    def test_waitlist_response_replayed_with_location(self):
+        self.fill_tables()
+        first = self.book("waiting", waitlist=True)
+        self.assertEqual(first.status_code, 202)
+
+        retry = self.book("waiting", waitlist=True)
+        self.assertEqual(retry.status_code, 202)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry["Location"], first["Location"])
+
+    def test_expired_key_is_reused(self):
+        self.book("expiring")
+        IdempotencyKey.objects.update(expires=timezone.now() - timedelta(seconds=1))
+        caches[settings.BOOKING_IDEMPOTENCY_CACHE_ALIAS].clear()
+
+        response = self.book("expiring", people=2)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 2)
+
+    def test_key_too_long(self):
+        response = self.book("k" * 256)
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertFalse(Reservation.objects.exists())
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from booking_app.services import get_password_pool
+
+User = get_user_model()
+
+
+class LoginTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, password="pass1234"):
+        return self.client.post(
+            "/api/reservations/login/", {"username": "testuser", "password": password}
+        )
+
+    @override_settings(LOGIN_HASH_WORKERS=1)
+    def test_login_success(self):
+        response = self.login()
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["username"], "testuser")
+        self.assertEqual(response.json()["token"], self.user.auth_token.key)
+
+        # the token now exists: one query for the user, one for the token
+        with self.assertNumQueries(2):
+            self.login()
+
+    def test_login_wrong_password(self):
+        response = self.login(password="wrong")
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+
+    def test_login_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.login()
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+
+    @override_settings(LOGIN_HASH_WORKERS=0, LOGIN_MAX_CONCURRENCY=1, LOGIN_QUEUE_TIMEOUT=0.01)
+    def test_login_busy(self):
+        pool = get_password_pool()
+        pool._slots.acquire()
+        try:
+            response = self.login()
+        finally:
+            pool._slots.release()
+        self.assertEqual(
+            response.status_code,
+            503,
+            msg=f"Expected 503, but got {response.status_code}",
+        )
@@ -0,0 +1,72 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+
+User = get_user_model()
+
+
+class QueryMetricsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_server_timing_counts_queries(self):
+        response = self.client.get("/api/reservations/")
+
+        timing = response.headers.get("Server-Timing", "")
+        match = re.match(r'db;desc="(\d+) queries";dur=[\d.]+, total;dur=[\d.]+$', timing)
+        self.assertIsNotNone(match, msg=f"Unexpected Server-Timing header {timing!r}")
+        # token and user, then the reservations page
+        self.assertEqual(
+            int(match[1]),
+            2,
+            msg=f"Expected 2 queries, but got {match[1]}",
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/reservations/")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        body = response.content.decode()
+        for sample in (
+            'django_request_db_queries_bucket{le="2.0",method="GET",route="reservation-list"}',
+            'django_request_duration_seconds_count{method="GET",route="reservation-list"}',
+            'django_responses_total{method="GET",route="reservation-list",status="200"}',
+        ):
+            self.assertIn(sample, body, msg=f"Expected {sample} in the metrics")
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_metrics_token(self):
+        self.client.credentials()
+        response = self.client.get("/metrics")
+        self.assertEqual(
+            response.status_code,
+            403,
+            msg=f"Expected 403 without the token, but got {response.status_code}",
+        )
+
+        response = self.client.get(
+            "/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200 with the token, but got {response.status_code}",
+        )
@@ -1,9 +1,18 @@
-from django.test import TestCase
+import csv
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import F
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 
-from booking_app.models import Table, Reservation
+from booking_app.api.authentication import token_cache
+from booking_app.models import Table, Reservation, WaitlistEntry
+from booking_app.services import invalidate_availability
 
 User = get_user_model()
 
@@ -32,6 +41,8 @@ class ReservationViewSetTest(TestCase):
         Table.objects.create(seats=10)
 
     def setUp(self):
+        token_cache.clear()
+        invalidate_availability()
         self.client = APIClient()
         self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
 
@@ -263,15 +274,78 @@ class ReservationViewSetTest(TestCase):
             200,
             msg=f"Expected 200, but got {response.status_code}",
         )
+        results = response.json()["results"]
         self.assertEqual(
-            len(response.json()),
+            len(results),
             1,
-            msg=f"Expected 1 reservation, but got {len(response.json())}",
+            msg=f"Expected 1 reservation, but got {len(results)}",
         )
         self.assertEqual(
-            response.json()[0]["id"],
+            results[0]["id"],
             reservation.id,
-            msg=f"Expected reservation ID {reservation.id}, but got {response.json()[0]['id']}",
+            msg=f"Expected reservation ID {reservation.id}, but got {results[0]['id']}",
+        )
+
+    def test_list_user_reservations_paginated(self):
+        table = Table.objects.filter(seats=10).first()
+        reservations = [
+            Reservation.objects.create(
+                user=self.user, table=table, number_of_seats=1, cost=100
+            )
+            for _ in range(5)
+        ]
+
+        seen = []
+        url = "/api/reservations/?page_size=2"
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(
+                response.status_code,
+                200,
+                msg=f"Expected 200, but got {response.status_code}",
+            )
+            seen += [result["id"] for result in response.json()["results"]]
+            url = response.json()["next"]
+        self.assertEqual(
+            seen,
+            [reservation.id for reservation in reversed(reservations)],
+            msg=f"Expected newest reservations first, but got {seen}",
+        )
+
+    def test_list_paginated_with_shared_created(self):
+        table = Table.objects.filter(seats=10).first()
+        reservations = [
+            Reservation.objects.create(
+                user=self.user, table=table, number_of_seats=1, cost=100
+            )
+            for _ in range(5)
+        ]
+        Reservation.objects.update(created=timezone.now())
+
+        pages = []
+        url = "/api/reservations/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            pages.append([result["id"] for result in response.json()["results"]])
+            url = response.json()["next"]
+        self.assertEqual(
+            sum(pages, []),
+            [reservation.id for reservation in reversed(reservations)],
+            msg=f"Expected each reservation once, newest id first, but got {pages}",
+        )
+
+        url = response.json()["previous"]
+        back = []
+        while url:
+            response = self.client.get(url)
+            back.insert(0, [result["id"] for result in response.json()["results"]])
+            url = response.json()["previous"]
+        self.assertEqual(
+            back,
+            pages[:-1],
+            msg=f"Expected the earlier pages back, but got {back}",
         )
 
     def test_cancel_reservation_success(self):
@@ -351,3 +425,508 @@ class ReservationViewSetTest(TestCase):
             401,
             msg=f"Expected 401, but got {response.status_code}",
         )
+
+    def test_book_and_cancel_update_available_seats(self):
+        response = self.client.post("/api/reservations/book/", {"number_of_people": 3})
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        table = Table.objects.get(id=response.json()["table"]["id"])
+        self.assertEqual(
+            table.available_seats,
+            table.seats - response.json()["number_of_seats"],
+            msg=f"Expected available seats to drop, but got {table.available_seats}",
+        )
+
+        response = self.client.post(
+            "/api/reservations/cancel/", {"reservation_id": response.json()["id"]}
+        )
+        table.refresh_from_db()
+        self.assertEqual(
+            table.available_seats,
+            table.seats,
+            msg=f"Expected seats to be released, but got {table.available_seats}",
+        )
+
+    def test_cancel_reservations_bulk(self):
+        tables = list(Table.objects.order_by("id")[:2])
+        now = timezone.now()
+        reservations = [
+            Reservation.objects.create(
+                user=self.user, table=tables[0], number_of_seats=2, cost=200
+            ),
+            Reservation.objects.create(
+                user=self.user, table=tables[0], number_of_seats=1, cost=100
+            ),
+            Reservation.objects.create(
+                user=self.user,
+                table=tables[1],
+                number_of_seats=3,
+                cost=300,
+                period=DateTimeTZRange(now, now + timedelta(hours=2)),
+            ),
+        ]
+        ids = [reservation.id for reservation in reservations]
+
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/reservations/cancel/", {"reservation_id": ids}, format="json"
+            )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"reservation_id": id, "status": "cancelled"} for id in ids],
+        )
+        self.assertFalse(Reservation.objects.filter(id__in=ids).exists())
+        # the time slot never held counter seats
+        for table in Table.objects.filter(id__in=[table.id for table in tables]):
+            self.assertEqual(
+                table.available_seats,
+                table.seats,
+                msg=f"Expected {table} seats to be released, but got {table.available_seats}",
+            )
+
+    def test_cancel_reservations_partial(self):
+        table = Table.objects.first()
+        own = Reservation.objects.create(
+            user=self.user, table=table, number_of_seats=2, cost=200
+        )
+        other = Reservation.objects.create(
+            user=self.other_user, table=table, number_of_seats=2, cost=200
+        )
+
+        response = self.client.post(
+            "/api/reservations/cancel/",
+            {"reservation_id": [own.id, other.id, 999]},
+            format="json",
+        )
+        self.assertEqual(
+            response.status_code,
+            207,
+            msg=f"Expected 207, but got {response.status_code}",
+        )
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["cancelled", "not_found", "not_found"],
+        )
+        self.assertTrue(
+            Reservation.objects.filter(id=other.id).exists(),
+            msg="Expected the other user's reservation to be kept.",
+        )
+        table.refresh_from_db()
+        self.assertEqual(
+            table.available_seats,
+            table.seats - 2,
+            msg=f"Expected only the own seats to be released, but got {table.available_seats}",
+        )
+
+    def test_cancel_reservations_again(self):
+        table = Table.objects.first()
+        reservation = Reservation.objects.create(
+            user=self.user, table=table, number_of_seats=2, cost=200
+        )
+        data = {"reservation_id": [reservation.id]}
+
+        self.client.post("/api/reservations/cancel/", data, format="json")
+        response = self.client.post("/api/reservations/cancel/", data, format="json")
+        self.assertEqual(
+            response.json()["results"],
+            [{"reservation_id": reservation.id, "status": "not_found"}],
+        )
+        table.refresh_from_db()
+        self.assertEqual(
+            table.available_seats,
+            table.seats,
+            msg=f"Expected seats to be released once, but got {table.available_seats}",
+        )
+
+    def test_cancel_reservations_invalid(self):
+        for reservation_id in (["abc"], [0], {"id": 1}, [1] * 501):
+            response = self.client.post(
+                "/api/reservations/cancel/",
+                {"reservation_id": reservation_id},
+                format="json",
+            )
+            self.assertEqual(
+                response.status_code,
+                400,
+                msg=f"Expected 400 for {reservation_id!r}, but got {response.status_code}",
+            )
+            self.assertIn("reservation_id", response.json())
+
+    @override_settings(BOOKING_CANCEL_MAX_SIZE=2)
+    def test_cancel_reservations_max_size(self):
+        table = Table.objects.first()
+        reservations = [
+            Reservation.objects.create(
+                user=self.user, table=table, number_of_seats=1, cost=100
+            )
+            for _ in range(3)
+        ]
+
+        response = self.client.post(
+            "/api/reservations/cancel/",
+            {"reservation_id": [reservation.id for reservation in reservations]},
+            format="json",
+        )
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertEqual(Reservation.objects.count(), 3)
+
+    def test_book_joins_waitlist(self):
+        for table in Table.objects.all():
+            Reservation.objects.create(
+                user=self.other_user, table=table, number_of_seats=table.seats, cost=100
+            )
+
+        response = self.client.post(
+            "/api/reservations/book/", {"number_of_people": 3, "waitlist": True}
+        )
+        self.assertEqual(
+            response.status_code,
+            202,
+            msg=f"Expected 202, but got {response.status_code}",
+        )
+        entry = response.json()
+        self.assertEqual(entry["status"], "waiting")
+        self.assertIsNone(entry["reservation_id"])
+
+        retry = self.client.post(
+            "/api/reservations/book/", {"number_of_people": 3, "waitlist": True}
+        )
+        self.assertEqual(
+            retry.json()["id"],
+            entry["id"],
+            msg="Expected a retry to return the same entry.",
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(response["Location"])
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response.json(), entry)
+
+    def test_book_without_waitlist_flag(self):
+        for table in Table.objects.all():
+            Reservation.objects.create(
+                user=self.other_user, table=table, number_of_seats=table.seats, cost=100
+            )
+
+        response = self.client.post("/api/reservations/book/", {"number_of_people": 3})
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_waitlist_time_slot_invalid(self):
+        response = self.client.post(
+            "/api/reservations/book/",
+            {
+                "number_of_people": 3,
+                "waitlist": True,
+                "start": (timezone.now() + timedelta(hours=1)).isoformat(),
+            },
+        )
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertIn("waitlist", response.json())
+
+    def test_waitlist_status_of_other_user(self):
+        entry = WaitlistEntry.objects.create(
+            user=self.other_user,
+            number_of_people=2,
+            expires=timezone.now() + timedelta(hours=1),
+        )
+        response = self.client.get(f"/api/reservations/waitlist/{entry.id}/")
+        self.assertEqual(
+            response.status_code,
+            404,
+            msg=f"Expected 404, but got {response.status_code}",
+        )
+
+    def test_book_batch_success(self):
+        response = self.client.post(
+            "/api/reservations/book-batch/",
+            {"number_of_people": [3, 5, 10]},
+            format="json",
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["booked", "booked", "booked"],
+        )
+        self.assertEqual(
+            [result["reservation"]["cost"] for result in results],
+            [300, 400, 900],
+        )
+        for result in results:
+            table = Table.objects.get(id=result["reservation"]["table"]["id"])
+            self.assertEqual(
+                table.available_seats,
+                table.seats - result["reservation"]["number_of_seats"],
+                msg=f"Expected {table} counter to drop, but got {table.available_seats}",
+            )
+
+    @override_settings(BOOKING_BATCH_MAX_SIZE=2)
+    def test_book_batch_max_size(self):
+        response = self.client.post(
+            "/api/reservations/book-batch/",
+            {"number_of_people": [3, 5, 10]},
+            format="json",
+        )
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+
+    def test_book_batch_partial_failure(self):
+        response = self.client.post(
+            "/api/reservations/book-batch/",
+            {"number_of_people": [10, 10, 10, "abc", 2]},
+            format="json",
+        )
+        self.assertEqual(
+            response.status_code,
+            207,
+            msg=f"Expected 207, but got {response.status_code}",
+        )
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["booked", "booked", "failed", "invalid", "booked"],
+        )
+        self.assertEqual(
+            results[2]["detail"],
+            "No suitable table available.",
+            msg=f"Expected 'No suitable table available.', but got {results[2]['detail']}",
+        )
+        self.assertIn("number_of_people", results[3]["errors"])
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 3)
+
+    def test_book_time_slots(self):
+        start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        dinner = DateTimeTZRange(start, start + timedelta(hours=2))
+        for table in Table.objects.all():
+            Reservation.objects.create(
+                user=self.other_user,
+                table=table,
+                number_of_seats=table.seats,
+                cost=100,
+                period=dinner,
+            )
+        self.assertFalse(
+            Table.objects.exclude(available_seats=F("seats")).exists(),
+            msg="Expected time-slotted reservations to leave the counters alone.",
+        )
+
+        response = self.client.post(
+            "/api/reservations/book/",
+            {"number_of_people": 3, "start": start + timedelta(hours=1)},
+        )
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400 for an overlapping slot, but got {response.status_code}",
+        )
+        response = self.client.post(
+            "/api/reservations/book/", {"number_of_people": 3}
+        )
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400 for an open-ended booking, but got {response.status_code}",
+        )
+
+        response = self.client.post(
+            "/api/reservations/book/",
+            {"number_of_people": 3, "start": start + timedelta(hours=2)},
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200 after the slot, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["cost"], 300)
+        self.assertEqual(
+            response.json()["end"],
+            (start + timedelta(hours=4)).isoformat().replace("+00:00", "Z"),
+        )
+
+    def test_book_time_slot_invalid(self):
+        start = timezone.now() + timedelta(days=1)
+        for data in (
+            {"number_of_people": 3, "end": start},
+            {"number_of_people": 3, "start": start, "end": start},
+            {"number_of_people": 3, "start": start - timedelta(days=2)},
+            {"number_of_people": 3, "start": start + timedelta(days=365)},
+        ):
+            response = self.client.post("/api/reservations/book/", data)
+            self.assertEqual(
+                response.status_code,
+                400,
+                msg=f"Expected 400 for {data}, but got {response.status_code}",
+            )
+
+    def test_export_ndjson(self):
+        table = Table.objects.first()
+        own = Reservation.objects.create(
+            user=self.user, table=table, number_of_seats=2, cost=200
+        )
+        Reservation.objects.create(
+            user=self.other_user, table=table, number_of_seats=2, cost=200
+        )
+
+        response = self.client.get("/api/reservations/export/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["id"] for line in lines],
+            [own.id],
+            msg=f"Expected only the user's reservation, but got {lines}",
+        )
+        self.assertEqual(json.loads(lines[0])["user"], "testuser")
+
+    def test_export_csv_staff(self):
+        table = Table.objects.first()
+        for user in (self.user, self.other_user):
+            Reservation.objects.create(user=user, table=table, number_of_seats=2, cost=200)
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get("/api/reservations/export/?export_format=csv")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ["id", "user", "table"])
+        self.assertEqual(
+            len(rows),
+            3,
+            msg=f"Expected a header and 2 reservations, but got {len(rows)} rows",
+        )
+
+        response = self.client.get("/api/reservations/export/?export_format=xml")
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+
+    def test_availability(self):
+        response = self.client.get("/api/reservations/availability/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(
+            response.json()[-1],
+            {"seats": 10, "tables": 2, "available_seats": 20, "largest_party": 10},
+            msg=f"Unexpected availability {response.json()}",
+        )
+        self.assertEqual(
+            [size["seats"] for size in response.json()],
+            [4, 5, 6, 7, 8, 9, 10],
+            msg=f"Expected one entry per table size, but got {response.json()}",
+        )
+
+        # token and summary both come from the cache
+        with self.assertNumQueries(0):
+            self.client.get("/api/reservations/availability/")
+
+    def test_availability_follows_bookings(self):
+        response = self.client.get("/api/reservations/availability/")
+        free = sum(size["available_seats"] for size in response.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booked = self.client.post(
+                "/api/reservations/book/", {"number_of_people": 4}
+            ).json()
+
+        response = self.client.get("/api/reservations/availability/")
+        remaining = sum(size["available_seats"] for size in response.json())
+        self.assertEqual(
+            remaining,
+            free - booked["number_of_seats"],
+            msg=f"Expected {free - booked['number_of_seats']} free seats, but got {remaining}",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/reservations/cancel/", {"reservation_id": booked["id"]})
+
+        response = self.client.get("/api/reservations/availability/")
+        remaining = sum(size["available_seats"] for size in response.json())
+        self.assertEqual(
+            remaining,
+            free,
+            msg=f"Expected {free} free seats after cancelling, but got {remaining}",
+        )
+
+    def test_quote(self):
+        response = self.client.get("/api/reservations/quote/", {"people": 3})
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(
+            response.json(),
+            {"people": 3, "cost": 300, "number_of_seats": 4, "table_seats": 4},
+            msg=f"Unexpected quote {response.json()}",
+        )
+
+        # token and table classes both come from the cache
+        with self.assertNumQueries(0):
+            self.client.get("/api/reservations/quote/", {"people": 5})
+
+        booked = self.client.post("/api/reservations/book/", {"number_of_people": 3})
+        self.assertEqual(
+            (booked.json()["cost"], booked.json()["table"]["seats"]),
+            (300, 4),
+            msg=f"Expected the quoted table and price, but got {booked.json()}",
+        )
+
+    def test_quote_no_table_available(self):
+        response = self.client.get("/api/reservations/quote/", {"people": 11})
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+
+        response = self.client.get("/api/reservations/quote/", {"people": 0})
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
@@ -0,0 +1,166 @@
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from rest_framework.authtoken.models import Token
+
+from booking_app.models import Table, Reservation
+
+User = get_user_model()
+
+
+class AsyncReservationViewSetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="pass5678"
+        )
+        cls.table = Table.objects.create(seats=4)
+        Table.objects.create(seats=6)
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+
+    async def test_book_and_cancel(self):
+        response = await self.client.post(
+            "/api/async/reservations/book/",
+            {"number_of_people": 4},
+            headers=self.headers,
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["cost"], 300)
+        table = await Table.objects.aget(id=response.json()["table"]["id"])
+        self.assertEqual(
+            table.available_seats,
+            0,
+            msg=f"Expected the table to be full, but got {table.available_seats}",
+        )
+
+        response = await self.client.post(
+            "/api/async/reservations/cancel/",
+            {"reservation_id": response.json()["id"]},
+            headers=self.headers,
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        await table.arefresh_from_db()
+        self.assertEqual(table.available_seats, 4)
+
+    async def test_cancel_other_users_reservation(self):
+        reservation = await Reservation.objects.acreate(
+            user=self.other_user, table=self.table, number_of_seats=2, cost=200
+        )
+
+        response = await self.client.post(
+            "/api/async/reservations/cancel/",
+            {"reservation_id": reservation.id},
+            headers=self.headers,
+        )
+        self.assertEqual(
+            response.status_code,
+            404,
+            msg=f"Expected 404, but got {response.status_code}",
+        )
+
+    async def test_cancel_reservations_bulk(self):
+        own = await Reservation.objects.acreate(
+            user=self.user, table=self.table, number_of_seats=2, cost=200
+        )
+        other = await Reservation.objects.acreate(
+            user=self.other_user, table=self.table, number_of_seats=2, cost=200
+        )
+
+        response = await self.client.post(
+            "/api/async/reservations/cancel/",
+            {"reservation_id": [own.id, other.id]},
+            headers=self.headers,
+            content_type="application/json",
+        )
+        self.assertEqual(
+            response.status_code,
+            207,
+            msg=f"Expected 207, but got {response.status_code}",
+        )
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["cancelled", "not_found"],
+        )
+
+    async def test_book_joins_waitlist(self):
+        async for table in Table.objects.all():
+            await Reservation.objects.acreate(
+                user=self.other_user, table=table, number_of_seats=table.seats, cost=100
+            )
+
+        response = await self.client.post(
+            "/api/async/reservations/book/",
+            {"number_of_people": 4, "waitlist": True},
+            headers=self.headers,
+        )
+        self.assertEqual(
+            response.status_code,
+            202,
+            msg=f"Expected 202, but got {response.status_code}",
+        )
+        response = await self.client.get(response["Location"], headers=self.headers)
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["status"], "waiting")
+
+    async def test_book_with_idempotency_key(self):
+        headers = {**self.headers, "Idempotency-Key": "async-retry"}
+        first = await self.client.post(
+            "/api/async/reservations/book/", {"number_of_people": 2}, headers=headers
+        )
+        retry = await self.client.post(
+            "/api/async/reservations/book/", {"number_of_people": 2}, headers=headers
+        )
+        self.assertEqual(
+            first.status_code,
+            200,
+            msg=f"Expected 200, but got {first.status_code}",
+        )
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(await Reservation.objects.filter(user=self.user).acount(), 1)
+
+    async def test_list_user_reservations(self):
+        reservation = await Reservation.objects.acreate(
+            user=self.user, table=self.table, number_of_seats=2, cost=200
+        )
+        await Reservation.objects.acreate(
+            user=self.other_user, table=self.table, number_of_seats=2, cost=200
+        )
+
+        response = await self.client.get(
+            "/api/async/reservations/", headers=self.headers
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(
+            [result["id"] for result in response.json()["results"]],
+            [reservation.id],
+        )
+
+    async def test_authentication_required(self):
+        response = await self.client.get("/api/async/reservations/")
+        self.assertEqual(
+            response.status_code,
+            401,
+            msg=f"Expected 401, but got {response.status_code}",
+        )
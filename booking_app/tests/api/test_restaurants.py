@@ -0,0 +1,177 @@
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+from booking_app.models import Reservation, Restaurant, Table, WaitlistEntry
+from booking_app.routers import current_restaurant
+from booking_app.services import forget_restaurant, invalidate_availability
+
+User = get_user_model()
+
+
+class RestaurantRoutesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="pass5678"
+        )
+        cls.north = Restaurant.objects.create(name="North", slug="north")
+        cls.south = Restaurant.objects.create(name="South", slug="south")
+        cls.north_table = Table.objects.create(restaurant=cls.north, seats=4)
+        cls.south_table = Table.objects.create(restaurant=cls.south, seats=6)
+
+    def setUp(self):
+        token_cache.clear()
+        for slug in ("north", "south"):
+            forget_restaurant(slug)
+        invalidate_availability()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def url(self, restaurant, action):
+        return f"/api/reservations/restaurants/{restaurant}/{action}"
+
+    def fill(self, table):
+        return Reservation.objects.create(
+            user=self.other_user, table=table, number_of_seats=table.seats, cost=100
+        )
+
+    def test_book_at_restaurant(self):
+        response = self.client.post(self.url("south", "book/"), {"number_of_people": 3})
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(
+            response.json()["table"]["id"],
+            self.south_table.pk,
+            msg="Expected a table of the restaurant booked.",
+        )
+        self.assertIsNone(current_restaurant(), msg="Expected the restaurant reset.")
+
+    def test_tables_of_other_restaurants_not_booked(self):
+        self.fill(self.north_table)
+        response = self.client.post(self.url("north", "book/"), {"number_of_people": 3})
+        self.assertEqual(
+            response.status_code,
+            400,
+            msg=f"Expected 400, but got {response.status_code}",
+        )
+        self.assertFalse(Reservation.objects.filter(user=self.user).exists())
+
+    def test_unknown_restaurant(self):
+        response = self.client.post(self.url("east", "book/"), {"number_of_people": 3})
+        self.assertEqual(
+            response.status_code,
+            404,
+            msg=f"Expected 404, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["detail"], "Restaurant not found.")
+
+    def test_list_scoped_to_restaurant(self):
+        north = Reservation.objects.create(
+            user=self.user, table=self.north_table, number_of_seats=2, cost=200
+        )
+        Reservation.objects.create(
+            user=self.user, table=self.south_table, number_of_seats=2, cost=200
+        )
+        response = self.client.get(self.url("north", ""))
+        self.assertEqual(
+            [reservation["id"] for reservation in response.json()["results"]],
+            [north.pk],
+            msg="Expected only the reservations of the restaurant.",
+        )
+
+    def test_cancel_scoped_to_restaurant(self):
+        reservation = Reservation.objects.create(
+            user=self.user, table=self.south_table, number_of_seats=2, cost=200
+        )
+        response = self.client.post(
+            self.url("north", "cancel/"), {"reservation_id": reservation.pk}
+        )
+        self.assertEqual(
+            response.status_code,
+            404,
+            msg=f"Expected 404, but got {response.status_code}",
+        )
+        self.assertTrue(Reservation.objects.filter(pk=reservation.pk).exists())
+
+        response = self.client.post(
+            self.url("south", "cancel/"), {"reservation_id": reservation.pk}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_availability_per_restaurant(self):
+        north = self.client.get(self.url("north", "availability/")).json()
+        south = self.client.get(self.url("south", "availability/")).json()
+        self.assertEqual([size["seats"] for size in north], [4])
+        self.assertEqual(
+            [size["seats"] for size in south],
+            [6],
+            msg="Expected the cached availability of the other restaurant not reused.",
+        )
+
+    def test_waitlist_under_restaurant(self):
+        self.fill(self.north_table)
+        response = self.client.post(
+            self.url("north", "book/"), {"number_of_people": 3, "waitlist": True}
+        )
+        self.assertEqual(
+            response.status_code,
+            202,
+            msg=f"Expected 202, but got {response.status_code}",
+        )
+        entry = WaitlistEntry.objects.get(pk=response.json()["id"])
+        self.assertEqual(entry.restaurant, self.north)
+        self.assertTrue(
+            response["Location"].endswith(self.url("north", f"waitlist/{entry.pk}/")),
+            msg=f"Expected the status URL of the restaurant, but got {response['Location']}",
+        )
+
+        response = self.client.get(self.url("south", f"waitlist/{entry.pk}/"))
+        self.assertEqual(
+            response.status_code,
+            404,
+            msg=f"Expected 404 at another restaurant, but got {response.status_code}",
+        )
+
+    def test_idempotency_key_reused_at_another_restaurant(self):
+        headers = {"HTTP_IDEMPOTENCY_KEY": "same-key"}
+        self.client.post(self.url("north", "book/"), {"number_of_people": 3}, **headers)
+        response = self.client.post(
+            self.url("south", "book/"), {"number_of_people": 3}, **headers
+        )
+        self.assertEqual(
+            response.status_code,
+            422,
+            msg=f"Expected 422, but got {response.status_code}",
+        )
+
+    @override_settings(BOOKING_DEFAULT_RESTAURANT="south")
+    def test_default_restaurant(self):
+        response = self.client.post("/api/reservations/book/", {"number_of_people": 3})
+        self.assertEqual(
+            response.json()["table"]["id"],
+            self.south_table.pk,
+            msg="Expected the default restaurant served without one in the URL.",
+        )
+
+    async def test_async_book_at_restaurant(self):
+        response = await AsyncClient().post(
+            "/api/async/reservations/restaurants/north/book/",
+            {"number_of_people": 3},
+            headers={"Authorization": f"Token {self.token.key}"},
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["table"]["id"], self.north_table.pk)
+        self.assertIsNone(current_restaurant())
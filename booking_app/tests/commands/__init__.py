@@ -0,0 +1,6 @@
+from .test_reconcile_available_seats import ReconcileAvailableSeatsCommandTest
+from .test_loadbench import LoadbenchCommandTest
+from .test_seed_bookings import SeedBookingsCommandTest, DatasetTest
+from .test_reservation_partitions import ReservationPartitionsCommandTest
+from .test_process_waitlist import ProcessWaitlistCommandTest
+from .test_purge_idempotency_keys import PurgeIdempotencyKeysCommandTest
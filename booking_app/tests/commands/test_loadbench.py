@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+
+from booking_app.models import Table
+
+User = get_user_model()
+
+
+@override_settings(ALLOWED_HOSTS=["localhost"])
+class LoadbenchCommandTest(TestCase):
+
+    def setUp(self):
+        # like the test client, keep the test transaction's connection open
+        # across the in-process requests
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def run_loadbench(self, *args):
+        out = StringIO()
+        call_command(
+            "loadbench",
+            "--in-process",
+            "--tables",
+            "5",
+            "--users",
+            "3",
+            "--concurrency",
+            "2",
+            "--duration",
+            "0.5",
+            *args,
+            stdout=out,
+        )
+        return json.loads(out.getvalue())
+
+    def test_report(self):
+        report = self.run_loadbench("--mix", "book=1,cancel=1,list=1")
+
+        total = report["total"]
+        self.assertGreater(
+            total["requests"], 0, msg=f"Expected requests, but got {total}"
+        )
+        self.assertLessEqual(
+            total["p50_ms"],
+            total["p99_ms"],
+            msg=f"Expected p50 <= p99, but got {total}",
+        )
+        for operation in ("book", "list"):
+            stats = report["operations"][operation]
+            self.assertGreater(
+                stats["queries_per_request"],
+                0,
+                msg=f"Expected a query count for {operation}, but got {stats}",
+            )
+        self.assertIn("200", report["operations"]["list"]["status"])
+        self.assertEqual(report["config"]["mix"], {"book": 1, "cancel": 1, "list": 1})
+
+    def test_seeded_data_removed(self):
+        self.run_loadbench("--mix", "book=1")
+
+        self.assertFalse(
+            User.objects.filter(username__startswith="loadbench-").exists(),
+            msg="Expected the seeded users to be deleted",
+        )
+        self.assertEqual(
+            Table.objects.count(),
+            0,
+            msg=f"Expected the seeded tables to be deleted, but got {Table.objects.count()}",
+        )
+
+    def test_invalid_mix(self):
+        with self.assertRaises(CommandError):
+            self.run_loadbench("--mix", "book=1,refund=1")
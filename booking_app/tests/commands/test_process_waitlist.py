@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from booking_app.models import Table, WaitlistEntry
+from booking_app.services import join_waitlist
+
+User = get_user_model()
+
+
+class ProcessWaitlistCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        Table.objects.create(seats=4)
+
+    def test_once_books_waiting_entries(self):
+        entry = join_waitlist(self.user, 4)
+
+        out = StringIO()
+        call_command("process_waitlist", "--once", stdout=out)
+
+        entry.refresh_from_db()
+        self.assertEqual(
+            entry.status,
+            WaitlistEntry.Status.BOOKED,
+            msg=f"Expected the entry to be booked, but got {entry.status}",
+        )
+        self.assertIn("Booked 1 waitlist entry(ies), expired 0.", out.getvalue())
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            call_command("process_waitlist", "--once", "--batch-size", "0")
@@ -0,0 +1,37 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from booking_app.models import IdempotencyKey
+
+User = get_user_model()
+
+
+class PurgeIdempotencyKeysCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="testuser", password="pass1234")
+        now = timezone.now()
+        for index, expires in enumerate((-2, -1, 1)):
+            IdempotencyKey.objects.create(
+                user=user,
+                key=f"key-{index}",
+                fingerprint="",
+                expires=now + timedelta(hours=expires),
+            )
+
+    def test_purge_expired_keys(self):
+        out = StringIO()
+        call_command("purge_idempotency_keys", "--batch-size", "1", stdout=out)
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["key-2"],
+            msg="Expected only the live key to be kept.",
+        )
+        self.assertIn("Deleted 2 expired key(s).", out.getvalue())
@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from booking_app.models import Table, Reservation
+
+User = get_user_model()
+
+
+class ReconcileAvailableSeatsCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.table = Table.objects.create(seats=6)
+        Reservation.objects.create(
+            user=cls.user, table=cls.table, number_of_seats=4, cost=300
+        )
+
+    def test_counter_follows_reservations(self):
+        self.table.refresh_from_db()
+        self.assertEqual(
+            self.table.available_seats,
+            2,
+            msg=f"Expected 2 available seats, but got {self.table.available_seats}",
+        )
+
+    def test_reconcile_fixes_drift(self):
+        Table.objects.filter(pk=self.table.pk).update(available_seats=6)
+
+        out = StringIO()
+        call_command("reconcile_available_seats", stdout=out)
+
+        self.table.refresh_from_db()
+        self.assertEqual(
+            self.table.available_seats,
+            2,
+            msg=f"Expected 2 available seats, but got {self.table.available_seats}",
+        )
+        self.assertIn("Reconciled 1 table(s).", out.getvalue())
+
+    def test_reconcile_dry_run_leaves_counter(self):
+        Table.objects.filter(pk=self.table.pk).update(available_seats=6)
+
+        out = StringIO()
+        call_command("reconcile_available_seats", "--dry-run", stdout=out)
+
+        self.table.refresh_from_db()
+        self.assertEqual(
+            self.table.available_seats,
+            6,
+            msg=f"Expected counter to stay at 6, but got {self.table.available_seats}",
+        )
+        self.assertIn("Found 1 table(s).", out.getvalue())
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+from booking_app.models import Reservation, Table
+from booking_app.services import (
+    add_months,
+    attached_partitions,
+    create_partitions,
+    month_start,
+    partition_name,
+    PartitionMissing,
+)
+
+User = get_user_model()
+
+
+@override_settings(
+    BOOKING_RESERVATION_PARTITIONS_AHEAD=2,
+    BOOKING_RESERVATION_RETENTION_MONTHS=6,
+)
+class ReservationPartitionsCommandTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.table = Table.objects.create(seats=6)
+        cls.current = month_start(timezone.now())
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("reservation_partitions", *args, stdout=out)
+        return out.getvalue()
+
+    def old_reservation(self, months, period=None):
+        """
+        A reservation created `months` months before the current one.
+        """
+        month = add_months(self.current, -months)
+        create_partitions(month, month)
+        reservation = Reservation.objects.create(
+            user=self.user, table=self.table, number_of_seats=2, cost=100, period=period
+        )
+        created = timezone.now().replace(year=month.year, month=month.month, day=15)
+        Reservation.objects.filter(pk=reservation.pk).update(created=created)
+        # a partition with pending capacity checks can't be detached
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        return partition_name(month)
+
+    def archived(self, schema="archive"):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tablename FROM pg_tables WHERE schemaname = %s", [schema]
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_creates_upcoming_partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {partition_name(add_months(self.current, 1))}")
+
+        output = self.run_command()
+
+        months = {month for month, _ in attached_partitions()}
+        for ahead in range(3):
+            self.assertIn(
+                add_months(self.current, ahead),
+                months,
+                msg=f"Expected a partition {ahead} month(s) ahead",
+            )
+        self.assertIn("Created 1 partition(s)", output)
+
+    def test_reservation_lands_in_its_month(self):
+        reservation = Reservation.objects.create(
+            user=self.user, table=self.table, number_of_seats=2, cost=100
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text FROM booking_app_reservation "
+                "WHERE id = %s",
+                [reservation.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], partition_name(self.current))
+
+    def test_booking_without_partition(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {partition_name(self.current)}")
+        token_cache.clear()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+
+        response = client.post("/api/reservations/book/", {"number_of_people": 2})
+        self.assertEqual(
+            response.status_code,
+            503,
+            msg=f"Expected 503 without a partition, but got {response.status_code}",
+        )
+        self.assertEqual(response.json()["detail"], PartitionMissing.default_detail)
+
+    def test_archives_past_months(self):
+        start = timezone.now() - timedelta(days=300)
+        name = self.old_reservation(
+            9, period=DateTimeTZRange(start, start + timedelta(hours=2))
+        )
+
+        output = self.run_command("--dry-run")
+        self.assertIn(f"Would archive {name}", output)
+        self.assertNotIn(name, self.archived())
+
+        output = self.run_command()
+
+        self.assertIn(name, self.archived())
+        self.assertNotIn(name, dict(map(reversed, attached_partitions())))
+        self.assertEqual(Reservation.objects.count(), 0)
+        self.assertIn("archived 1", output)
+
+    def test_keeps_months_with_live_reservations(self):
+        name = self.old_reservation(9)
+
+        output = self.run_command()
+
+        self.assertIn(f"Kept {name}: 1 reservation(s) still hold seats.", output)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertNotIn(name, self.archived())
+
+    def test_drop(self):
+        start = timezone.now() - timedelta(days=300)
+        name = self.old_reservation(
+            9, period=DateTimeTZRange(start, start + timedelta(hours=2))
+        )
+
+        self.run_command("--drop")
+
+        self.assertNotIn(name, self.archived())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            self.assertIsNone(cursor.fetchone()[0])
@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from booking_app.benchmarks.dataset import Dataset, parse_weights
+from booking_app.models import Reservation, Table
+from booking_app.services import price
+
+User = get_user_model()
+
+
+class SeedBookingsCommandTest(TestCase):
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command(
+            "seed_bookings",
+            "--tables=40",
+            "--users=25",
+            "--reservations=3000",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_loads_consistent_rows(self):
+        output = self.seed()
+
+        self.assertIn("Seeded 40 table(s), 25 user(s) and 3000 reservation(s)", output)
+        self.assertEqual(Table.objects.count(), 40)
+        self.assertEqual(User.objects.filter(auth_token__isnull=False).count(), 25)
+        self.assertEqual(Reservation.objects.count(), 3000)
+        self.assertFalse(
+            Table.objects.out_of_sync().exists(),
+            msg="Expected available_seats to match the open-ended reservations",
+        )
+        self.assertFalse(User.objects.first().has_usable_password())
+
+        for reservation in Reservation.objects.select_related("table")[:200]:
+            self.assertLessEqual(
+                reservation.number_of_seats,
+                reservation.table.seats,
+                msg=f"Expected {reservation!r} to fit at its table",
+            )
+
+        # have the capacity trigger check every row now
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE booking_app_reservation SET period = period")
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+
+    def test_ids_follow_existing_rows(self):
+        table = Table.objects.create(seats=4)
+        self.seed("--reservations=0")
+        self.assertEqual(
+            Table.objects.order_by("pk").values_list("pk", flat=True)[1], table.pk + 1
+        )
+        self.assertEqual(Table.objects.create(seats=4).pk, table.pk + 41)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(CommandError):
+            self.seed("--party-sizes=0=1")
+        with self.assertRaises(CommandError):
+            self.seed("--party-sizes=12=1", "--table-sizes=4=1")
+
+
+class DatasetTest(TestCase):
+
+    def dataset(self, seed):
+        return Dataset(
+            tables=30,
+            users=10,
+            reservations=2000,
+            table_sizes=parse_weights("4=1,6=1,10=1"),
+            party_sizes=parse_weights("2=3,5=1"),
+            seed=seed,
+            now=datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc),
+        )
+
+    def test_same_seed_same_rows(self):
+        first, second = self.dataset(3), self.dataset(3)
+        self.assertEqual(list(first.table_lines()), list(second.table_lines()))
+        self.assertEqual(list(first.token_lines()), list(second.token_lines()))
+        self.assertEqual(
+            list(first.reservation_lines()), list(second.reservation_lines())
+        )
+        self.assertNotEqual(
+            list(first.reservation_lines()), list(self.dataset(4).reservation_lines())
+        )
+
+    def test_party_sizes_and_prices(self):
+        dataset = self.dataset(3)
+        for line in dataset.reservation_lines():
+            _, _, _, table_id, seats, cost, period = line.rstrip("\n").split("\t")
+            index = int(table_id) - dataset.first_table_id
+            self.assertIn(int(seats), (2, 6), msg=f"Unexpected party in {line!r}")
+            table_seats = dataset.table_seats[index]
+            if period == "\\N":
+                continue
+            self.assertLess(period, '["2026-01-01T12', msg="Expected a past slot")
+            self.assertIn(
+                (int(cost), int(seats)),
+                [
+                    price(people, table_seats, dataset.available_seats[index])
+                    for people in (2, 5)
+                ],
+            )
@@ -0,0 +1 @@
+from .test_reservation import ReservationCapacityConstraintTest
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.test import TestCase
+from django.utils import timezone
+
+from booking_app.models import Table, Reservation
+from booking_app.services import book_table, held_seats
+
+User = get_user_model()
+
+
+class ReservationCapacityConstraintTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.table = Table.objects.create(seats=6)
+        start = timezone.now() + timedelta(days=1)
+        cls.dinner = DateTimeTZRange(start, start + timedelta(hours=2))
+        cls.late = DateTimeTZRange(start + timedelta(hours=2), start + timedelta(hours=4))
+
+    def check_capacity(self):
+        # the check is deferred to commit, which never happens inside a TestCase
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS booking_app_reservation_capacity IMMEDIATE")
+            cursor.execute("SET CONSTRAINTS booking_app_reservation_capacity DEFERRED")
+
+    def reserve(self, number_of_seats, period=None):
+        return Reservation.objects.create(
+            user=self.user,
+            table=self.table,
+            number_of_seats=number_of_seats,
+            cost=100,
+            period=period,
+        )
+
+    def test_overlapping_slots_over_capacity(self):
+        self.reserve(4, self.dinner)
+        self.check_capacity()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.reserve(4, self.dinner)
+            self.check_capacity()
+
+    def test_consecutive_slots(self):
+        self.reserve(6, self.dinner)
+        self.reserve(6, self.late)
+        self.check_capacity()
+        self.assertEqual(Reservation.objects.filter(table=self.table).count(), 2)
+
+    def test_open_ended_over_upcoming_slot(self):
+        self.reserve(4, self.late)
+        self.reserve(2)
+        self.check_capacity()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.reserve(1)
+            self.check_capacity()
+
+    def test_booking_across_back_to_back_slots(self):
+        self.reserve(4, self.dinner)
+        self.reserve(4, self.late)
+        both = DateTimeTZRange(self.dinner.lower, self.late.upper)
+        self.assertEqual(
+            held_seats(both),
+            {self.table.pk: 4},
+            msg="Expected the most seats held at once, not the slots added up.",
+        )
+
+        reservation = book_table(self.user, 2, both)
+        self.check_capacity()
+        self.assertEqual(reservation.table, self.table)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.reserve(1, both)
+            self.check_capacity()
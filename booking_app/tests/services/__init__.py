@@ -0,0 +1,10 @@
+from .test_allocation_index import (
+    AllocationIndexTest,
+    SharedAllocationIndexTest,
+    BookWithAllocationIndexTest,
+)
+from .test_assignment import OptimalAssignmentTest
+from .test_pricing import PriceTableTest
+from .test_waitlist import WaitlistTest, WaitlistNotificationTest
+from .test_sharding import ShardRouterTest, ShardedBookingTest
+from .test_replicas import ReplicaRouterTest, ReplicaSelectionTest
@@ -0,0 +1,129 @@
+import itertools
+import random
+import uuid
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+
+from booking_app.models import Table, Reservation
+from booking_app.services import (
+    AllocationIndex,
+    SharedAllocationIndex,
+    book_table,
+    cheapest_classes,
+    get_allocation_index,
+    price,
+)
+
+User = get_user_model()
+
+
+class AllocationIndexTest(TestCase):
+
+    def test_matches_pricing_query(self):
+        rng = random.Random(7)
+        for seats in (rng.randint(4, 10) for _ in range(40)):
+            Table.objects.create(seats=seats)
+        tables = list(Table.objects.all())
+        for table in rng.sample(tables, 25):
+            Table.objects.filter(pk=table.pk).update(
+                available_seats=rng.randint(0, table.seats)
+            )
+
+        index = AllocationIndex()
+        index.load(Table.objects.values_list("id", "seats", "available_seats"))
+
+        for people in range(1, 12):
+            classes = cheapest_classes(people)
+            found = index.cheapest(people)
+            if not classes:
+                self.assertIsNone(found, msg=f"Expected no table for {people} people")
+                continue
+            table = Table.objects.get(pk=found[0])
+            _, available_seats, cost, number_of_seats = classes[0]
+            self.assertEqual(
+                (found[1], found[2], table.available_seats),
+                (cost, number_of_seats, available_seats),
+                msg=f"Index disagrees with the pricing query for {people} people",
+            )
+            self.assertEqual(
+                price(people, table.seats, table.available_seats), found[1:]
+            )
+
+    def test_exclude_and_update(self):
+        index = AllocationIndex()
+        index.load([(1, 4, 4), (2, 4, 4), (3, 6, 6)])
+
+        self.assertEqual(index.cheapest(4), (1, 300, 4))
+        self.assertEqual(index.cheapest(4, exclude={1}), (2, 300, 4))
+        self.assertEqual(index.cheapest(4, exclude={1, 2}), (3, 400, 4))
+
+        index.update([(1, 4, 0), (2, 4, 0)])
+        self.assertEqual(index.cheapest(4), (3, 400, 4))
+        index.discard(3)
+        self.assertIsNone(index.cheapest(4))
+
+
+class SharedAllocationIndexTest(TestCase):
+
+    def setUp(self):
+        self.name = f"booking_test_{uuid.uuid4().hex[:8]}"
+        Table.objects.create(seats=4)
+        Table.objects.create(seats=6)
+
+    def test_workers_see_each_others_updates(self):
+        first = SharedAllocationIndex(self.name, capacity=2048)
+        self.addCleanup(first.unlink)
+        second = SharedAllocationIndex(self.name, capacity=2048)
+
+        four, six = Table.objects.order_by("seats")
+        self.assertEqual(first.cheapest(3)[0], four.pk)
+        self.assertEqual(second.cheapest(3)[0], four.pk)
+
+        second.update([(four.pk, 4, 0)])
+        self.assertEqual(first.cheapest(3)[0], six.pk)
+
+        # ids past the real tables, whose ids depend on the tests run before
+        start = six.pk + 1
+        first.update(
+            (start + i, 8, 8) for i in range(SharedAllocationIndex.RING_SIZE + 1)
+        )
+        first.discard(six.pk)
+        self.assertEqual(second.cheapest(3)[0], start)
+        self.assertEqual(len(second), SharedAllocationIndex.RING_SIZE + 1)
+
+
+@override_settings(BOOKING_ALLOCATION_INDEX="local")
+class BookWithAllocationIndexTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.small = Table.objects.create(seats=4)
+        cls.large = Table.objects.create(seats=8)
+
+    def test_index_follows_bookings(self):
+        index = get_allocation_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = book_table(self.user, 4)
+        self.assertEqual(reservation.table, self.small)
+        self.assertEqual(index.cheapest(4), (self.large.pk, 400, 4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+        self.assertEqual(index.cheapest(4), (self.small.pk, 300, 4))
+
+    def test_stale_suggestion_is_refreshed(self):
+        index = get_allocation_index()
+        index.load([(self.small.pk, 4, 4), (self.large.pk, 8, 8)])
+        Reservation.objects.create(
+            user=self.user, table=self.small, number_of_seats=4, cost=300
+        )
+
+        reservation = book_table(self.user, 4)
+        self.assertEqual(reservation.table, self.large)
+        self.assertEqual(
+            reservation.cost,
+            400,
+            msg=f"Expected 400 cost, but got {reservation.cost}",
+        )
@@ -0,0 +1,81 @@
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from booking_app.services import assign_parties, greedy_assignment, price
+from booking_app.services.assignment import optimal_assignment, price_matrix
+
+
+class OptimalAssignmentTest(SimpleTestCase):
+
+    def test_price_matrix_matches_price(self):
+        people = list(range(1, 12))
+        tables = [(seats, free) for seats in range(2, 11) for free in range(seats + 1)]
+        cost, number_of_seats = price_matrix(
+            people, [seats for seats, _ in tables], [free for _, free in tables]
+        )
+        for i, party in enumerate(people):
+            for j, (seats, free) in enumerate(tables):
+                expected = price(party, seats, free)
+                if expected is None:
+                    self.assertEqual(cost[i, j], float("inf"))
+                else:
+                    self.assertEqual((cost[i, j], number_of_seats[i, j]), expected)
+
+    def test_cheaper_than_greedy(self):
+        # greedy seats the party of 4 at the table with 5 seats left, leaving
+        # the party of 5 to pay for 6 seats at the larger table
+        tables = [(1, 6, 5), (2, 10, 6)]
+        greedy = greedy_assignment([4, 5], tables)
+        optimal = optimal_assignment([4, 5], tables)
+
+        self.assertEqual(greedy, [(1, 400, 4), (2, 600, 6)])
+        self.assertEqual(optimal, [(2, 400, 4), (1, 500, 5)])
+
+    def test_respects_capacity(self):
+        rng = random.Random(3)
+        tables = []
+        for table_id in range(1, 301):
+            seats = rng.randint(4, 10)
+            tables.append((table_id, seats, rng.randint(0, seats)))
+        parties = [rng.randint(1, 8) for _ in range(400)]
+
+        optimal = optimal_assignment(parties, tables)
+        batch = assign_parties(parties, tables)
+        for assignment in (optimal, batch):
+            free = {table_id: available for table_id, _, available in tables}
+            for people, seat in zip(parties, assignment):
+                if seat is not None:
+                    self.assertGreaterEqual(seat[2], people)
+                    free[seat[0]] -= seat[2]
+            self.assertTrue(all(available >= 0 for available in free.values()))
+
+        # parties share tables here, where the rounds are only a heuristic
+        greedy = greedy_assignment(parties, tables)
+        self.assertGreaterEqual(
+            sum(seat is not None for seat in batch),
+            sum(seat is not None for seat in greedy),
+            msg="Expected the batch to seat at least the greedy parties.",
+        )
+
+    def test_seats_at_least_greedy_one_party_per_table(self):
+        # no table has room for two parties, so a round is exact
+        rng = random.Random(5)
+        tables = [(table_id, 10, rng.randint(0, 9)) for table_id in range(1, 201)]
+        parties = [rng.randint(5, 8) for _ in range(250)]
+
+        optimal = optimal_assignment(parties, tables)
+        greedy = greedy_assignment(parties, tables)
+        self.assertGreaterEqual(
+            sum(seat is not None for seat in optimal),
+            sum(seat is not None for seat in greedy),
+            msg="Expected the optimal assignment to seat at least the greedy parties.",
+        )
+
+    def test_over_budget_falls_back_to_greedy(self):
+        tables = [(1, 6, 5), (2, 10, 6)]
+        self.assertIsNone(optimal_assignment([4, 5], tables, max_variables=1))
+        with override_settings(BOOKING_BATCH_MAX_VARIABLES=1):
+            self.assertEqual(
+                assign_parties([4, 5], tables), greedy_assignment([4, 5], tables)
+            )
@@ -0,0 +1,45 @@
+from django.test import SimpleTestCase, override_settings
+
+from booking_app.services import PriceTable, get_price_table, price
+
+
+class PriceTableTest(SimpleTestCase):
+
+    def test_rules(self):
+        for people, seats, available_seats, expected in (
+            (4, 4, 4, (300, 4)),  # the whole table, one seat free
+            (3, 4, 4, (300, 4)),  # odd party at a table one seat larger
+            (3, 6, 3, (300, 3)),  # exactly the seats left
+            (5, 8, 8, (600, 6)),  # rounded up to an even number
+            (5, 6, 5, (500, 5)),  # seats left match before rounding up
+            (5, 8, 5, (500, 5)),
+            (5, 8, 4, None),  # doesn't fit
+            (3, 8, 3, (300, 3)),
+            (1, 8, 1, (100, 1)),
+        ):
+            self.assertEqual(
+                price(people, seats, available_seats),
+                expected,
+                msg=f"Unexpected price for {people} people at {seats}/{available_seats}",
+            )
+
+    def test_larger_tables_priced_on_the_fly(self):
+        table = PriceTable(seat_cost=100, max_seats=4)
+        for people, seats, available_seats in ((3, 4, 4), (9, 12, 12), (12, 12, 12)):
+            self.assertEqual(
+                table.price(people, seats, available_seats),
+                price(people, seats, available_seats),
+                msg=f"Unexpected price for {people} people at {seats}/{available_seats}",
+            )
+
+    def test_cheapest_order(self):
+        classes = [(8, 8), (4, 4), (6, 3), (6, 4)]
+        self.assertEqual(
+            get_price_table().cheapest(3, classes),
+            [(6, 3, 300, 3), (4, 4, 300, 4), (6, 4, 400, 4), (8, 8, 400, 4)],
+        )
+
+    def test_rebuilt_when_seat_cost_changes(self):
+        with override_settings(BOOKING_SEAT_COST=150):
+            self.assertEqual(price(4, 4, 4), (450, 4))
+        self.assertEqual(price(4, 4, 4), (300, 4))
@@ -0,0 +1,158 @@
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.api.authentication import token_cache
+from booking_app.models import Reservation, Restaurant, Table
+from booking_app.routers import use_replica, use_restaurant
+from booking_app.services import (
+    choose_replica,
+    invalidate_availability,
+    pinned_to_primary,
+    replica_for,
+    replicas,
+)
+
+User = get_user_model()
+
+
+@override_settings(BOOKING_REPLICAS=["replica"])
+class ReplicaRouterTest(SimpleTestCase):
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(router.db_for_read(Reservation), "default")
+        with use_replica("replica"):
+            self.assertEqual(router.db_for_read(Reservation), "replica")
+            self.assertEqual(router.db_for_read(User), "replica")
+            self.assertEqual(
+                router.db_for_write(Reservation),
+                "default",
+                msg="Expected writes to stay on the primary.",
+            )
+        self.assertEqual(router.db_for_read(Reservation), "default")
+
+    def test_replica_instance_written_to_primary(self):
+        table = Table(seats=4)
+        table._state.db = "replica"
+        self.assertEqual(router.db_for_write(Table, instance=table), "default")
+
+    def test_shards_not_read_from_replica(self):
+        with use_replica("replica"), use_restaurant(Restaurant(shard="east")):
+            self.assertEqual(router.db_for_read(Table), "east")
+
+
+@override_settings(BOOKING_REPLICAS=["default"])
+class ReplicaSelectionTest(TestCase):
+    """
+    The default database stands in for a replica. It isn't in recovery, so
+    its own check finds it unhealthy; the tests that need a healthy replica
+    take the result of a check that passed.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.token = Token.objects.create(user=cls.user)
+        Table.objects.create(seats=4)
+
+    def setUp(self):
+        token_cache.clear()
+        caches[settings.BOOKING_REPLICA_CACHE_ALIAS].clear()
+        invalidate_availability()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        replicas._checks["default"] = (math.inf, True)
+
+    @override_settings(BOOKING_REPLICA_LAG_CHECK_INTERVAL=60)
+    def test_lag_checked_once_per_interval(self):
+        with self.assertNumQueries(1), self.assertLogs(
+            "booking_app.services.replicas", "WARNING"
+        ):
+            self.assertIsNone(
+                choose_replica(), msg="Expected the reads to fall back to the primary."
+            )
+            self.assertIsNone(choose_replica())
+
+    def test_promoted_replica_skipped(self):
+        replicas._checks.clear()
+        with self.assertLogs("booking_app.services.replicas", "WARNING") as logs:
+            self.assertIsNone(
+                choose_replica(),
+                msg="Expected a database out of recovery not to be read from.",
+            )
+        self.assertIn("isn't streaming", logs.output[0])
+
+    def test_one_thread_checks(self):
+        # another thread is checking: use its last result without a query
+        replicas._checks["default"] = (0, True)
+        replicas._refreshing.add("default")
+        try:
+            with self.assertNumQueries(0):
+                self.assertEqual(choose_replica(), "default")
+            replicas._checks.clear()
+            with self.assertNumQueries(0):
+                self.assertIsNone(
+                    choose_replica(),
+                    msg="Expected a replica never checked yet to count as unhealthy.",
+                )
+        finally:
+            replicas._refreshing.clear()
+
+    def test_reads_in_transaction_stay_on_primary(self):
+        # TestCase runs each test in a transaction
+        with use_replica("default-replica"):
+            self.assertEqual(router.db_for_read(Reservation), "default")
+
+    def test_booking_pins_user_to_primary(self):
+        self.assertEqual(replica_for(self.user), "default")
+        response = self.client.post("/api/reservations/book/", {"number_of_people": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            pinned_to_primary(self.user),
+            msg="Expected the user's reads kept on the primary after booking.",
+        )
+        self.assertIsNone(replica_for(self.user))
+
+        reservation_id = response.json()["id"]
+        response = self.client.get("/api/reservations/")
+        self.assertEqual(
+            [reservation["id"] for reservation in response.json()["results"]],
+            [reservation_id],
+            msg="Expected the user's own booking listed.",
+        )
+
+    def test_failed_booking_does_not_pin(self):
+        response = self.client.post("/api/reservations/book/", {"number_of_people": 9})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(pinned_to_primary(self.user))
+
+    @override_settings(BOOKING_REPLICAS=[])
+    def test_no_pin_without_replicas(self):
+        self.client.post("/api/reservations/book/", {"number_of_people": 2})
+        self.assertFalse(pinned_to_primary(self.user))
+
+    def test_admin_changelist_and_save(self):
+        staff = User.objects.create_superuser(username="staff", password="pass1234")
+        self.client.force_login(staff)
+        response = self.client.get("/admin/booking_app/table/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+
+        table = Table.objects.get()
+        self.client.post(
+            f"/admin/booking_app/table/{table.pk}/change/",
+            {"restaurant": "", "seats": 6},
+        )
+        self.assertTrue(
+            pinned_to_primary(staff),
+            msg="Expected the admin's reads kept on the primary after saving.",
+        )
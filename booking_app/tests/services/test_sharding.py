@@ -0,0 +1,201 @@
+import json
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from booking_app.models import (
+    IdempotencyKey,
+    Reservation,
+    Restaurant,
+    Table,
+    WaitlistEntry,
+)
+from booking_app.routers import current_restaurant, use_restaurant
+from booking_app.services import (
+    book_table,
+    cancel_reservations,
+    drain_waitlist,
+    forget_restaurant,
+)
+
+User = get_user_model()
+
+
+class ShardRouterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.north = Restaurant.objects.create(name="North", slug="north")
+        cls.south = Restaurant.objects.create(name="South", slug="south")
+        cls.north_table = Table.objects.create(restaurant=cls.north, seats=4)
+        cls.south_table = Table.objects.create(restaurant=cls.south, seats=6)
+        cls.legacy_table = Table.objects.create(seats=8)
+
+    def test_routes_to_shard_of_restaurant(self):
+        self.assertEqual(router.db_for_write(Table), "default")
+        with use_restaurant(Restaurant(slug="east", shard="east")):
+            self.assertEqual(router.db_for_write(Table), "east")
+            self.assertEqual(router.db_for_read(Reservation), "east")
+            self.assertEqual(
+                router.db_for_read(Restaurant),
+                "default",
+                msg="Expected restaurants kept in the default database.",
+            )
+            self.assertEqual(
+                router.db_for_write(Reservation, instance=self.user),
+                "east",
+                msg="Expected a user hint not to pull reservations to its database.",
+            )
+            self.assertEqual(
+                router.db_for_read(Reservation, instance=self.north_table),
+                "default",
+                msg="Expected an instance to stay on its database.",
+            )
+        self.assertIsNone(current_restaurant())
+
+    def test_tables_scoped_to_restaurant(self):
+        with use_restaurant(self.north):
+            self.assertEqual(list(Table.objects.all()), [self.north_table])
+        self.assertEqual(
+            Table.objects.count(),
+            3,
+            msg="Expected every table without a restaurant.",
+        )
+
+    def test_booking_scoped_to_restaurant(self):
+        with use_restaurant(self.south):
+            reservation = book_table(self.user, 4)
+            self.assertEqual(reservation.table, self.south_table)
+
+        with use_restaurant(self.north):
+            self.assertEqual(
+                cancel_reservations(self.user, [reservation.pk]),
+                set(),
+                msg="Expected another restaurant's reservation left alone.",
+            )
+
+    def test_drain_seats_each_restaurant(self):
+        Reservation.objects.create(
+            user=self.user, table=self.north_table, number_of_seats=4, cost=400
+        )
+        expires = timezone.now() + timedelta(hours=1)
+        north, south = (
+            WaitlistEntry.objects.create(
+                user=self.user,
+                restaurant=restaurant,
+                number_of_people=2,
+                expires=expires,
+            )
+            for restaurant in (self.north, self.south)
+        )
+
+        self.assertEqual(drain_waitlist(), {"booked": 1})
+        north.refresh_from_db()
+        south.refresh_from_db()
+        self.assertEqual(
+            north.status,
+            WaitlistEntry.Status.WAITING,
+            msg="Expected no table of another restaurant given to the entry.",
+        )
+        self.assertEqual(
+            Reservation.objects.get(pk=south.reservation_id).table, self.south_table
+        )
+
+    def test_shard_must_be_configured(self):
+        with self.assertRaises(ValidationError):
+            Restaurant(name="East", slug="east", shard="east").full_clean()
+
+
+@skipUnless(settings.BOOKING_SHARDS, "BOOKING_SHARDS is not set.")
+class ShardedBookingTest(TestCase):
+    """
+    Bookings of a restaurant on another database; run with `BOOKING_SHARDS`
+    naming at least one shard.
+    """
+
+    databases = {"default", *settings.BOOKING_SHARDS}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shard = settings.BOOKING_SHARDS[0]
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.restaurant = Restaurant.objects.create(
+            name="Remote", slug="remote", shard=cls.shard
+        )
+        with use_restaurant(cls.restaurant):
+            cls.table = Table.objects.create(restaurant=cls.restaurant, seats=4)
+
+    def test_book_and_cancel_on_shard(self):
+        with use_restaurant(self.restaurant):
+            reservation = book_table(self.user, 4)
+        self.assertEqual(reservation._state.db, self.shard)
+        self.assertFalse(
+            Reservation.objects.using("default").exists(),
+            msg="Expected nothing booked in the default database.",
+        )
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.available_seats, 0)
+
+        with use_restaurant(self.restaurant):
+            self.assertEqual(
+                cancel_reservations(self.user, [reservation.pk]), {reservation.pk}
+            )
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.available_seats, 4)
+
+    def test_book_through_restaurant_route(self):
+        forget_restaurant("remote")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        response = client.post(
+            "/api/reservations/restaurants/remote/book/",
+            {"number_of_people": 4},
+            HTTP_IDEMPOTENCY_KEY="remote-1",
+        )
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        self.assertTrue(
+            Reservation.objects.using(self.shard).filter(user=self.user).exists()
+        )
+        self.assertTrue(
+            IdempotencyKey.objects.using(self.shard).exists(),
+            msg="Expected the key stored in the shard of the restaurant.",
+        )
+
+    def test_export_from_shard(self):
+        with use_restaurant(self.restaurant):
+            reservation = book_table(self.user, 4)
+        forget_restaurant("remote")
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}"
+        )
+        response = client.get("/api/reservations/restaurants/remote/export/")
+        self.assertEqual(
+            response.status_code,
+            200,
+            msg=f"Expected 200, but got {response.status_code}",
+        )
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            [(row["id"], row["user"]) for row in rows],
+            [(reservation.pk, "testuser")],
+            msg=f"Expected the reservation booked on the shard, but got {rows}",
+        )
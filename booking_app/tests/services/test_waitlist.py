@@ -0,0 +1,167 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from booking_app.models import Reservation, Table, WaitlistEntry
+from booking_app.services import (
+    cancel_reservations,
+    drain_waitlist,
+    join_waitlist,
+    listen,
+    wait_for_notification,
+)
+
+User = get_user_model()
+
+
+class WaitlistTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="testuser", password="pass1234")
+        cls.other_user = User.objects.create_user(
+            username="otheruser", password="pass5678"
+        )
+        cls.small = Table.objects.create(seats=4)
+        cls.large = Table.objects.create(seats=6)
+        cls.held = {
+            table: Reservation.objects.create(
+                user=cls.other_user,
+                table=table,
+                number_of_seats=table.seats,
+                cost=100 * table.seats,
+            )
+            for table in (cls.small, cls.large)
+        }
+
+    def test_join_waitlist_once(self):
+        entry = join_waitlist(self.user, 4)
+        self.assertEqual(entry.status, WaitlistEntry.Status.WAITING)
+        self.assertEqual(
+            join_waitlist(self.user, 4).pk,
+            entry.pk,
+            msg="Expected a retry to get the waiting entry back.",
+        )
+        self.assertNotEqual(join_waitlist(self.user, 2).pk, entry.pk)
+
+    def test_drain_books_in_queue_order(self):
+        first = join_waitlist(self.user, 4)
+        second = join_waitlist(self.other_user, 4)
+        cancel_reservations(self.other_user, [self.held[self.small].pk])
+
+        self.assertEqual(drain_waitlist(), {"booked": 1})
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(
+            first.status,
+            WaitlistEntry.Status.BOOKED,
+            msg=f"Expected the first entry to be booked, but got {first.status}",
+        )
+        self.assertEqual(second.status, WaitlistEntry.Status.WAITING)
+
+        reservation = Reservation.objects.get(pk=first.reservation_id)
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.table, self.small)
+        self.small.refresh_from_db()
+        self.assertEqual(
+            self.small.available_seats,
+            0,
+            msg=f"Expected the table to be full again, but got {self.small.available_seats}",
+        )
+
+    def test_drain_skips_parties_that_dont_fit(self):
+        large = join_waitlist(self.user, 6)
+        small = join_waitlist(self.other_user, 3)
+        cancel_reservations(self.other_user, [self.held[self.small].pk])
+
+        self.assertEqual(drain_waitlist(), {"booked": 1})
+        large.refresh_from_db()
+        small.refresh_from_db()
+        self.assertEqual(large.status, WaitlistEntry.Status.WAITING)
+        self.assertEqual(small.status, WaitlistEntry.Status.BOOKED)
+
+    def test_drain_locks_no_table_without_room(self):
+        entry = join_waitlist(self.user, 4)
+        cancel_reservations(self.other_user, [self.held[self.large].pk])
+        Reservation.objects.create(
+            user=self.other_user, table=self.large, number_of_seats=3, cost=300
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(drain_waitlist(), {})
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries
+                if "booking_app_reservation" in query["sql"]
+                or "FOR UPDATE" in query["sql"] and "booking_app_table" in query["sql"]
+            ],
+            msg="Expected no table locked or priced when no party fits.",
+        )
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.Status.WAITING)
+
+    def test_drain_walks_the_queue_in_batches(self):
+        Reservation.objects.all().delete()
+        entries = [join_waitlist(self.user, people) for people in (1, 2, 3)]
+
+        self.assertEqual(drain_waitlist(batch_size=1), {"booked": 3})
+        self.assertFalse(
+            WaitlistEntry.objects.filter(
+                pk__in=[entry.pk for entry in entries],
+                status=WaitlistEntry.Status.WAITING,
+            ).exists(),
+            msg="Expected every entry to be booked.",
+        )
+
+    def test_drain_expires_old_entries(self):
+        entry = join_waitlist(self.user, 2)
+        WaitlistEntry.objects.filter(pk=entry.pk).update(
+            expires=timezone.now() - timedelta(seconds=1)
+        )
+        Reservation.objects.all().delete()
+
+        self.assertEqual(drain_waitlist(), {"expired": 1})
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.Status.EXPIRED)
+        self.assertIsNone(entry.reservation_id)
+        self.assertFalse(Reservation.objects.exists())
+
+
+class WaitlistNotificationTest(TransactionTestCase):
+    """
+    The triggers notify the worker on commit, so this can't run inside the
+    transaction of a `TestCase`.
+    """
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("UNLISTEN *")
+
+    def test_released_seats_notify(self):
+        user = User.objects.create_user(username="testuser", password="pass1234")
+        listen()
+        self.assertFalse(wait_for_notification(0.1))
+
+        table = Table.objects.create(seats=4)
+        self.assertTrue(
+            wait_for_notification(5), msg="Expected a new table to notify."
+        )
+
+        reservation = Reservation.objects.create(
+            user=user, table=table, number_of_seats=4, cost=400
+        )
+        self.assertFalse(
+            wait_for_notification(0.1), msg="Expected a booking not to notify."
+        )
+
+        cancel_reservations(user, [reservation.pk])
+        self.assertTrue(
+            wait_for_notification(5), msg="Expected a cancellation to notify."
+        )
+        # the delete and the counter update came in one notification
+        self.assertFalse(wait_for_notification(0.1))
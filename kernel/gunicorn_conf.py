@@ -0,0 +1,124 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn -c python:kernel.gunicorn_conf kernel.wsgi:application
+
+The application is imported once in the master (`preload_app`) and its
+objects are moved out of the garbage collector's reach with `gc.freeze()`
+before workers fork, so the workers share those memory pages with the
+master instead of copying them the first time a collection touches them.
+Each worker builds the URL resolver before accepting requests, fills its
+connection pool (`DB_POOL`) or, when connections are kept between requests
+(`DB_CONN_MAX_AGE`) by a sync worker, opens its database connection; a
+connection closed after every request gains nothing from being opened
+early. Workers are replaced after `max_requests` requests.
+
+Every setting can be overridden from the environment (`GUNICORN_*`).
+"""
+
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(
+    os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+worker_class = os.environ.get(
+    "GUNICORN_WORKER_CLASS", "gthread" if threads > 1 else "sync"
+)
+preload_app = True
+
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# every worker writes its Prometheus samples here and /metrics adds them up;
+# set before the application (and prometheus_client) is imported
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "booking_metrics")
+)
+
+accesslog = os.environ.get("GUNICORN_ACCESSLOG", "-") or None
+loglevel = os.environ.get("GUNICORN_LOGLEVEL", "info")
+
+
+def on_starting(server):
+    # samples of the previous run
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+    # a shared allocation index left by the previous run may be stale; the
+    # first lookup after start rebuilds it from the database
+    from django.conf import settings
+    from django.db import DEFAULT_DB_ALIAS, DatabaseError
+    from django.utils import timezone
+
+    from booking_app.services import (
+        add_months,
+        create_partitions,
+        get_allocation_index,
+        month_start,
+    )
+
+    if settings.BOOKING_ALLOCATION_INDEX == "shared":
+        get_allocation_index().unlink()
+        get_allocation_index.cache_clear()
+
+    # bookings fail in a month without a reservation partition; this covers
+    # a missed `reservation_partitions` run, it doesn't replace the cron job
+    current = month_start(timezone.now())
+    last = add_months(current, settings.BOOKING_RESERVATION_PARTITIONS_AHEAD)
+    for using in (DEFAULT_DB_ALIAS, *settings.BOOKING_SHARDS):
+        try:
+            for name in create_partitions(current, last, using):
+                server.log.warning("Created the missing partition %s.", name)
+        except DatabaseError:
+            server.log.exception("Couldn't create reservation partitions on %s.", using)
+
+
+def when_ready(server):
+    from django.db import connections
+
+    # sockets opened while importing must not be shared by the workers, nor
+    # a connection pool (DB_POOL) and its threads; each worker opens its own
+    connections.close_all()
+    for connection in connections.all():
+        if getattr(connection, "pool", None):
+            connection.close_pool()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+    from django.urls import get_resolver
+
+    get_resolver()._populate()
+    for connection in connections.all():
+        # a pool is shared by the worker's threads; a connection of its own
+        # only outlives the first request with CONN_MAX_AGE, and only a
+        # sync worker serves requests on this thread
+        if getattr(connection, "pool", None):
+            connection.pool.open(wait=True)
+        elif connection.settings_dict["CONN_MAX_AGE"] != 0 and worker_class == "sync":
+            connection.ensure_connection()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    from django.conf import settings
+
+    from booking_app.services import get_allocation_index
+
+    if settings.BOOKING_ALLOCATION_INDEX == "shared":
+        get_allocation_index().unlink()
@@ -0,0 +1,73 @@
+"""
+Prometheus metrics of the requests timed by `kernel.middleware.QueryMetricsMiddleware`.
+
+When `PROMETHEUS_MULTIPROC_DIR` is set (see `kernel.gunicorn_conf`), every
+process writes its samples to files in that directory and `/metrics` adds
+up the files of all gunicorn workers.
+"""
+
+import os
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LABELS = ["route", "method"]
+
+REQUEST_SECONDS = Histogram(
+    "django_request_duration_seconds",
+    "Time spent handling the request.",
+    LABELS,
+)
+DB_SECONDS = Histogram(
+    "django_request_db_duration_seconds",
+    "Time spent in SQL queries during the request.",
+    LABELS,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_QUERIES = Histogram(
+    "django_request_db_queries",
+    "SQL queries run during the request.",
+    LABELS,
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89),
+)
+RESPONSES = Counter(
+    "django_responses",
+    "Responses by status code.",
+    [*LABELS, "status"],
+)
+
+
+def observe(route, method, status, seconds, db_seconds, queries):
+    REQUEST_SECONDS.labels(route, method).observe(seconds)
+    DB_SECONDS.labels(route, method).observe(db_seconds)
+    DB_QUERIES.labels(route, method).observe(queries)
+    RESPONSES.labels(route, method, status).inc()
+
+
+def metrics(request):
+    """
+    The metrics of every worker in the Prometheus text format.
+
+    With `METRICS_TOKEN` set, the scraper must send it as a bearer token.
+    """
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponseForbidden()
+
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,107 @@
+"""
+Per-request SQL and latency instrumentation.
+"""
+
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from kernel import metrics
+
+# anything else is recorded as "other", to bound the label values
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# `[queries, seconds]` of the request being handled; a context variable so it
+# follows the request into `sync_to_async` threads
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    totals = _request_queries.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def _install(connection):
+    # `connection_created` is sent again each time a connection reconnects
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+class QueryMetricsMiddleware:
+    """
+    Count the SQL queries of each request and the time they take.
+
+    The totals are sent back in a `Server-Timing` header
+    (`db;desc="<n> queries";dur=<ms>, total;dur=<ms>`) and recorded in the
+    per-route histograms served by `/metrics`. Queries run while a streaming
+    response is sent are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        connection_created.connect(_on_connection_created)
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        totals = [0, 0.0]
+        token = _request_queries.set(totals)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self._record(request, response, started, totals)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        totals = [0, 0.0]
+        token = _request_queries.set(totals)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        return self._record(request, response, started, totals)
+
+    @staticmethod
+    def _record(request, response, started, totals):
+        seconds = time.perf_counter() - started
+        queries, db_seconds = totals
+        response.headers["Server-Timing"] = (
+            f'db;desc="{queries} queries";dur={db_seconds * 1000:.2f}, '
+            f"total;dur={seconds * 1000:.2f}"
+        )
+
+        match = request.resolver_match
+        metrics.observe(
+            route=match.view_name if match else "<unmatched>",
+            method=request.method if request.method in METHODS else "other",
+            status=response.status_code,
+            seconds=seconds,
+            db_seconds=db_seconds,
+            queries=queries,
+        )
+        return response
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     "rest_framework",
     "rest_framework.authtoken",
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "kernel.middleware.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -74,16 +76,128 @@ WSGI_APPLICATION = "kernel.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        # psycopg 3, or psycopg2 when only that is installed
+        "ENGINE": "django.db.backends.postgresql",
         "NAME": os.environ.get('DB_NAME'),
         "USER": os.environ.get('DB_USER'),
         "PASSWORD": os.environ.get('DB_PASSWORD'),
         "HOST": os.environ.get('DB_HOST', 'localhost'),
         "PORT": os.environ.get('DB_PORT', '5432'),
         "TEST": {"NAME": os.environ.get("DB_TEST", "db_test")},
+        # keep each worker's connection open between requests (seconds)
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "0")),
+        # check a kept or pooled connection before a request uses it
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "OPTIONS": {},
     },
 }
 
+# Connection pool of psycopg 3 (`psycopg[pool]`), shared by the threads of a
+# worker process instead of a connection kept per thread: connections kept
+# open and the most opened per process, seconds a request waits for one
+# before failing, and seconds an idle connection, or any connection, is
+# kept. The pool replaces `DB_CONN_MAX_AGE`.
+
+DB_POOL = os.environ.get("DB_POOL", "False") == "True"
+if DB_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "600")),
+        "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "3600")),
+    }
+
+# Connecting through PgBouncer in transaction pooling mode, where a session
+# only lasts one transaction: no server-side cursors (the export then fetches
+# its rows at once), and `process_waitlist` polls instead of LISTENing.
+# Django already disables psycopg 3's prepared statements. Give the database
+# role the UTC time zone so connections don't need a `SET TIME ZONE`.
+
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "False") == "True"
+if DB_PGBOUNCER:
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+
+def _aliases(name):
+    return [
+        alias.strip() for alias in os.environ.get(name, "").split(",") if alias.strip()
+    ]
+
+
+def _database(alias, test):
+    """
+    `DATABASES` entry of `alias` from `DB_<ALIAS>_NAME`, `_HOST`, `_PORT`,
+    `_USER` and `_PASSWORD`, which default to the values of the default
+    database.
+    """
+    prefix = f"DB_{alias.upper()}_"
+    default = DATABASES["default"]
+    return {
+        **default,
+        **{
+            key: os.environ.get(prefix + key, default[key])
+            for key in ("NAME", "USER", "PASSWORD", "HOST", "PORT")
+        },
+        "OPTIONS": dict(default["OPTIONS"]),
+        "TEST": test,
+    }
+
+
+# Shard databases holding the tables and reservations of restaurants (see
+# `booking_app.routers`): comma-separated aliases, configured by `_database`;
+# `DB_<ALIAS>_TEST` names the test database.
+
+BOOKING_SHARDS = _aliases("BOOKING_SHARDS")
+for _alias in BOOKING_SHARDS:
+    DATABASES[_alias] = _database(
+        _alias,
+        {
+            "NAME": os.environ.get(
+                f"DB_{_alias.upper()}_TEST",
+                f"{DATABASES['default']['TEST']['NAME']}_{_alias}",
+            )
+        },
+    )
+
+# Read replicas of the default database, configured like the shards. List
+# and availability reads and admin changelists go to a replica whose lag is
+# at most `BOOKING_REPLICA_MAX_LAG` seconds, checked every
+# `BOOKING_REPLICA_LAG_CHECK_INTERVAL` seconds. A user's reads stay on the
+# primary for `BOOKING_REPLICA_STICKY_SECONDS` after they book or cancel,
+# remembered in the `BOOKING_REPLICA_CACHE_ALIAS` cache (share it between
+# workers). The check runs on the request path, so connecting to a replica
+# gives up after `BOOKING_REPLICA_CONNECT_TIMEOUT` seconds (libpq rounds it
+# up to 2) and its queries after `BOOKING_REPLICA_STATEMENT_TIMEOUT` seconds.
+
+BOOKING_REPLICAS = _aliases("BOOKING_REPLICAS")
+BOOKING_REPLICA_CONNECT_TIMEOUT = int(
+    os.environ.get("BOOKING_REPLICA_CONNECT_TIMEOUT", "2")
+)
+BOOKING_REPLICA_STATEMENT_TIMEOUT = float(
+    os.environ.get("BOOKING_REPLICA_STATEMENT_TIMEOUT", "10")
+)
+for _alias in BOOKING_REPLICAS:
+    DATABASES[_alias] = _database(_alias, {"MIRROR": "default"})
+    DATABASES[_alias]["OPTIONS"].update(
+        {
+            "connect_timeout": BOOKING_REPLICA_CONNECT_TIMEOUT,
+            "options": "-c statement_timeout="
+            f"{int(BOOKING_REPLICA_STATEMENT_TIMEOUT * 1000)}",
+        }
+    )
+BOOKING_REPLICA_MAX_LAG = float(os.environ.get("BOOKING_REPLICA_MAX_LAG", "5"))
+BOOKING_REPLICA_LAG_CHECK_INTERVAL = float(
+    os.environ.get("BOOKING_REPLICA_LAG_CHECK_INTERVAL", "1")
+)
+BOOKING_REPLICA_STICKY_SECONDS = int(
+    os.environ.get("BOOKING_REPLICA_STICKY_SECONDS", "10")
+)
+BOOKING_REPLICA_CACHE_ALIAS = os.environ.get("BOOKING_REPLICA_CACHE_ALIAS", "default")
+
+DATABASE_ROUTERS = ["booking_app.routers.ShardRouter"]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,15 +239,144 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+AUTHENTICATION_BACKENDS = [
+    "booking_app.services.passwords.PasswordPoolBackend",
+]
+
+# Password hashing on login: pool processes per worker (0 hashes in the
+# request thread), logins hashing or waiting at once per worker, and seconds
+# a login waits for a slot before getting 503. The request thread still
+# waits for the pool, so it only frees a worker for other requests under
+# gthread (GUNICORN_THREADS > 1) or ASGI; a sync worker would just start
+# more processes, hence off by default.
+
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", "0"))
+LOGIN_MAX_CONCURRENCY = int(os.environ.get("LOGIN_MAX_CONCURRENCY", "8"))
+LOGIN_QUEUE_TIMEOUT = float(os.environ.get("LOGIN_QUEUE_TIMEOUT", "5"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "booking_app.api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "EXCEPTION_HANDLER": "booking_app.api.exceptions.exception_handler",
 }
 
+# Token lookups cached by CachedTokenAuthentication: seconds an entry lives,
+# entries kept per process, and an optional Django cache alias shared by all
+# workers.
+
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get("AUTH_TOKEN_CACHE_TTL", "60"))
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get("AUTH_TOKEN_CACHE_ALIAS", "")
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Restaurant Booking API",
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+
+# Booking
+# Cost per seat, and the largest table size whose prices are precomputed
+# (larger tables are priced on the fly).
+
+BOOKING_SEAT_COST = int(os.environ.get("BOOKING_SEAT_COST", "100"))
+BOOKING_MAX_TABLE_SEATS = int(os.environ.get("BOOKING_MAX_TABLE_SEATS", "10"))
+
+# Retries when every fitting table is locked by a concurrent booking, and
+# the base backoff (seconds) between them.
+
+BOOKING_LOCK_RETRIES = int(os.environ.get("BOOKING_LOCK_RETRIES", "3"))
+BOOKING_LOCK_BACKOFF = float(os.environ.get("BOOKING_LOCK_BACKOFF", "0.005"))
+
+# Length (minutes) of a time slot booked with only a start, and how many days
+# ahead a slot may start.
+
+BOOKING_SLOT_MINUTES = int(os.environ.get("BOOKING_SLOT_MINUTES", "120"))
+BOOKING_HORIZON_DAYS = int(os.environ.get("BOOKING_HORIZON_DAYS", "90"))
+
+# Largest number of parties accepted by one `book-batch` request.
+
+BOOKING_BATCH_MAX_SIZE = int(os.environ.get("BOOKING_BATCH_MAX_SIZE", "500"))
+
+# Largest number of reservations cancelled by one `cancel` request.
+
+BOOKING_CANCEL_MAX_SIZE = int(os.environ.get("BOOKING_CANCEL_MAX_SIZE", "500"))
+
+# Waitlist of rejected bookings: seconds an entry waits before it expires,
+# entries booked per transaction by `process_waitlist`, and seconds the
+# worker waits for a notification before draining anyway.
+
+BOOKING_WAITLIST_TTL = int(os.environ.get("BOOKING_WAITLIST_TTL", "1800"))
+BOOKING_WAITLIST_BATCH_SIZE = int(
+    os.environ.get("BOOKING_WAITLIST_BATCH_SIZE", "100")
+)
+BOOKING_WAITLIST_POLL_INTERVAL = float(
+    os.environ.get("BOOKING_WAITLIST_POLL_INTERVAL", "30")
+)
+
+# Restaurant served by the routes without one in the URL; empty serves every
+# table of the default database. Seconds a restaurant is cached by slug.
+
+BOOKING_DEFAULT_RESTAURANT = os.environ.get("BOOKING_DEFAULT_RESTAURANT", "")
+BOOKING_RESTAURANT_CACHE_TTL = int(
+    os.environ.get("BOOKING_RESTAURANT_CACHE_TTL", "60")
+)
+
+# Idempotency keys of `book` requests: seconds a stored response is replayed
+# for, and the cache alias kept in front of the table.
+
+BOOKING_IDEMPOTENCY_TTL = int(os.environ.get("BOOKING_IDEMPOTENCY_TTL", "86400"))
+BOOKING_IDEMPOTENCY_CACHE_ALIAS = os.environ.get(
+    "BOOKING_IDEMPOTENCY_CACHE_ALIAS", "default"
+)
+
+# How a batch is seated: "greedy" (request order) or "optimal" (solved as a
+# whole, falling back to greedy past the size or time budget).
+
+BOOKING_BATCH_STRATEGY = os.environ.get("BOOKING_BATCH_STRATEGY", "optimal")
+BOOKING_BATCH_MAX_VARIABLES = int(
+    os.environ.get("BOOKING_BATCH_MAX_VARIABLES", "20000")
+)
+BOOKING_BATCH_TIME_LIMIT = float(os.environ.get("BOOKING_BATCH_TIME_LIMIT", "0.5"))
+
+# Rows fetched per round trip by the streaming reservation export.
+
+BOOKING_EXPORT_CHUNK_SIZE = int(os.environ.get("BOOKING_EXPORT_CHUNK_SIZE", "2000"))
+
+# Cache alias holding the availability summary and the seconds it is kept;
+# with a per-process cache, changes made by other workers show up after at
+# most that long.
+
+BOOKING_AVAILABILITY_CACHE_ALIAS = os.environ.get(
+    "BOOKING_AVAILABILITY_CACHE_ALIAS", "default"
+)
+BOOKING_AVAILABILITY_CACHE_TTL = int(
+    os.environ.get("BOOKING_AVAILABILITY_CACHE_TTL", "10")
+)
+
+# In-memory index suggesting the cheapest table: "" (off), "local" (per
+# process) or "shared" (one per host, shared by all workers).
+
+BOOKING_ALLOCATION_INDEX = os.environ.get("BOOKING_ALLOCATION_INDEX", "")
+BOOKING_ALLOCATION_INDEX_CAPACITY = int(
+    os.environ.get("BOOKING_ALLOCATION_INDEX_CAPACITY", "4096")
+)
+
+# Monthly reservation partitions: months created ahead of the current one,
+# months kept attached before it, and the schema older months are moved to.
+
+BOOKING_RESERVATION_PARTITIONS_AHEAD = int(
+    os.environ.get("BOOKING_RESERVATION_PARTITIONS_AHEAD", "3")
+)
+BOOKING_RESERVATION_RETENTION_MONTHS = int(
+    os.environ.get("BOOKING_RESERVATION_RETENTION_MONTHS", "12")
+)
+BOOKING_RESERVATION_ARCHIVE_SCHEMA = os.environ.get(
+    "BOOKING_RESERVATION_ARCHIVE_SCHEMA", "archive"
+)
+
+# Bearer token required by /metrics; empty leaves it open (restrict it at the
+# proxy instead).
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
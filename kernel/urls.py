@@ -24,6 +24,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
 )
 
+from kernel.metrics import metrics
 
 
 urlpatterns = [
@@ -37,4 +38,7 @@ urlpatterns = [
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
 
     path("api/reservations/", include("booking_app.api.urls")),
+    path("api/async/reservations/", include("booking_app.api.async_urls")),
+
+    path("metrics", metrics, name="metrics"),
 ]